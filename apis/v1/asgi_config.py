@@ -0,0 +1,10 @@
+from django.urls import path, include
+
+# async read-only views served by ASGI before the rest of v1 endpoints
+urlpatterns = [
+    path("cars/", include("cars.api.v1.asgi_urls")),
+    path("dealers/", include("dealers.api.v1.asgi_urls")),
+    path("marketing/", include("marketing.api.v1.asgi_urls")),
+    path("orders/", include("orders.api.v1.asgi_urls")),
+    path("suppliers/", include("suppliers.api.v1.asgi_urls")),
+]
@@ -0,0 +1,357 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from django.utils import timezone
+
+from cars.models import Car, CarCharacteristic
+from customers.models import Customer
+from dealers.models import Dealer, DealerStockItem
+from marketing.models import (
+    DealerDiscount,
+    DealerMarketingCampaign,
+    SupplierDiscount,
+    SupplierMarketingCampaign,
+)
+from orders.models import (
+    CustomerDealsHistory,
+    CustomerOffer,
+    DealerDealsHistory,
+    DealerOffer,
+    TotalDealerPurchase,
+    TotalSupplierPurchase,
+)
+from suppliers.models import Supplier, SupplierStockItem
+from users.models import UserProfile
+
+# scale name -> (dealers, suppliers, cars, customers)
+SCALES: Dict[str, Tuple[int, int, int, int]] = {
+    "small": (5, 5, 30, 50),
+    "medium": (20, 20, 150, 300),
+    "large": (50, 50, 500, 1500),
+}
+
+# (min amount, percentage) tiers of generated discounts
+DISCOUNT_TIERS = [(1, 2), (5, 5), (20, 8), (50, 12)]
+# days of generated deals history
+HISTORY_DAYS = 120
+
+
+class SyntheticMarket:
+    """
+    Seeded generator of cars market for benchmarks.
+
+    The same scale and seed always generate the same market, so results
+    of different commits are comparable. Rows are created by bulk inserts
+    without signals, so the market should be created inside a rolled back transaction.
+
+    Attributes
+    ----------
+    dealers, suppliers, cars, customers : int
+        amount of generated entries
+    stock_share : float
+        share of cars on stock of every seller
+    sold_out_share : float
+        share of sold out stock items
+    campaign_overlap : float
+        share of cars of marketing campaigns taken from common "hot" cars,
+        so campaigns of different sellers compete for the same cars
+    deals_per_customer : int
+        amount of customer's deals in history
+    offers : int
+        amount of generated customers and dealers offers
+    seed : int
+        seed of random generator
+    """
+
+    def __init__(
+        self,
+        dealers: int,
+        suppliers: int,
+        cars: int,
+        customers: int,
+        stock_share: float = 0.3,
+        sold_out_share: float = 0.1,
+        campaign_overlap: float = 0.5,
+        deals_per_customer: int = 5,
+        offers: int = 50,
+        seed: int = 0,
+    ):
+        self.dealers = dealers
+        self.suppliers = suppliers
+        self.cars = cars
+        self.customers = customers
+        self.stock_share = stock_share
+        self.sold_out_share = sold_out_share
+        self.campaign_overlap = campaign_overlap
+        self.deals_per_customer = deals_per_customer
+        self.offers = offers
+        self.random = random.Random(seed)
+
+    @classmethod
+    def from_scale(cls, scale: str, seed: int = 0) -> "SyntheticMarket":
+        dealers, suppliers, cars, customers = SCALES[scale]
+        return cls(dealers, suppliers, cars, customers, seed=seed)
+
+    def create(self) -> dict:
+        """
+        Function to create the market in database.
+        Returns created entries by kind.
+        """
+        cars = self._create_cars()
+        prices = {car.pk: self.random.randint(10, 100) * 1000 for car in cars}
+        suppliers = self._create_companies(Supplier, UserProfile.SUPPLIER)
+        dealers = self._create_companies(Dealer, UserProfile.DEALER)
+        customers = self._create_customers()
+
+        self._create_stock(SupplierStockItem, "supplier", suppliers, cars, prices, 1)
+        dealers_stock = self._create_stock(
+            DealerStockItem, "dealer", dealers, cars, prices, 1.3
+        )
+        self._create_characteristics(dealers, cars)
+        self._create_discounts(SupplierDiscount, "supplier", suppliers)
+        self._create_discounts(DealerDiscount, "dealer", dealers)
+        self._create_campaigns(SupplierMarketingCampaign, "supplier", suppliers, cars)
+        self._create_campaigns(DealerMarketingCampaign, "dealer", dealers, cars)
+        self._create_history(dealers, suppliers, customers, dealers_stock, prices)
+
+        return {
+            "cars": cars,
+            "suppliers": suppliers,
+            "dealers": dealers,
+            "customers": customers,
+            "customer_offers": self._create_customer_offers(customers, cars),
+            "dealer_offers": self._create_dealer_offers(dealers, cars),
+        }
+
+    def _users(self, role: str, amount: int) -> List[UserProfile]:
+        return UserProfile.objects.bulk_create(
+            UserProfile(
+                username=f"benchmark_{role}_{index}",
+                email=f"benchmark_{role}_{index}@example.com",
+                role=role,
+                is_active=True,
+            )
+            for index in range(amount)
+        )
+
+    def _create_cars(self) -> List[Car]:
+        brands = max(2, self.cars // 10)
+        return Car.objects.bulk_create(
+            Car(
+                brand=f"Brand{index % brands}",
+                car_model=f"Model{index % (brands * 3)}",
+                generation=str(self.random.randint(1, 3)),
+                year_release=self.random.randint(2000, 2023),
+            )
+            for index in range(self.cars)
+        )
+
+    def _create_companies(self, model, role: str) -> list:
+        amount = self.dealers if model is Dealer else self.suppliers
+        return model.objects.bulk_create(
+            model(
+                name=f"{role} {index}",
+                balance=self.random.randint(1, 50) * 1_000_000,
+                user_profile=user,
+            )
+            for index, user in enumerate(self._users(role, amount))
+        )
+
+    def _create_customers(self) -> List[Customer]:
+        return Customer.objects.bulk_create(
+            Customer(
+                name=f"customer {index}",
+                balance=self.random.randint(10, 300) * 1000,
+                user_profile=user,
+            )
+            for index, user in enumerate(
+                self._users(UserProfile.CUSTOMER, self.customers)
+            )
+        )
+
+    def _create_stock(
+        self, model, seller_field: str, sellers: list, cars: list, prices, markup
+    ) -> list:
+        stock_size = max(1, int(len(cars) * self.stock_share))
+        items = []
+        for seller in sellers:
+            for car in self.random.sample(cars, stock_size):
+                sold_out = self.random.random() < self.sold_out_share
+                items.append(
+                    model(
+                        **{seller_field: seller},
+                        car=car,
+                        amount=0 if sold_out else self.random.randint(1, 500),
+                        price_per_one=int(
+                            prices[car.pk] * markup * self.random.uniform(0.8, 1.2)
+                        ),
+                    )
+                )
+        return model.objects.bulk_create(items)
+
+    def _create_characteristics(self, dealers: List[Dealer], cars: List[Car]):
+        characteristics = CarCharacteristic.objects.bulk_create(
+            CarCharacteristic(brand=brand)
+            for brand in sorted({car.brand for car in cars})
+        )
+        through = Dealer.car_characteristics.through
+        through.objects.bulk_create(
+            through(dealer_id=dealer.pk, carcharacteristic_id=characteristic.pk)
+            for dealer in dealers
+            for characteristic in self.random.sample(
+                characteristics, min(3, len(characteristics))
+            )
+        )
+
+    def _create_discounts(self, model, seller_field: str, sellers: list):
+        model.objects.bulk_create(
+            model(
+                **{seller_field: seller},
+                name=f"{discount_type} {min_amount}",
+                min_amount=min_amount,
+                percentage=Decimal(percentage),
+                discount_type=discount_type,
+            )
+            for seller in sellers
+            for min_amount, percentage in self.random.sample(
+                DISCOUNT_TIERS, self.random.randint(0, len(DISCOUNT_TIERS))
+            )
+            for discount_type in [self.random.choice(["CD", "BD"])]
+        )
+
+    def _create_campaigns(self, model, seller_field: str, sellers: list, cars: list):
+        now = timezone.now()
+        hot_cars = cars[: max(1, len(cars) // 10)]
+        campaigns = model.objects.bulk_create(
+            model(
+                **{seller_field: seller},
+                name=f"campaign {index}",
+                description="benchmark",
+                percentage=Decimal(self.random.randint(1, 15)),
+                start_date=now - timedelta(days=10),
+                end_date=now + timedelta(days=10),
+            )
+            for seller in sellers
+            for index in range(self.random.randint(0, 2))
+        )
+
+        through = model.cars.through
+        field = model.cars.field
+        rows = set()
+        for campaign in campaigns:
+            for _ in range(5):
+                source = (
+                    hot_cars if self.random.random() < self.campaign_overlap else cars
+                )
+                rows.add((campaign.pk, self.random.choice(source).pk))
+        through.objects.bulk_create(
+            through(
+                **{
+                    f"{field.m2m_field_name()}_id": campaign_id,
+                    f"{field.m2m_reverse_field_name()}_id": car_id,
+                }
+            )
+            for campaign_id, car_id in sorted(rows)
+        )
+
+    def _create_history(self, dealers, suppliers, customers, dealers_stock, prices):
+        """
+        Creates deals history spread over HISTORY_DAYS with daily rollup and total purchases.
+        """
+        now = timezone.now()
+        customer_deals = [
+            CustomerDealsHistory(
+                customer=customer,
+                dealer_id=stock_item.dealer_id,
+                car_id=stock_item.car_id,
+                amount=self.random.randint(1, 3),
+                price_per_one=stock_item.price_per_one,
+            )
+            for customer in customers
+            for stock_item in self.random.sample(
+                dealers_stock, min(self.deals_per_customer, len(dealers_stock))
+            )
+        ]
+        dealer_deals = [
+            DealerDealsHistory(
+                dealer=dealer,
+                supplier=self.random.choice(suppliers),
+                car_id=stock_item.car_id,
+                amount=self.random.randint(1, 20),
+                price_per_one=prices[stock_item.car_id],
+            )
+            for dealer in dealers
+            for stock_item in dealers_stock
+            if stock_item.dealer_id == dealer.pk
+        ]
+
+        for model, deals in [
+            (CustomerDealsHistory, customer_deals),
+            (DealerDealsHistory, dealer_deals),
+        ]:
+            # date is set on insert, so it's spread before rollup is built
+            for deal in model.objects.bulk_create(deals):
+                deal.date = now - timedelta(
+                    days=self.random.randint(0, HISTORY_DAYS),
+                    seconds=self.random.randint(0, 86399),
+                )
+            model.objects.bulk_update(deals, ["date"], batch_size=1000)
+            model.daily_stats_model.objects.add_deals(deals)
+
+        customer_totals: Dict[tuple, int] = {}
+        for deal in customer_deals:
+            key = (deal.customer_id, deal.dealer_id)
+            customer_totals[key] = customer_totals.get(key, 0) + deal.amount
+        TotalDealerPurchase.objects.bulk_create(
+            TotalDealerPurchase(
+                customer_id=customer_id, dealer_id=dealer_id, amount=amount
+            )
+            for (customer_id, dealer_id), amount in customer_totals.items()
+        )
+        dealer_totals: Dict[tuple, int] = {}
+        for deal in dealer_deals:
+            key = (deal.dealer_id, deal.supplier_id)
+            dealer_totals[key] = dealer_totals.get(key, 0) + deal.amount
+        TotalSupplierPurchase.objects.bulk_create(
+            TotalSupplierPurchase(
+                dealer_id=dealer_id, supplier_id=supplier_id, amount=amount
+            )
+            for (dealer_id, supplier_id), amount in dealer_totals.items()
+        )
+
+    def _create_customer_offers(self, customers, cars) -> List[CustomerOffer]:
+        characteristics = CarCharacteristic.objects.bulk_create(
+            CarCharacteristic(
+                brand=car.brand, car_model=car.car_model, generation=car.generation
+            )
+            for car in self.random.sample(cars, min(self.offers, len(cars)))
+        )
+        offers = []
+        for index in range(self.offers):
+            by_characteristic = index % 2 and characteristics
+            offers.append(
+                CustomerOffer(
+                    customer=self.random.choice(customers),
+                    car=None if by_characteristic else self.random.choice(cars),
+                    characteristic=(
+                        self.random.choice(characteristics)
+                        if by_characteristic
+                        else None
+                    ),
+                    max_price=self.random.randint(50, 200) * 1000,
+                )
+            )
+        return CustomerOffer.objects.bulk_create(offers)
+
+    def _create_dealer_offers(self, dealers, cars) -> List[DealerOffer]:
+        return DealerOffer.objects.bulk_create(
+            DealerOffer(
+                dealer=self.random.choice(dealers),
+                car=self.random.choice(cars),
+                amount=self.random.randint(1, 60),
+                max_price=self.random.randint(50, 200) * 1000,
+            )
+            for _ in range(self.offers)
+        )
@@ -0,0 +1,240 @@
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from benchmarks.market import SyntheticMarket
+from dealers.models import Dealer
+from orders.market import (
+    MarketSnapshot,
+    supplier_market_from_rows,
+    supplier_market_rows,
+)
+from orders.models import (
+    CustomerDealsHistory,
+    CustomerOffer,
+    DealerDealsHistory,
+    DealerOffer,
+)
+from orders.offer_handler import CustomersOfferHandler, DealerOfferHandler
+from orders.services import dealer_regular_purchase_handler
+from suppliers.models import SupplierStockItem
+
+# queries of rolling back every run aren't counted
+SAVEPOINT_QUERIES = ("SAVEPOINT", "ROLLBACK TO SAVEPOINT", "RELEASE SAVEPOINT")
+# benchmark prepares (untimed) callable to measure and amount of handled items
+BenchmarkType = Callable[[dict], Tuple[Callable[[], object], int]]
+
+
+def _supplier_market() -> MarketSnapshot:
+    """
+    Suppliers market as loaded by tasks on empty cache.
+    Cache isn't used, so rolled back benchmark data isn't cached.
+    """
+    stock_amounts = dict(
+        SupplierStockItem.objects.available()
+        .filter(supplier__is_active=True)
+        .values_list("pk", "amount")
+    )
+    return supplier_market_from_rows(supplier_market_rows(), stock_amounts)
+
+
+def customer_offer_handler(market: dict):
+    offers = list(
+        CustomerOffer.objects.filter(
+            pk__in=[offer.pk for offer in market["customer_offers"]]
+        )
+        .car()
+        .characteristic()
+        .customer_total_purchases()
+        .select_related("customer")
+    )
+    snapshot = MarketSnapshot(list(Dealer.objects.prepare_for_offer()))
+
+    def run():
+        for offer in offers:
+            CustomersOfferHandler(offer, snapshot=snapshot).process_offer()
+
+    return run, len(offers)
+
+
+def dealer_offer_handler(market: dict):
+    offers = list(
+        DealerOffer.objects.filter(
+            pk__in=[offer.pk for offer in market["dealer_offers"]]
+        )
+        .select_related("dealer")
+        .car()
+        .dealer_history()
+    )
+    snapshot = _supplier_market()
+
+    def run():
+        for offer in offers:
+            DealerOfferHandler(offer, snapshot=snapshot).process_offer()
+
+    return run, len(offers)
+
+
+def dealer_regular_purchase(market: dict):
+    dealer_ids = [dealer.pk for dealer in market["dealers"]]
+
+    def run():
+        for dealer_id in dealer_ids:
+            dealer = Dealer.objects.pre_order_queryset(dealer_id).first()
+            dealer_regular_purchase_handler(dealer, _supplier_market())
+
+    return run, len(dealer_ids)
+
+
+def stats_managers(market: dict):
+    today = timezone.localdate()
+    periods = [
+        {},
+        {"date__range": (today - timedelta(days=30), today)},
+        {"date__gt": today - timedelta(days=90)},
+    ]
+    clients = [
+        (CustomerDealsHistory, "dealer", market["dealers"]),
+        (DealerDealsHistory, "supplier", market["suppliers"]),
+    ]
+
+    def run():
+        for model, field, companies in clients:
+            for company in companies:
+                for period in periods:
+                    params = {field: company, **period}
+                    model.objects.get_total_amount_of_cars(params)
+                    model.objects.get_total_cost(params)
+                    model.objects.get_amount_of_sold_unique_cars(params)
+                    model.objects.get_amount_of_unique_clients(params)
+
+    return run, sum(len(companies) for _model, _field, companies in clients) * len(
+        periods
+    )
+
+
+# changing data benchmarks are run last, every run is rolled back anyway
+BENCHMARKS: Dict[str, BenchmarkType] = {
+    "customer_offer_handler": customer_offer_handler,
+    "dealer_offer_handler": dealer_offer_handler,
+    "stats_managers": stats_managers,
+    "dealer_regular_purchase": dealer_regular_purchase,
+}
+
+
+def _rolled_back(run: Callable[[], object]):
+    with transaction.atomic():
+        run()
+        transaction.set_rollback(True)
+
+
+def measure(run: Callable[[], object], repeat: int) -> dict:
+    """
+    Function to measure callable: wall time of every run, queries and peak traced memory.
+    Every run is rolled back, so all runs handle the same data.
+    Memory is traced in a separate run, since tracing slows down the code.
+    """
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            _rolled_back(run)
+            timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        _rolled_back(run)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "queries": sum(
+            not query["sql"].startswith(SAVEPOINT_QUERIES)
+            for query in ctx.captured_queries
+        ),
+        "peak_memory_kb": peak // 1024,
+    }
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    scales: Iterable[str],
+    names: Iterable[str],
+    seed: int = 0,
+    repeat: int = 3,
+) -> List[dict]:
+    """
+    Function to run benchmarks on synthetic market of every scale.
+    Market is created inside rolled back transaction.
+    Returns result per benchmark and scale.
+    """
+    commit = current_commit()
+    results = []
+    for scale in scales:
+        with transaction.atomic():
+            market = SyntheticMarket.from_scale(scale, seed=seed).create()
+            for name in names:
+                run, items = BENCHMARKS[name](market)
+                results.append(
+                    {
+                        "benchmark": name,
+                        "scale": scale,
+                        "seed": seed,
+                        "commit": commit,
+                        "items": items,
+                        "repeat": repeat,
+                        **measure(run, repeat),
+                    }
+                )
+            transaction.set_rollback(True)
+    return results
+
+
+def compare_results(
+    results: List[dict], baseline: List[dict], threshold: float
+) -> List[dict]:
+    """
+    Function to compare results with baseline results of the same benchmark and scale.
+    Adds baseline values, time ratio and regression flag (ratio is greater than threshold).
+    """
+    baseline_by_key = {(item["benchmark"], item["scale"]): item for item in baseline}
+    compared = []
+    for result in results:
+        base = baseline_by_key.get((result["benchmark"], result["scale"]))
+        if base is None:
+            compared.append(result)
+            continue
+        ratio = (
+            result["min_seconds"] / base["min_seconds"] if base["min_seconds"] else None
+        )
+        compared.append(
+            {
+                **result,
+                "baseline_commit": base.get("commit"),
+                "baseline_min_seconds": base["min_seconds"],
+                "baseline_queries": base["queries"],
+                "time_ratio": ratio,
+                "regression": bool(
+                    (ratio and ratio > threshold) or result["queries"] > base["queries"]
+                ),
+            }
+        )
+    return compared
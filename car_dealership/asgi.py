@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "car_dealership.settings")
+# async read-only views and connection per request, see settings.ASGI_SERVER
+os.environ["DJANGO_ASGI_SERVER"] = "True"
 
 application = get_asgi_application()
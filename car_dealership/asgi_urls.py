@@ -0,0 +1,14 @@
+"""
+URL configuration of ASGI server (car_dealership.asgi).
+
+Async variants of read-only catalog, stock, marketing campaigns and deals history views
+are resolved first, all other endpoints are served by the same sync views as WSGI has.
+"""
+
+from django.urls import include, path
+
+from car_dealership.urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path("api/v1/", include("apis.v1.asgi_config")),
+] + wsgi_urlpatterns
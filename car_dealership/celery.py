@@ -2,12 +2,57 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
+from kombu import Queue
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "car_dealership.settings")
 
 app = Celery("car_dealership")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
+# Queues of separate worker pools (see docker-compose.yml),
+# so cheap emails and offers don't wait behind heavy regular purchases and analytics
+EMAIL_QUEUE = "email"
+OFFERS_QUEUE = "offers"
+REGULAR_PURCHASE_QUEUE = "regular_purchase"
+ANALYTICS_QUEUE = "analytics"
+
+# (soft, hard) time limits in seconds of tasks in queue
+QUEUES_TIME_LIMITS = {
+    EMAIL_QUEUE: (30, 60),
+    OFFERS_QUEUE: (60, 90),
+    REGULAR_PURCHASE_QUEUE: (300, 360),
+    ANALYTICS_QUEUE: (600, 660),
+}
+
+TASKS_QUEUES = {
+    "users.tasks.email_account_confirmation": EMAIL_QUEUE,
+    "users.tasks.email_reset_password": EMAIL_QUEUE,
+    "users.tasks.email_change_email": EMAIL_QUEUE,
+    "users.tasks.email_change_login": EMAIL_QUEUE,
+    "orders.tasks.handle_customer_offer": OFFERS_QUEUE,
+    "orders.tasks.handle_dealer_offer": OFFERS_QUEUE,
+    "orders.tasks.regular_order_on_dealer_stock": REGULAR_PURCHASE_QUEUE,
+    "orders.tasks.regular_order_by_customers": REGULAR_PURCHASE_QUEUE,
+    "orders.tasks.run_cars_purchase": REGULAR_PURCHASE_QUEUE,
+    "orders.tasks.run_customer_purchase_with_random_car": REGULAR_PURCHASE_QUEUE,
+    "orders.tasks.run_customers_purchase_with_random_cars": REGULAR_PURCHASE_QUEUE,
+    "orders.tasks.regular_cooperation_profitability_check": ANALYTICS_QUEUE,
+    "orders.tasks.check_cooperation_profitability": ANALYTICS_QUEUE,
+}
+
+app.conf.task_default_queue = "default"
+app.conf.task_queues = [
+    Queue(queue) for queue in ["default", *QUEUES_TIME_LIMITS.keys()]
+]
+app.conf.task_routes = {task: {"queue": queue} for task, queue in TASKS_QUEUES.items()}
+app.conf.task_annotations = {
+    task: {
+        "soft_time_limit": QUEUES_TIME_LIMITS[queue][0],
+        "time_limit": QUEUES_TIME_LIMITS[queue][1],
+    }
+    for task, queue in TASKS_QUEUES.items()
+}
+
 app.conf.beat_schedule = {
     "order-on-stock-every-10-minutes": {
         "task": "orders.tasks.regular_order_on_dealer_stock",
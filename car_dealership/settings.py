@@ -15,6 +15,8 @@ from pathlib import Path
 from dotenv import load_dotenv
 import os
 
+# set by car_dealership.asgi before .env values override environment
+ASGI_SERVER = os.getenv("DJANGO_ASGI_SERVER") == "True"
 load_dotenv(override=True)
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -65,6 +67,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "common.middleware.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -75,7 +78,12 @@ MIDDLEWARE = [
     "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
-ROOT_URLCONF = "car_dealership.urls"
+# ASGI server uses car_dealership.asgi_urls with async read-only views
+ROOT_URLCONF = (
+    "car_dealership.asgi_urls"
+    if ASGI_SERVER
+    else os.getenv("ROOT_URLCONF", "car_dealership.urls")
+)
 
 TEMPLATES = [
     {
@@ -107,6 +115,14 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PG_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PG_PORT"),
+        # seconds of persistent connection reuse by process,
+        # every ASGI request runs queries in its own thread, so connections
+        # aren't reused there and they are pooled by PgBouncer instead
+        "CONN_MAX_AGE": 0 if ASGI_SERVER else int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        # persistent connection is checked before reuse in new request or task
+        "CONN_HEALTH_CHECKS": True,
+        # server-side cursors don't work with PgBouncer transaction pooling
+        "DISABLE_SERVER_SIDE_CURSORS": os.getenv("DB_POOL_MODE") == "pgbouncer",
     }
 }
 
@@ -175,6 +191,14 @@ REST_FRAMEWORK = {
 
 ADMIN_PANEL_PAGINATION = int(os.getenv("ADMIN_PANEL_PAGINATION", 20))
 
+# Cursor pagination of deals history and offers lists
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", 100))
+LIST_MAX_PAGE_SIZE = int(os.getenv("LIST_MAX_PAGE_SIZE", 1000))
+# Amount of rows fetched from database at once for NDJSON export
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+# Rows validated and upserted at once by bulk import
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = os.getenv("EMAIL_HOST")
 EMAIL_PORT = os.getenv("EMAIL_PORT")
@@ -230,6 +254,72 @@ SUPPLY_DURATION = int(os.getenv("SUPPLY_DURATION"))
 AVERAGE_DELIVERY_DAYS = int(os.getenv("AVERAGE_DELIVERY_DAYS"))
 SELL_OUT_DAYS = int(os.getenv("SELL_OUT_DAYS"))
 
+# Engine for matching customer offers: "python" (CustomersOfferHandler) or "sql"
+OFFER_MATCHING_ENGINE = os.getenv("OFFER_MATCHING_ENGINE", "python")
+
+# Trace stages of offer handlers (orders.offer_profiling), disabled tracing costs nearly nothing
+OFFER_PROFILING_ENABLED = os.getenv("OFFER_PROFILING_ENABLED") == "True"
+
+# Amount of customers handled by one regular order task sharing one dealers snapshot.
+# 0 enqueues a task per customer
+CUSTOMER_ORDERS_CHUNK_SIZE = int(os.getenv("CUSTOMER_ORDERS_CHUNK_SIZE", 0))
+
+# Cache for catalog endpoints (cars, characteristics, marketing campaigns).
+# Local memory cache is used if Redis url isn't set
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        }
+    }
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 600))
+# Lifetime of cached suppliers market rows shared by celery workers
+SUPPLIER_MARKET_CACHE_TIMEOUT = int(os.getenv("SUPPLIER_MARKET_CACHE_TIMEOUT", 3600))
+# Offer queue marks and locks are kept in the cache, so without Redis they are
+# process-local and only offer closing in deal transaction stops duplicated tasks.
+# Lifetime of offer's "waiting in queue" mark coalescing duplicated offer tasks
+OFFER_QUEUE_TIMEOUT = int(os.getenv("OFFER_QUEUE_TIMEOUT", 600))
+# Lifetime of offer's handling lock, longer than hard time limit of offer tasks
+OFFER_LOCK_TIMEOUT = int(os.getenv("OFFER_LOCK_TIMEOUT", 120))
+# Redis pub/sub of offers status events, events endpoints send only stored status if not set
+OFFER_EVENTS_REDIS_URL = os.getenv("OFFER_EVENTS_REDIS_URL", CACHE_REDIS_URL)
+# Max duration of offer events stream and interval of its heartbeats in seconds
+OFFER_EVENTS_TIMEOUT = int(os.getenv("OFFER_EVENTS_TIMEOUT", 300))
+OFFER_EVENTS_HEARTBEAT = int(os.getenv("OFFER_EVENTS_HEARTBEAT", 15))
+
+# Max amount of queries of views ("<METHOD> <route>") and tasks (task name).
+# Budgets of views are set for requests authenticated by JWT (user query)
+# with permissions checked (company queries of owner permissions).
+# Exceeding calls are logged as warnings and fail tests
+QUERY_BUDGETS = {
+    "GET api/v1/orders/customers": 2,
+    "GET api/v1/orders/customers/offers": 2,
+    "GET api/v1/orders/dealers/offers": 2,
+    "GET api/v1/orders/dealers/<int:pk>/customers": 4,
+    "GET api/v1/orders/dealers/<int:pk>/customers/total": 4,
+    "GET api/v1/orders/dealers/<int:pk>/suppliers": 4,
+    "GET api/v1/orders/dealers/<int:pk>/suppliers/total": 4,
+    "GET api/v1/orders/suppliers/<int:pk>/dealers": 4,
+    "GET api/v1/orders/suppliers/<int:pk>/total/dealers": 4,
+    "GET api/v1/stats/customers/<int:pk>": 4,
+    "GET api/v1/stats/dealers/<int:pk>": 4,
+    "GET api/v1/stats/suppliers/<int:pk>": 4,
+    "GET api/v1/stats/dealers/<int:pk>/series": 4,
+    "GET api/v1/stats/suppliers/<int:pk>/series": 4,
+    "GET api/v1/dealers/$": 6,
+    "GET api/v1/marketing/dealers/campaigns/$": 6,
+    "GET api/v1/marketing/suppliers/campaigns/$": 6,
+    "orders.tasks.handle_customer_offer": 21,
+    # suppliers market is loaded on empty cache
+    "orders.tasks.handle_dealer_offer": 25,
+}
+# File appended with JSON line of every measured view and task call
+METRICS_JSON_LOG = os.getenv("METRICS_JSON_LOG")
+# Prometheus metrics endpoint of every backend process on /metrics
+METRICS_ENDPOINT_ENABLED = os.getenv("METRICS_ENDPOINT_ENABLED") == "True"
+
 # Celery config
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
@@ -0,0 +1,16 @@
+from django.urls import path
+
+from cars.api.v1 import views
+
+urlpatterns = [
+    path(
+        "characteristics/",
+        views.AsyncCarCharacteristicAPIView.as_view({"get": "list"}),
+    ),
+    path(
+        "characteristics/<int:pk>/",
+        views.AsyncCarCharacteristicAPIView.as_view({"get": "retrieve"}),
+    ),
+    path("", views.AsyncCarAPIView.as_view({"get": "list"})),
+    path("<int:pk>/", views.AsyncCarAPIView.as_view({"get": "retrieve"})),
+]
@@ -7,6 +7,13 @@ from rest_framework.response import Response
 from cars.api.v1.serializers import CarSerializer, CarCharacteristicSerializer
 from cars.services import pick_up_car_by_characteristic
 from cars.models import Car, CarCharacteristic
+from common.cache import (
+    CAR_CHARACTERISTICS,
+    CARS,
+    AsyncCatalogCacheMixin,
+    CatalogCacheMixin,
+)
+from common.mixins import AsyncReadMixin
 from common.permissions import IsCompanyOrReadOnly
 from cars.filters import CarCharacteristicFilter, CarFilter
 
@@ -28,6 +35,7 @@ class CarFiltersMixin:
 
 
 class CarAPIView(
+    CatalogCacheMixin,
     CarFiltersMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -38,6 +46,7 @@ class CarAPIView(
     Car API endpoint.
 
     Includes mixin for filtering, searching and ordering car objects.
+    List and detail responses are cached (common.cache.CatalogCacheMixin).
 
     HTTP methods:
     - GET
@@ -56,9 +65,11 @@ class CarAPIView(
     serializer_class = CarSerializer
     permission_classes = [permissions.IsAuthenticated, IsCompanyOrReadOnly]
     filterset_class = CarFilter
+    cache_namespaces = (CARS,)
 
 
 class CarCharacteristicAPIView(
+    CatalogCacheMixin,
     CarFiltersMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -69,6 +80,7 @@ class CarCharacteristicAPIView(
     Car CarCharacteristic API endpoint.
 
     Includes mixin for filtering, searching and ordering car characteristic objects.
+    List and detail responses are cached (common.cache.CatalogCacheMixin).
 
     HTTP methods:
     - GET
@@ -86,6 +98,7 @@ class CarCharacteristicAPIView(
     queryset = CarCharacteristic.objects.all()
     serializer_class = CarCharacteristicSerializer
     filterset_class = CarCharacteristicFilter
+    cache_namespaces = (CAR_CHARACTERISTICS,)
 
     @action(methods=["get"], detail=True, url_path="pick-up-cars")
     def pick_up_cars(self, request, pk=None):
@@ -99,3 +112,17 @@ class CarCharacteristicAPIView(
             return Response(data=serializer.data)
 
         return Response({"cars": None})
+
+
+class AsyncCarAPIView(AsyncCatalogCacheMixin, AsyncReadMixin, CarAPIView):
+    """
+    Async read-only variant of CarAPIView served by ASGI.
+    """
+
+
+class AsyncCarCharacteristicAPIView(
+    AsyncCatalogCacheMixin, AsyncReadMixin, CarCharacteristicAPIView
+):
+    """
+    Async read-only variant of CarCharacteristicAPIView served by ASGI.
+    """
@@ -4,7 +4,7 @@ from cars.validators import (
     validate_car_characteristic_year_sequence,
     validate_car_year_sequence,
 )
-from common.models import AmountCalculator, BaseModel
+from common.models import AmountCalculator, BaseModel, BaseQuerySet
 
 
 class CarCharacteristic(BaseModel):
@@ -139,6 +139,15 @@ class Car(BaseModel):
         return True
 
 
+class CarStockItemQuerySet(BaseQuerySet):
+    def available(self):
+        """
+        Stock items which can be sold: not removed and with cars on stock.
+        Matches the condition of partial indexes of stock items.
+        """
+        return self.active().filter(amount__gt=0)
+
+
 class CarStockItem(AmountCalculator, BaseModel):
     """
     An abstract class to represent a stock item of cars.
@@ -159,6 +168,8 @@ class CarStockItem(AmountCalculator, BaseModel):
     amount = models.PositiveBigIntegerField()
     price_per_one = models.PositiveBigIntegerField()
 
+    objects = CarStockItemQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
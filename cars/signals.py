@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from cars.models import Car, CarCharacteristic
+from common.cache import CAR_CHARACTERISTICS, CARS, SUPPLIER_MARKET, bump_generation
+
+
+@receiver([post_save, post_delete], sender=Car)
+def car_changed_handler(sender: Car, *args, **kwargs):
+    """
+    Signal handler after car change.
+
+    Invalidates cached catalog data and suppliers market with cars.
+    """
+    bump_generation(CARS)
+    bump_generation(SUPPLIER_MARKET)
+
+
+@receiver([post_save, post_delete], sender=CarCharacteristic)
+def car_characteristic_changed_handler(sender: CarCharacteristic, *args, **kwargs):
+    """
+    Signal handler after car characteristic change.
+
+    Invalidates cached catalog data with car characteristics.
+    """
+    bump_generation(CAR_CHARACTERISTICS)
@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.bulk_import import FORMATS, read_rows
+from dealers.importers import DEALER_STOCK_IMPORT
+from marketing.importers import (
+    DEALER_CAMPAIGNS_IMPORT,
+    DEALER_DISCOUNTS_IMPORT,
+    SUPPLIER_CAMPAIGNS_IMPORT,
+    SUPPLIER_DISCOUNTS_IMPORT,
+)
+from suppliers.importers import SUPPLIER_STOCK_IMPORT
+
+IMPORTS = {
+    "supplier_stock": SUPPLIER_STOCK_IMPORT,
+    "dealer_stock": DEALER_STOCK_IMPORT,
+    "supplier_discounts": SUPPLIER_DISCOUNTS_IMPORT,
+    "dealer_discounts": DEALER_DISCOUNTS_IMPORT,
+    "supplier_campaigns": SUPPLIER_CAMPAIGNS_IMPORT,
+    "dealer_campaigns": DEALER_CAMPAIGNS_IMPORT,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Creating or updating stock items, discounts or marketing campaigns "
+        "from CSV or NDJSON file in batches. Rows with id update existing objects. "
+        "Errors of invalid rows are printed as JSON lines, valid rows are imported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(IMPORTS), help="Imported objects.")
+        parser.add_argument("path", help="CSV file with header or NDJSON file.")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Format of the file, by file extension if not given.",
+        )
+        parser.add_argument(
+            "--company",
+            type=int,
+            help="Id of supplier or dealer owning all rows, otherwise set by rows.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, help="Rows upserted at once (IMPORT_BATCH_SIZE)."
+        )
+
+    def handle(self, *args, **options):
+        data_format = options["format"] or options["path"].rsplit(".", 1)[-1].lower()
+        if data_format not in FORMATS:
+            raise CommandError(f"Unknown format of {options['path']}, use --format.")
+
+        with open(options["path"], encoding="utf-8-sig", newline="") as data_file:
+            report = IMPORTS[options["kind"]].run(
+                read_rows(data_file, data_format),
+                company_id=options["company"],
+                batch_size=options["batch_size"],
+            )
+
+        for error in report["errors"]:
+            self.stderr.write(json.dumps(error))
+        self.stdout.write(
+            f"{options['kind']}: created {report['created']}, "
+            f"updated {report['updated']}, invalid rows {len(report['errors'])}"
+        )
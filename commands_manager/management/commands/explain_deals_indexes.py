@@ -0,0 +1,177 @@
+import json
+from datetime import timedelta
+from typing import Callable, Iterator, List, Tuple
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from dealers.models import DealerStockItem
+from orders.models import CustomerDealsHistory, DealerDealsHistory
+from suppliers.models import SupplierStockItem
+
+# (name, queryset factory, indexes which should serve the query)
+HotQueryType = Tuple[str, Callable[[], QuerySet], List[str]]
+
+
+def _first_value(queryset: QuerySet, field: str) -> int:
+    return queryset.values_list(field, flat=True).first() or 0
+
+
+def _deals_by_client(model, client_field: str) -> QuerySet:
+    """
+    Deals of one client for the period, as in stats.utils.get_filter_params.
+    """
+    client_id = _first_value(model.objects.all(), client_field)
+    return model.objects.filter(
+        **{
+            client_field: client_id,
+            "date__gte": timezone.now() - timedelta(days=90),
+        }
+    ).values_list("car", "amount", "price_per_one")
+
+
+def _available_stock_by_car() -> QuerySet:
+    """
+    Suitable dealers' stock for a car, as in orders.sql_matcher.
+    """
+    car_id = _first_value(DealerStockItem.objects.available(), "car")
+    return (
+        DealerStockItem.objects.available()
+        .filter(car_id=car_id)
+        .order_by("price_per_one")
+        .values_list("id", "dealer", "price_per_one")
+    )
+
+
+def _available_stock_by_seller(model, seller_field: str) -> QuerySet:
+    """
+    Preloading of sellers' available stock, as in pre_order_queryset of sellers.
+    """
+    seller_id = _first_value(model.objects.available(), seller_field)
+    return model.objects.available().filter(**{seller_field: seller_id})
+
+
+HOT_QUERIES: List[HotQueryType] = [
+    (
+        "customer deals by customer and date",
+        lambda: _deals_by_client(CustomerDealsHistory, "customer"),
+        ["customer_deals_date_idx"],
+    ),
+    (
+        "customer deals by dealer and date",
+        lambda: _deals_by_client(CustomerDealsHistory, "dealer"),
+        ["dealer_customer_deals_date_idx"],
+    ),
+    (
+        "dealer deals by dealer and date",
+        lambda: _deals_by_client(DealerDealsHistory, "dealer"),
+        ["dealer_deals_date_idx"],
+    ),
+    (
+        "dealer deals by supplier and date",
+        lambda: _deals_by_client(DealerDealsHistory, "supplier"),
+        ["supplier_deals_date_idx"],
+    ),
+    (
+        "available dealers stock by car",
+        _available_stock_by_car,
+        ["dealer_stock_available_idx"],
+    ),
+    (
+        "available stock of dealer",
+        lambda: _available_stock_by_seller(DealerStockItem, "dealer"),
+        ["dealer_stock_dealer_avail_idx"],
+    ),
+    (
+        "available stock of supplier",
+        lambda: _available_stock_by_seller(SupplierStockItem, "supplier"),
+        ["supplier_stock_available_idx"],
+    ),
+]
+
+TABLES = [
+    CustomerDealsHistory._meta.db_table,
+    DealerDealsHistory._meta.db_table,
+    DealerStockItem._meta.db_table,
+    SupplierStockItem._meta.db_table,
+]
+
+
+def plan_scans(plan: dict) -> Iterator[Tuple[str, str]]:
+    """
+    Function to collect (node type, relation or index name) of all scan nodes of the plan.
+    """
+    if "Scan" in plan["Node Type"]:
+        yield plan["Node Type"], plan.get("Index Name") or plan.get("Relation Name")
+    for subplan in plan.get("Plans", []):
+        yield from plan_scans(subplan)
+
+
+def explain_scans(queryset: QuerySet, analyze: bool = False) -> List[Tuple[str, str]]:
+    """
+    Function to explain queryset and return its scan nodes.
+    """
+    explanation = json.loads(queryset.explain(format="json", analyze=analyze))
+    return list(plan_scans(explanation[0]["Plan"]))
+
+
+class Command(BaseCommand):
+    help = (
+        "Comparing query plans of deals history and stock hot filters "
+        "without and with their indexes. "
+        "Indexes are dropped inside a rolled back transaction, "
+        "so the tables are locked while the command is running."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run EXPLAIN ANALYZE to get plans of actually executed queries.",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print results as JSON lines.",
+        )
+
+    def handle(self, *args, **options):
+        # index-only scans need fresh statistics and visibility map
+        with connection.cursor() as cursor:
+            for table in TABLES:
+                cursor.execute(f"VACUUM ANALYZE {table}")
+
+        for name, queryset_factory, indexes in HOT_QUERIES:
+            queryset = queryset_factory()
+            result = {
+                "query": name,
+                "indexes": indexes,
+                "without_indexes": self._explain_without(
+                    queryset, indexes, options["analyze"]
+                ),
+                "with_indexes": explain_scans(queryset, options["analyze"]),
+            }
+            self._print_result(result, options["json"])
+
+    def _explain_without(
+        self, queryset: QuerySet, indexes: List[str], analyze: bool
+    ) -> List[Tuple[str, str]]:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index in indexes:
+                    cursor.execute(f"DROP INDEX {index}")
+            scans = explain_scans(queryset, analyze)
+            transaction.set_rollback(True)
+        return scans
+
+    def _print_result(self, result: dict, as_json: bool):
+        if as_json:
+            self.stdout.write(json.dumps(result))
+            return
+
+        self.stdout.write(f"{result['query']} ({', '.join(result['indexes'])})")
+        for key in ["without_indexes", "with_indexes"]:
+            scans = ", ".join(f"{node} on {target}" for node, target in result[key])
+            self.stdout.write(f"    {key.replace('_', ' ')}: {scans}")
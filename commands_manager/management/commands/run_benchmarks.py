@@ -0,0 +1,79 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.market import SCALES
+from benchmarks.runner import BENCHMARKS, compare_results, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarking offer handlers, regular purchases and stats managers "
+        "on seeded synthetic markets. Results are printed as JSON lines, "
+        "the market is created inside a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            nargs="+",
+            choices=list(SCALES),
+            default=["small", "medium"],
+            help="Scales of synthetic market.",
+        )
+        parser.add_argument(
+            "--benchmarks",
+            nargs="+",
+            choices=list(BENCHMARKS),
+            default=list(BENCHMARKS),
+            help="Benchmarks to run.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Market seed.")
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Timed runs of every benchmark."
+        )
+        parser.add_argument(
+            "--output", help="File to write results to, e.g. baseline for next runs."
+        )
+        parser.add_argument(
+            "--baseline", help="File with results of previous run to compare with."
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=1.2,
+            help="Time ratio to baseline considered as regression.",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with error if any benchmark regressed.",
+        )
+
+    def handle(self, *args, **options):
+        results = run_benchmarks(
+            options["scales"], options["benchmarks"], options["seed"], options["repeat"]
+        )
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.writelines(json.dumps(result) + "\n" for result in results)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline:
+                baseline_results = [
+                    json.loads(line) for line in baseline if line.strip()
+                ]
+            results = compare_results(results, baseline_results, options["threshold"])
+
+        for result in results:
+            self.stdout.write(json.dumps(result))
+
+        regressions = [result for result in results if result.get("regression")]
+        if regressions and options["fail_on_regression"]:
+            raise CommandError(
+                "Regressions: "
+                + ", ".join(
+                    f"{item['benchmark']} ({item['scale']})" for item in regressions
+                )
+            )
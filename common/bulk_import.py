@@ -0,0 +1,336 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from common.cache import bump_generation
+
+CSV = "csv"
+NDJSON = "ndjson"
+FORMATS = (CSV, NDJSON)
+
+# column with ids of cars replacing cars of imported object
+CARS_COLUMN = "cars"
+
+# (row number, raw values or None if the row can't be parsed)
+RowType = Tuple[int, Optional[dict]]
+ErrorsType = Dict[str, List[str]]
+
+
+def read_rows(lines: Iterable[str], data_format: str) -> Iterator[RowType]:
+    """
+    Function to stream rows of CSV with header or NDJSON lines.
+    Empty CSV values are treated as missing ones, blank NDJSON lines are skipped.
+    """
+    if data_format == CSV:
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            yield number, {
+                column: value
+                for column, value in row.items()
+                if value not in ("", None)
+            }
+        return
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            values = json.loads(line)
+        except ValueError:
+            values = None
+        yield number, values if isinstance(values, dict) else None
+
+
+def read_upload(upload, data_format: str) -> Iterator[RowType]:
+    """
+    Function to stream rows of uploaded file without reading it whole.
+    """
+    return read_rows(io.TextIOWrapper(upload.file, encoding="utf-8-sig"), data_format)
+
+
+def upload_format(upload, data_format: Optional[str] = None) -> Optional[str]:
+    """
+    Function to get format of uploaded file, by its extension if format isn't given.
+    """
+    data_format = data_format or upload.name.rsplit(".", 1)[-1].lower()
+    return data_format if data_format in FORMATS else None
+
+
+def _cars_ids(value) -> List:
+    # CSV cell "1;2;3" or NDJSON list
+    if isinstance(value, str):
+        return [car_id.strip() for car_id in value.split(";") if car_id.strip()]
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+class BulkImport:
+    """
+    Bulk upsert of company's objects from CSV or NDJSON rows.
+
+    Rows are validated and upserted in batches of IMPORT_BATCH_SIZE,
+    invalid rows are reported with their errors and don't abort the batch.
+    Row with "id" replaces imported fields of existing object of the company,
+    row without it creates a new object.
+    New objects get ids from the table sequence in one query,
+    so all objects of the batch are upserted by one INSERT ... ON CONFLICT
+    and their cars are replaced in bulk.
+
+    Attributes
+    ----------
+    model : Model
+        imported model
+    company_field : str
+        foreign key to company owning imported objects
+    fields : list[str]
+        imported fields, foreign keys by their column names (car_id)
+    with_cars : bool
+        whether rows have "cars" column replacing cars of imported objects
+    cache_namespaces : tuple[str]
+        catalog cache namespaces invalidated after import
+    """
+
+    def __init__(
+        self,
+        model,
+        company_field: str,
+        fields: List[str],
+        with_cars: bool = False,
+        cache_namespaces: Tuple[str, ...] = (),
+    ):
+        self.model = model
+        self.company_field = company_field
+        self.fields = fields
+        self.with_cars = with_cars
+        self.cache_namespaces = cache_namespaces
+
+    @property
+    def company_column(self) -> str:
+        return self.model._meta.get_field(self.company_field).attname
+
+    def run(
+        self,
+        rows: Iterable[RowType],
+        company_id: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> dict:
+        """
+        Function to import rows, optionally all of them to the given company.
+
+        Returns amount of created and updated objects and errors of invalid rows.
+        """
+        batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        report = {"created": 0, "updated": 0, "errors": []}
+        rows = iter(rows)
+        try:
+            while batch := list(islice(rows, batch_size)):
+                created, updated, errors = self.import_batch(batch, company_id)
+                report["created"] += created
+                report["updated"] += updated
+                report["errors"].extend(errors)
+        finally:
+            # batches committed before a failed one are already visible
+            if report["created"] or report["updated"]:
+                for namespace in self.cache_namespaces:
+                    bump_generation(namespace)
+        return report
+
+    def import_batch(
+        self, batch: List[RowType], company_id: Optional[int] = None
+    ) -> Tuple[int, int, List[dict]]:
+        """
+        Function to validate and upsert one batch of rows.
+        """
+        cleaned_rows = []
+        errors = []
+        for number, values in batch:
+            if values is None:
+                errors.append({"row": number, "errors": {"row": ["Invalid row."]}})
+                continue
+            if company_id is not None:
+                values[self.company_column] = company_id
+            cleaned, row_errors = self.clean_row(values)
+            if row_errors:
+                errors.append({"row": number, "errors": row_errors})
+            else:
+                cleaned_rows.append((number, cleaned))
+
+        cleaned_rows = self.check_relations(cleaned_rows, errors)
+        errors.sort(key=lambda error: error["row"])
+        if not cleaned_rows:
+            return 0, 0, errors
+
+        with transaction.atomic():
+            created, updated = self.upsert([cleaned for _, cleaned in cleaned_rows])
+        return created, updated, errors
+
+    def clean_row(self, values: dict) -> Tuple[dict, ErrorsType]:
+        """
+        Function to convert and validate row values by model fields without queries.
+        """
+        cleaned = {}
+        errors = {}
+        columns = ["id", self.company_column, *self.fields]
+        for column in columns:
+            field = self.model._meta.get_field(column)
+            value = values.get(column)
+            if value is None:
+                if column != "id" and not field.has_default() and not field.null:
+                    errors[column] = ["This field is required."]
+                continue
+            try:
+                if field.is_relation:
+                    # existence of related objects is checked for the whole batch
+                    cleaned[column] = field.target_field.to_python(value)
+                else:
+                    cleaned[column] = field.clean(value, None)
+            except ValidationError as error:
+                errors[column] = error.messages
+
+        if self.with_cars and CARS_COLUMN in values:
+            car_field = self.model._meta.get_field(CARS_COLUMN).target_field
+            try:
+                cleaned[CARS_COLUMN] = {
+                    car_field.to_python(car_id)
+                    for car_id in _cars_ids(values[CARS_COLUMN])
+                }
+            except ValidationError as error:
+                errors[CARS_COLUMN] = error.messages
+
+        return cleaned, errors
+
+    def check_relations(
+        self, cleaned_rows: List[Tuple[int, dict]], errors: List[dict]
+    ) -> List[Tuple[int, dict]]:
+        """
+        Function to check existence of related objects and updated objects' owners
+        with one query per relation for the whole batch.
+        Rows with missing relations and rows repeating id of a previous row
+        of the batch are moved to errors.
+        """
+        relations = [
+            field
+            for field in self.model._meta.concrete_fields
+            if field.is_relation
+            and field.attname in (self.company_column, *self.fields)
+        ]
+        existing = {
+            field.attname: self._existing_ids(
+                field.related_model,
+                {row[field.attname] for _, row in cleaned_rows if field.attname in row},
+            )
+            for field in relations
+        }
+        if self.with_cars:
+            existing[CARS_COLUMN] = self._existing_ids(
+                self.model._meta.get_field(CARS_COLUMN).related_model,
+                {car for _, row in cleaned_rows for car in row.get(CARS_COLUMN, ())},
+            )
+        updated_ids = {row["id"] for _, row in cleaned_rows if "id" in row}
+        owners = dict(
+            self.model.objects.filter(pk__in=updated_ids).values_list(
+                "pk", self.company_column
+            )
+            if updated_ids
+            else ()
+        )
+
+        valid_rows = []
+        seen_ids = set()
+        for number, row in cleaned_rows:
+            row_errors = {}
+            for column, ids in existing.items():
+                if column == CARS_COLUMN:
+                    missing = row.get(CARS_COLUMN, set()) - ids
+                else:
+                    missing = {row[column]} - ids if column in row else set()
+                if missing:
+                    row_errors[column] = [
+                        f"Object with id {value} does not exist."
+                        for value in sorted(missing)
+                    ]
+            if "id" in row and owners.get(row["id"]) != row.get(self.company_column):
+                row_errors["id"] = [f"Object with id {row['id']} does not exist."]
+            elif row.get("id") in seen_ids:
+                # one upsert can't update the same row twice
+                row_errors["id"] = [
+                    f"Object with id {row['id']} is repeated in the batch."
+                ]
+
+            if row_errors:
+                errors.append({"row": number, "errors": row_errors})
+            else:
+                valid_rows.append((number, row))
+                if "id" in row:
+                    seen_ids.add(row["id"])
+        return valid_rows
+
+    def upsert(self, rows: List[dict]) -> Tuple[int, int]:
+        """
+        Function to upsert valid rows, returns amount of created and updated objects.
+        """
+        new_rows = [row for row in rows if "id" not in row]
+        for row, pk in zip(new_rows, self._next_ids(len(new_rows))):
+            row["id"] = pk
+
+        objects = [
+            self.model(
+                **{
+                    column: value
+                    for column, value in row.items()
+                    if column != CARS_COLUMN
+                }
+            )
+            for row in rows
+        ]
+        self.model.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=[
+                self.model._meta.get_field(column).name for column in self.fields
+            ]
+            + ["updated_at"],
+        )
+
+        if self.with_cars:
+            self._replace_cars([row for row in rows if CARS_COLUMN in row])
+        return len(new_rows), len(rows) - len(new_rows)
+
+    def _next_ids(self, amount: int) -> List[int]:
+        if not amount:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [self.model._meta.db_table, amount],
+            )
+            return [pk for pk, in cursor.fetchall()]
+
+    def _replace_cars(self, rows: List[dict]):
+        if not rows:
+            return
+        through = self.model._meta.get_field(CARS_COLUMN).remote_field.through
+        object_column = self.model._meta.get_field(CARS_COLUMN).m2m_column_name()
+        car_column = self.model._meta.get_field(CARS_COLUMN).m2m_reverse_name()
+        through.objects.filter(
+            **{f"{object_column}__in": [row["id"] for row in rows]}
+        ).delete()
+        through.objects.bulk_create(
+            through(**{object_column: row["id"], car_column: car_id})
+            for row in rows
+            for car_id in row[CARS_COLUMN]
+        )
+
+    @staticmethod
+    def _existing_ids(model, ids: set) -> set:
+        if not ids:
+            return set()
+        return set(model.objects.filter(pk__in=ids).values_list("pk", flat=True))
@@ -0,0 +1,157 @@
+import hashlib
+import time
+from typing import Callable, Iterable, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+# prefix of all catalog cache keys
+CATALOG_CACHE_PREFIX = "catalog"
+
+# generation namespaces of cached catalog data
+CARS = "cars"
+CAR_CHARACTERISTICS = "car_characteristics"
+DEALER_CAMPAIGNS = "dealer_campaigns"
+SUPPLIER_CAMPAIGNS = "supplier_campaigns"
+# generation namespace of cached suppliers market (orders.market.load_supplier_market)
+SUPPLIER_MARKET = "supplier_market"
+
+
+def _generation_key(namespace: str) -> str:
+    return f"generation:{namespace}"
+
+
+def _initial_generation() -> int:
+    # generation lost by cache eviction restarts from current time,
+    # so entries of previous generations can't be served again
+    return int(time.time() * 1000)
+
+
+def get_generations(namespaces: Iterable[str]) -> str:
+    """
+    Function to get current generations of namespaces as one version string.
+    """
+    keys = [_generation_key(namespace) for namespace in namespaces]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            generations[key] = _initial_generation()
+            cache.add(key, generations[key], timeout=None)
+    return ".".join(str(generations[key]) for key in keys)
+
+
+def bump_generation(namespace: str):
+    """
+    Function to invalidate all cached data of namespace by changing its generation.
+    """
+    key = _generation_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_generation(), timeout=None)
+
+
+def normalize_query_params(query_params) -> str:
+    """
+    Function to build the same string for the same set of query params.
+    Params order and empty values don't matter.
+    """
+    return "&".join(
+        f"{name}={value}"
+        for name, values in sorted(query_params.lists())
+        for value in sorted(values)
+        if value != ""
+    )
+
+
+class CatalogCacheMixin:
+    """
+    Mixin to cache list and retrieve responses of catalog viewsets.
+
+    Cache key is built from current generations of cache_namespaces,
+    view, action, path params and normalized query params (filters, search, ordering).
+    Changes of catalog models bump generations (see signals of apps),
+    so the old entries are never read again and expire by CATALOG_CACHE_TIMEOUT.
+    The version is also sent as ETag, matching If-None-Match is answered with 304.
+
+    Attributes
+    ----------
+    cache_namespaces : tuple of str
+        generation namespaces of data the view responses depend on
+    """
+
+    cache_namespaces: Tuple[str, ...] = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cache_etag_and_key(self, request, kwargs: dict) -> Tuple[str, str]:
+        """
+        Function to get ETag and cache key of the response for current generations.
+        """
+        version = get_generations(self.cache_namespaces)
+        request_key = ":".join(
+            [
+                self.__class__.__name__,
+                self.action,
+                str(sorted(kwargs.items())),
+                normalize_query_params(request.query_params),
+            ]
+        )
+        digest = hashlib.sha1(request_key.encode()).hexdigest()
+        return f'"{version}-{digest}"', f"{CATALOG_CACHE_PREFIX}:{version}:{digest}"
+
+    def cached_response(self, handler: Callable, request, *args, **kwargs):
+        etag, key = self.cache_etag_and_key(request, kwargs)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        data = cache.get(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(key, response.data, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        else:
+            response = Response(data)
+
+        response["ETag"] = etag
+        return response
+
+
+class AsyncCatalogCacheMixin:
+    """
+    Mixin to cache list and retrieve responses of async catalog views
+    (common.mixins.AsyncReadMixin) the same way as CatalogCacheMixin.
+    Should be placed before AsyncReadMixin, the view must inherit CatalogCacheMixin.
+    """
+
+    async def list(self, request, *args, **kwargs):
+        return await self.acached_response(super().list, request, *args, **kwargs)
+
+    async def retrieve(self, request, *args, **kwargs):
+        return await self.acached_response(super().retrieve, request, *args, **kwargs)
+
+    async def acached_response(self, handler: Callable, request, *args, **kwargs):
+        etag, key = await sync_to_async(self.cache_etag_and_key)(request, kwargs)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        data = await cache.aget(key)
+        if data is None:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            await cache.aset(key, response.data, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        else:
+            response = Response(data)
+
+        response["ETag"] = etag
+        return response
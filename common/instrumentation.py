@@ -0,0 +1,252 @@
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# kinds of measured units
+VIEW = "view"
+TASK = "task"
+
+METRICS_PREFIX = "dealership"
+# (metric, type, help) exported for every measured view and task
+PROMETHEUS_METRICS = [
+    ("calls_total", "counter", "Amount of handled requests or tasks"),
+    ("queries_total", "counter", "Amount of database queries"),
+    ("db_seconds_total", "counter", "Time spent in database queries"),
+    ("serialization_seconds_total", "counter", "Time spent rendering responses"),
+    ("latency_seconds_total", "counter", "Total time of requests or tasks"),
+    ("max_queries", "gauge", "Max amount of database queries of one call"),
+    ("budget_exceeded_total", "counter", "Amount of calls exceeding query budget"),
+]
+# upper bounds of histogram buckets in seconds
+SECONDS_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+# sorted (label, value) pairs of labeled metrics
+LabelsType = Tuple[Tuple[str, str], ...]
+
+
+class Measurement:
+    """
+    Database execute wrapper counting queries and their duration of one request or task.
+
+    Attributes
+    ----------
+    queries : int
+        amount of executed queries
+    db_seconds : float
+        time spent in database queries
+    serialization_seconds : float
+        time spent rendering response
+    started : float
+        perf counter value of measurement start
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - start
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def query_budget(name: str) -> Optional[int]:
+    """
+    Function to get query budget of view ("<METHOD> <route>") or task (task name).
+    """
+    return settings.QUERY_BUDGETS.get(name)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: LabelsType) -> str:
+    return ",".join(f'{label}="{_escape_label(str(value))}"' for label, value in labels)
+
+
+class Histogram:
+    """
+    Histogram of observed values with SECONDS_BUCKETS.
+
+    Attributes
+    ----------
+    buckets : list[int]
+        amount of observed values less or equal than every bucket bound
+    total : float
+        sum of observed values
+    count : int
+        amount of observed values
+    """
+
+    def __init__(self):
+        self.buckets = [0] * len(SECONDS_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for index, bound in enumerate(SECONDS_BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+        self.total += value
+        self.count += 1
+
+    def prometheus(self, full_name: str, labels: LabelsType) -> List[str]:
+        lines = [
+            f"{full_name}_bucket{{{_format_labels(labels + (('le', bound),))}}} {amount}"
+            for bound, amount in zip(SECONDS_BUCKETS, self.buckets)
+        ]
+        lines.append(
+            f"{full_name}_bucket{{{_format_labels(labels + (('le', '+Inf'),))}}} "
+            f"{self.count}"
+        )
+        lines.append(f"{full_name}_sum{{{_format_labels(labels)}}} {self.total}")
+        lines.append(f"{full_name}_count{{{_format_labels(labels)}}} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process local metrics of views and tasks.
+
+    Every worker process has its own registry, so exported counters are per process.
+    Calls are also appended as JSON lines to METRICS_JSON_LOG if it's set.
+
+    Attributes
+    ----------
+    violations : list
+        calls exceeding their query budgets since the last reset
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[Tuple[str, str], dict] = {}
+        self._counters: Dict[str, Dict[LabelsType, float]] = {}
+        self._histograms: Dict[str, Dict[LabelsType, Histogram]] = {}
+        self.violations: List[dict] = []
+
+    def record(self, kind: str, name: str, measurement: Measurement):
+        """
+        Function to add finished measurement to metrics of view or task.
+        """
+        total_seconds = measurement.elapsed()
+        budget = query_budget(name)
+        exceeded = budget is not None and measurement.queries > budget
+        call = {
+            "kind": kind,
+            "name": name,
+            "queries": measurement.queries,
+            "db_seconds": measurement.db_seconds,
+            "serialization_seconds": measurement.serialization_seconds,
+            "latency_seconds": total_seconds,
+            "query_budget": budget,
+        }
+
+        with self._lock:
+            metrics = self._metrics.setdefault(
+                (kind, name),
+                dict.fromkeys((metric for metric, *_ in PROMETHEUS_METRICS), 0),
+            )
+            metrics["calls_total"] += 1
+            metrics["queries_total"] += measurement.queries
+            metrics["db_seconds_total"] += measurement.db_seconds
+            metrics["serialization_seconds_total"] += measurement.serialization_seconds
+            metrics["latency_seconds_total"] += total_seconds
+            metrics["max_queries"] = max(metrics["max_queries"], measurement.queries)
+            if exceeded:
+                metrics["budget_exceeded_total"] += 1
+                self.violations.append(call)
+
+        if exceeded:
+            logger.warning(
+                "%s %s executed %s queries, budget is %s",
+                kind,
+                name,
+                measurement.queries,
+                budget,
+            )
+        if settings.METRICS_JSON_LOG:
+            with open(settings.METRICS_JSON_LOG, "a") as log:
+                log.write(json.dumps({"time": time.time(), **call}) + "\n")
+
+    def increment(self, metric: str, labels: LabelsType, value: float = 1):
+        """
+        Function to increment labeled counter.
+        """
+        with self._lock:
+            counters = self._counters.setdefault(metric, {})
+            counters[labels] = counters.get(labels, 0) + value
+
+    def observe(self, metric: str, labels: LabelsType, value: float):
+        """
+        Function to add value to labeled histogram.
+        """
+        with self._lock:
+            self._histograms.setdefault(metric, {}).setdefault(
+                labels, Histogram()
+            ).observe(value)
+
+    def counters(self, metric: str) -> Dict[LabelsType, float]:
+        with self._lock:
+            return dict(self._counters.get(metric, {}))
+
+    def histograms(self, metric: str) -> Dict[LabelsType, Histogram]:
+        with self._lock:
+            return dict(self._histograms.get(metric, {}))
+
+    def snapshot(self) -> Dict[Tuple[str, str], dict]:
+        with self._lock:
+            return {key: dict(metrics) for key, metrics in self._metrics.items()}
+
+    def prometheus(self) -> str:
+        """
+        Function to export metrics in Prometheus text format.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for metric, metric_type, description in PROMETHEUS_METRICS:
+            full_name = f"{METRICS_PREFIX}_{metric}"
+            lines.append(f"# HELP {full_name} {description}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for (kind, name), metrics in sorted(snapshot.items()):
+                lines.append(
+                    f'{full_name}{{kind="{kind}",name="{_escape_label(name)}"}} '
+                    f"{metrics[metric]}"
+                )
+
+        with self._lock:
+            for metric, counters in sorted(self._counters.items()):
+                full_name = f"{METRICS_PREFIX}_{metric}"
+                lines.append(f"# TYPE {full_name} counter")
+                for labels, value in sorted(counters.items()):
+                    lines.append(f"{full_name}{{{_format_labels(labels)}}} {value}")
+            for metric, histograms in sorted(self._histograms.items()):
+                full_name = f"{METRICS_PREFIX}_{metric}"
+                lines.append(f"# TYPE {full_name} histogram")
+                for labels, histogram in sorted(histograms.items()):
+                    lines.extend(histogram.prometheus(full_name, labels))
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+            self._counters.clear()
+            self._histograms.clear()
+            self.violations.clear()
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,79 @@
+import time
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.db import connection
+
+from common.instrumentation import VIEW, Measurement, metrics
+
+
+def endpoint_name(request) -> str:
+    """
+    Function to get name of resolved endpoint as "<METHOD> <route>".
+    """
+    return f"{request.method} {request.resolver_match.route}"
+
+
+def _add_execute_wrapper(measurement: Measurement):
+    connection.execute_wrappers.append(measurement)
+
+
+def _remove_execute_wrapper(measurement: Measurement):
+    connection.execute_wrappers.remove(measurement)
+
+
+class InstrumentationMiddleware:
+    """
+    Middleware measuring queries, database time, serialization time
+    and latency of every resolved endpoint.
+
+    Under ASGI queries of a request are run in its own thread (see asgiref ThreadSensitiveContext),
+    so the measurement is added to database connection of that thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        measurement = Measurement()
+        request.measurement = measurement
+        with connection.execute_wrapper(measurement):
+            response = self.get_response(request)
+        self.record(request, measurement)
+        return response
+
+    async def __acall__(self, request):
+        measurement = Measurement()
+        request.measurement = measurement
+        await sync_to_async(_add_execute_wrapper)(measurement)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_remove_execute_wrapper)(measurement)
+        self.record(request, measurement)
+        return response
+
+    def record(self, request, measurement: Measurement):
+        if request.resolver_match is not None:
+            metrics.record(VIEW, endpoint_name(request), measurement)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after all template response middlewares
+        started = time.perf_counter()
+
+        def rendered(response):
+            request.measurement.serialization_seconds += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -1,3 +1,21 @@
+import inspect
+import json
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+
+from common.bulk_import import FORMATS, BulkImport, read_upload, upload_format
+from common.pagination import KeysetPagination
+
+
 class DealerOwnerMixin:
     """
     Mixin to add specified dealer as object owner.
@@ -23,3 +41,174 @@ class CustomerOwnerMixin:
 
     def perform_create(self, serializer):
         serializer.save(customer=self.request.user.customer_profile)
+
+
+class NDJSONExportMixin:
+    """
+    Mixin to export the whole filtered list as NDJSON stream with ?export=ndjson.
+
+    Rows are fetched from database by server-side cursor in chunks
+    and serialized one by one, so memory doesn't depend on the list length.
+    """
+
+    export_query_param = "export"
+    export_chunk_size = settings.EXPORT_CHUNK_SIZE
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.export_query_param) != "ndjson":
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if isinstance(self.paginator, KeysetPagination):
+            # the same rows order as pages have
+            queryset = self.paginator.order_queryset(queryset, request, self)
+        return StreamingHttpResponse(
+            self.stream_ndjson(queryset), content_type="application/x-ndjson"
+        )
+
+    def stream_ndjson(self, queryset):
+        for instance in queryset.iterator(chunk_size=self.export_chunk_size):
+            data = self.get_serializer(instance).data
+            yield json.dumps(data, cls=DjangoJSONEncoder) + "\n"
+
+
+class AsyncReadMixin:
+    """
+    Mixin to make async read-only variant of generic view or viewset.
+
+    Authentication, permissions and building of filtered queryset are run in a thread
+    as in sync views, since they may query users, owners and filter choices.
+    Rows of lists and retrieved objects are fetched by async ORM,
+    so serializers must use only fetched fields and prefetched relations.
+    Paginator must support apaginate_queryset (common.pagination.KeysetPagination).
+    Async variants are served only by ASGI (car_dealership.asgi_urls), writes stay in sync views.
+    """
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        return markcoroutinefunction(super().as_view(*args, **initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Async version of APIView.dispatch.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def get_filtered_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    async def list(self, request, *args, **kwargs):
+        queryset = await sync_to_async(self.get_filtered_queryset)()
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, self)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer([row async for row in queryset], many=True)
+        return Response(serializer.data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def aget_object(self):
+        """
+        Async version of GenericAPIView.get_object.
+        """
+        queryset = await sync_to_async(self.get_filtered_queryset)()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = await queryset.filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).afirst()
+        if instance is None:
+            raise Http404
+        await sync_to_async(self.check_object_permissions)(self.request, instance)
+        return instance
+
+
+class AsyncNDJSONExportMixin:
+    """
+    Mixin to export the whole filtered list of async view (AsyncReadMixin) as NDJSON stream.
+    Should be placed before AsyncReadMixin, the view must inherit NDJSONExportMixin.
+    """
+
+    async def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.export_query_param) != "ndjson":
+            return await super().list(request, *args, **kwargs)
+
+        queryset = await sync_to_async(self.get_filtered_queryset)()
+        if isinstance(self.paginator, KeysetPagination):
+            # the same rows order as pages have
+            queryset = self.paginator.order_queryset(queryset, request, self)
+        return StreamingHttpResponse(
+            self.astream_ndjson(queryset), content_type="application/x-ndjson"
+        )
+
+    async def astream_ndjson(self, queryset):
+        async for instance in queryset.aiterator(chunk_size=self.export_chunk_size):
+            data = self.get_serializer(instance).data
+            yield json.dumps(data, cls=DjangoJSONEncoder) + "\n"
+
+
+class BulkImportMixin:
+    """
+    Mixin adding "import" action upserting objects of request user's company
+    from uploaded CSV or NDJSON file (see common.bulk_import.BulkImport).
+
+    The file is sent as multipart "file" field, its format is taken from
+    "format" field or file extension.
+    Response contains amount of created and updated objects and errors of invalid rows.
+    """
+
+    bulk_import: BulkImport = None
+
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="import",
+        parser_classes=[MultiPartParser],
+    )
+    def import_rows(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"file": ["No file was submitted."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        data_format = upload_format(upload, request.data.get("format"))
+        if data_format is None:
+            return Response(
+                {"format": [f"Supported formats: {', '.join(FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            company = getattr(request.user, self.bulk_import.company_field)
+        except ObjectDoesNotExist:
+            raise PermissionDenied()
+
+        report = self.bulk_import.run(
+            read_upload(upload, data_format), company_id=company.pk
+        )
+        return Response(report, status=status.HTTP_200_OK)
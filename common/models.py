@@ -1,5 +1,6 @@
 from django.db import models
 from django.db.models.query import QuerySet
+from django.utils import timezone
 from django_countries.fields import CountryField
 
 from users.models import UserProfile
@@ -101,6 +102,9 @@ class AmountCalculator(models.Model):
     def add_amount(self, amount: int):
         """
         Function to update total deals amount.
+        Amount is increased in database with F() expression, so concurrent updates aren't lost.
         """
+        type(self)._base_manager.filter(pk=self.pk).update(
+            amount=models.F("amount") + amount, updated_at=timezone.now()
+        )
         self.amount += amount
-        self.save()
@@ -0,0 +1,151 @@
+import base64
+import json
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination by (ordering field, id) key.
+
+    Every page is fetched by index range condition after the last row of previous page,
+    so the cost of a page doesn't depend on its position in the list.
+    Ordering requested by OrderingFilter is kept, otherwise list is ordered by ordering_field.
+
+    Attributes
+    ----------
+    ordering_field : str
+        default ordering field of the list
+    page_size : int
+        default amount of rows on page
+    max_page_size : int
+        max amount of rows on page requested by page_size query param
+    """
+
+    ordering_field = "date"
+    page_size = settings.LIST_PAGE_SIZE
+    max_page_size = settings.LIST_MAX_PAGE_SIZE
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> List:
+        page_queryset, page_size = self.page_queryset(queryset, request, view)
+        return self.page_rows(list(page_queryset), page_size)
+
+    async def apaginate_queryset(self, queryset: QuerySet, request, view=None) -> List:
+        """
+        Async version of paginate_queryset fetching the page by async ORM.
+        """
+        page_queryset, page_size = self.page_queryset(queryset, request, view)
+        return self.page_rows([row async for row in page_queryset], page_size)
+
+    def page_queryset(self, queryset: QuerySet, request, view=None) -> Tuple:
+        """
+        Function to build queryset of the requested page with one extra row
+        telling whether the next page exists.
+        """
+        self.request = request
+        queryset = self.order_queryset(queryset, request, view)
+        lookup = "lt" if self.descending else "gt"
+
+        cursor = self.decode_cursor(request, queryset)
+        if cursor:
+            value, pk = cursor
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{lookup}": value})
+                | Q(**{self.field: value, f"id__{lookup}": pk})
+            )
+
+        page_size = self.get_page_size(request)
+        return queryset[: page_size + 1], page_size
+
+    def page_rows(self, rows: List, page_size: int) -> List:
+        self.next_row = rows[page_size - 1] if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def order_queryset(self, queryset: QuerySet, request, view=None) -> QuerySet:
+        """
+        Function to order queryset by pagination key.
+        """
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        prefix = "-" if self.descending else ""
+        return queryset.order_by(f"{prefix}{self.field}", f"{prefix}id")
+
+    def get_ordering(self, request, queryset: QuerySet, view) -> Tuple[str, bool]:
+        """
+        Function to get pagination field and direction.
+        The first field requested by OrderingFilter is used, id is always added to the key.
+        """
+        ordering = None
+        if view and OrderingFilter in getattr(view, "filter_backends", ()):
+            ordering = OrderingFilter().get_ordering(request, queryset, view)
+        field = ordering[0] if ordering else self.ordering_field
+        return field.lstrip("-"), field.startswith("-")
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_link(self) -> Optional[str]:
+        if self.next_row is None:
+            return None
+        value = getattr(self.next_row, self.field)
+        cursor = json.dumps(
+            [self.field, self.descending, str(value), self.next_row.pk]
+        ).encode()
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            base64.urlsafe_b64encode(cursor).decode(),
+        )
+
+    def decode_cursor(self, request, queryset: QuerySet) -> Optional[Tuple]:
+        """
+        Function to decode (field value, id) of the last row of previous page.
+        Cursor must be created for the same ordering.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            field, descending, value, pk = json.loads(
+                base64.urlsafe_b64decode(encoded.encode())
+            )
+            if field != self.field or descending != self.descending:
+                raise ValueError
+            value = queryset.model._meta.get_field(field).to_python(value)
+            return value, int(pk)
+        except (TypeError, ValueError, FieldDoesNotExist, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class OffersKeysetPagination(KeysetPagination):
+    """
+    Cursor pagination of offers by creation date.
+    """
+
+    ordering_field = "created_at"
@@ -0,0 +1,26 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+def format_event(data: dict, event: str = "status") -> str:
+    """
+    Function to format server-sent event with JSON data.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Renderer of server-sent events endpoints.
+
+    Streams are returned by views as they are,
+    so only error responses are rendered here as "error" event.
+    """
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        return format_event(data, event="error").encode(self.charset)
@@ -0,0 +1,58 @@
+from celery.signals import task_postrun, task_prerun, worker_process_init
+from django.db import close_old_connections, connection, connections
+
+from common.instrumentation import TASK, Measurement, metrics
+
+# measurements of running tasks by task id
+_measurements = {}
+
+
+@worker_process_init.connect
+def worker_process_started_handler(*args, **kwargs):
+    """
+    Signal handler of started worker process.
+
+    Forked process mustn't share database connections of the parent process.
+    """
+    connections.close_all()
+
+
+@task_prerun.connect
+@task_postrun.connect
+def task_connections_handler(task, *args, **kwargs):
+    """
+    Signal handler before and after task run.
+
+    Reuses persistent connections across tasks as request_started and request_finished
+    do for requests: closes connections older than CONN_MAX_AGE or broken ones
+    and makes the next query check health of reused connection.
+    Eagerly applied tasks run inside the caller's connection, so it's left as is.
+    """
+    if not task.request.is_eager:
+        close_old_connections()
+
+
+@task_prerun.connect
+def task_started_handler(task_id: str, *args, **kwargs):
+    """
+    Signal handler before task run.
+
+    Starts measuring queries of the task.
+    """
+    measurement = Measurement()
+    _measurements[task_id] = measurement
+    connection.execute_wrappers.append(measurement)
+
+
+@task_postrun.connect
+def task_finished_handler(task_id: str, task, *args, **kwargs):
+    """
+    Signal handler after task run, including failed ones.
+
+    Records metrics of the task.
+    """
+    measurement = _measurements.pop(task_id, None)
+    if measurement is None:
+        return
+    connection.execute_wrappers.remove(measurement)
+    metrics.record(TASK, task.name, measurement)
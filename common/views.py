@@ -0,0 +1,12 @@
+from django.http import HttpResponse
+
+from common.instrumentation import metrics
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics_view(request) -> HttpResponse:
+    """
+    View exporting metrics of views and tasks of this process in Prometheus text format.
+    """
+    return HttpResponse(metrics.prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
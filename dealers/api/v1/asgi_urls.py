@@ -0,0 +1,8 @@
+from django.urls import path
+
+from dealers.api.v1 import views
+
+urlpatterns = [
+    path("stock/", views.AsyncDealerStockAPIView.as_view({"get": "list"})),
+    path("stock/<int:pk>/", views.AsyncDealerStockAPIView.as_view({"get": "retrieve"})),
+]
@@ -6,7 +6,7 @@ from rest_framework.filters import OrderingFilter
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from cars.models import CarCharacteristic
-from common.mixins import DealerOwnerMixin
+from common.mixins import AsyncReadMixin, BulkImportMixin, DealerOwnerMixin
 from common.permissions import IsProfileOwnerOrReadOnly
 from customers.filters import CustomerFilter
 from customers.models import Customer
@@ -16,6 +16,7 @@ from dealers.api.v1.serializers import (
     DealerStockItemSerializer,
 )
 from dealers.filters import DealerFilter, DealerStockFilter
+from dealers.importers import DEALER_STOCK_IMPORT
 from dealers.models import Dealer, DealerStockItem
 from dealers.permissions import IsDealerOwner, IsDealerOwnerOrReadOnly
 from marketing.filters import (
@@ -221,7 +222,7 @@ class DealerSuppliersListAPIView(generics.ListAPIView):
             return Supplier.objects.none()
 
 
-class DealerStockAPIView(DealerOwnerMixin, viewsets.ModelViewSet):
+class DealerStockAPIView(BulkImportMixin, DealerOwnerMixin, viewsets.ModelViewSet):
     """
     Dealer stock endpoint.
 
@@ -242,6 +243,7 @@ class DealerStockAPIView(DealerOwnerMixin, viewsets.ModelViewSet):
     -GET : Retrieve a list of all dealers' stock items.
     -GET : Retrieve a dealer's stock item detail by dealer ID.
     -PUT/PATCH : Update dealer's stock item data by ID.
+    -POST import/ : Create or update dealer's stock items from CSV or NDJSON file.
     """
 
     queryset = DealerStockItem.objects.all()
@@ -253,6 +255,7 @@ class DealerStockAPIView(DealerOwnerMixin, viewsets.ModelViewSet):
     filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
     ordering_fields = ["price_per_one", "amount"]
     filterset_class = DealerStockFilter
+    bulk_import = DEALER_STOCK_IMPORT
 
 
 class DealerDiscountListAPIView(generics.ListAPIView):
@@ -315,3 +318,9 @@ class DealerMarketingListAPIView(generics.ListAPIView):
             return dealer.marketing_campaigns.all()
         except Dealer.DoesNotExist:
             return DealerMarketingCampaign.objects.none()
+
+
+class AsyncDealerStockAPIView(AsyncReadMixin, DealerStockAPIView):
+    """
+    Async read-only variant of DealerStockAPIView served by ASGI.
+    """
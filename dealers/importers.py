@@ -0,0 +1,8 @@
+from common.bulk_import import BulkImport
+from dealers.models import DealerStockItem
+
+DEALER_STOCK_IMPORT = BulkImport(
+    DealerStockItem,
+    "dealer",
+    ["car_id", "amount", "price_per_one", "is_active"],
+)
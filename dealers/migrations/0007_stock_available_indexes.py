@@ -0,0 +1,30 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dealers", "0006_alter_dealer_place"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dealerstockitem",
+            index=models.Index(
+                condition=models.Q(("amount__gt", 0), ("is_active", True)),
+                fields=["car", "price_per_one"],
+                include=("id", "dealer"),
+                name="dealer_stock_available_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dealerstockitem",
+            index=models.Index(
+                condition=models.Q(("amount__gt", 0), ("is_active", True)),
+                fields=["dealer"],
+                name="dealer_stock_dealer_avail_idx",
+            ),
+        ),
+    ]
@@ -1,8 +1,6 @@
-from datetime import datetime, timedelta
-
 from django.db import models
 from django.db.models.query import QuerySet
-from django.db.models import Q, Prefetch, Sum
+from django.db.models import Q, Prefetch
 
 from cars.models import CarCharacteristic, CarStockItem
 from common.models import BaseQuerySet, Company
@@ -20,6 +18,15 @@ class DealerQuerySet(BaseQuerySet):
     def stock(self):
         return self.prefetch_related("stock__car")
 
+    def available_stock(self):
+        """
+        Preloads only stock items which can be sold.
+        """
+        return self.prefetch_related(
+            Prefetch("stock", queryset=DealerStockItem.objects.available()),
+            "stock__car",
+        )
+
     def car_characteristics(self):
         return self.prefetch_related("car_characteristics")
 
@@ -29,24 +36,6 @@ class DealerQuerySet(BaseQuerySet):
     def marketing_campaigns(self):
         return self.prefetch_related("marketing_campaigns__cars")
 
-    def three_month_history(self):
-        """
-        Takes deals history for last 3 months and preload total amount of purchases for all suppliers.
-        """
-        from orders.models import CustomerDealsHistory
-
-        three_month_ago = datetime.now() - timedelta(days=90)
-        customer_history_filter = Q(date__gte=three_month_ago)
-        customer_history_prefetch = Prefetch(
-            "customer_history",
-            queryset=CustomerDealsHistory.objects.filter(customer_history_filter)
-            .annotate(total_amount=Sum("amount"))
-            .select_related("car"),
-            to_attr="three_month_history",
-        )
-
-        return self.prefetch_related(customer_history_prefetch)
-
 
 class DealerManager(models.Manager):
     """
@@ -60,13 +49,7 @@ class DealerManager(models.Manager):
         """
         Creates queryset with all necessary data for completing regular order purchase.
         """
-        return (
-            self.get_queryset()
-            .active()
-            .orders_history()
-            .three_month_history()
-            .dealer(dealer_id)
-        )
+        return self.get_queryset().active().orders_history().stock().dealer(dealer_id)
 
     def prepare_for_offer(self):
         """
@@ -75,7 +58,7 @@ class DealerManager(models.Manager):
         return (
             self.get_queryset()
             .active()
-            .stock()
+            .available_stock()
             .marketing_campaigns()
             .car_characteristics()
             .discounts()
@@ -88,7 +71,13 @@ class DealerManager(models.Manager):
         """
         Creates queryset with all necessary data for completing customer offer.
         """
-        return self.get_queryset().active().stock().marketing_campaigns().discounts()
+        return (
+            self.get_queryset()
+            .active()
+            .available_stock()
+            .marketing_campaigns()
+            .discounts()
+        )
 
 
 class Dealer(Company):
@@ -126,3 +115,20 @@ class DealerStockItem(CarStockItem):
     """
 
     dealer = models.ForeignKey(Dealer, on_delete=models.CASCADE, related_name="stock")
+
+    class Meta:
+        indexes = [
+            # suitable stock lookup by car in orders.sql_matcher
+            models.Index(
+                fields=["car", "price_per_one"],
+                include=["id", "dealer"],
+                condition=Q(is_active=True, amount__gt=0),
+                name="dealer_stock_available_idx",
+            ),
+            # preloading available stock of dealers
+            models.Index(
+                fields=["dealer"],
+                condition=Q(is_active=True, amount__gt=0),
+                name="dealer_stock_dealer_avail_idx",
+            ),
+        ]
@@ -8,7 +8,8 @@ def max_workers():
 
 bind = "0.0.0.0:" + environ.get("PORT", "8000")
 max_requests = 1000
-worker_class = "sync"
+# "uvicorn.workers.UvicornWorker" serves car_dealership.asgi:application
+worker_class = environ.get("GUNICORN_WORKER_CLASS", "sync")
 workers = max_workers()
 
 env = {"DJANGO_SETTINGS_MODULE": "car_dealership.settings"}
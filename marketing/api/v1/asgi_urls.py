@@ -0,0 +1,22 @@
+from django.urls import path
+
+from marketing.api.v1 import views
+
+urlpatterns = [
+    path(
+        "dealers/campaigns/",
+        views.AsyncDealerMarketingCampaignAPIView.as_view({"get": "list"}),
+    ),
+    path(
+        "dealers/campaigns/<int:pk>/",
+        views.AsyncDealerMarketingCampaignAPIView.as_view({"get": "retrieve"}),
+    ),
+    path(
+        "suppliers/campaigns/",
+        views.AsyncSuplierMarketingCampaignAPIView.as_view({"get": "list"}),
+    ),
+    path(
+        "suppliers/campaigns/<int:pk>/",
+        views.AsyncSuplierMarketingCampaignAPIView.as_view({"get": "retrieve"}),
+    ),
+]
@@ -5,7 +5,19 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from common.mixins import DealerOwnerMixin, SupplierOwnerMixin
+from common.cache import (
+    CARS,
+    DEALER_CAMPAIGNS,
+    SUPPLIER_CAMPAIGNS,
+    AsyncCatalogCacheMixin,
+    CatalogCacheMixin,
+)
+from common.mixins import (
+    AsyncReadMixin,
+    BulkImportMixin,
+    DealerOwnerMixin,
+    SupplierOwnerMixin,
+)
 from marketing.api.v1.serializers import (
     DealerDiscountSerializer,
     DealerMarketingCampaignSerializer,
@@ -20,6 +32,12 @@ from marketing.filters import (
     SupplierDiscountFilter,
     SupplierMarketingCampaignFilter,
 )
+from marketing.importers import (
+    DEALER_CAMPAIGNS_IMPORT,
+    DEALER_DISCOUNTS_IMPORT,
+    SUPPLIER_CAMPAIGNS_IMPORT,
+    SUPPLIER_DISCOUNTS_IMPORT,
+)
 from marketing.models import DealerMarketingCampaign, SupplierMarketingCampaign
 from marketing.permissions import (
     IsMarketingDealerOwnerOrReadOnly,
@@ -79,13 +97,18 @@ class UpdateCampaignCarsMixin:
 
 
 class DealerMarketingCampaignAPIView(
-    DealerOwnerMixin, UpdateCampaignCarsMixin, viewsets.ModelViewSet
+    CatalogCacheMixin,
+    BulkImportMixin,
+    DealerOwnerMixin,
+    UpdateCampaignCarsMixin,
+    viewsets.ModelViewSet,
 ):
     """
     Dealer marketing campaign endpoint.
 
     This endpoint provides CRUD operations for customers.
     Includes searching, filtering and ordering dealer's marketing campaigns objects.
+    List and detail responses are cached (common.cache.CatalogCacheMixin).
 
     HTTP methods:
     - GET
@@ -101,6 +124,7 @@ class DealerMarketingCampaignAPIView(
     -GET : Retrieve a list of all dealers' marketing campaigns.
     -GET : Retrieve a dealer's marketing campaigns detail by deaker ID.
     -PUT/PATCH : Update dealer's marketing campaign data by ID.
+    -POST import/ : Create or update dealer's marketing campaigns from CSV or NDJSON file.
     """
 
     queryset = DealerMarketingCampaign.objects.all()
@@ -110,16 +134,23 @@ class DealerMarketingCampaignAPIView(
     search_fields = ["description", "name"]
     ordering_fields = ["end_date", "start_date", "percentage"]
     filterset_class = DealerMarketingCampaignFilter
+    cache_namespaces = (DEALER_CAMPAIGNS, CARS)
+    bulk_import = DEALER_CAMPAIGNS_IMPORT
 
 
 class SuplierMarketingCampaignAPIView(
-    SupplierOwnerMixin, UpdateCampaignCarsMixin, viewsets.ModelViewSet
+    CatalogCacheMixin,
+    BulkImportMixin,
+    SupplierOwnerMixin,
+    UpdateCampaignCarsMixin,
+    viewsets.ModelViewSet,
 ):
     """
     Supplier marketing campaign endpoint.
 
     This endpoint provides CRUD operations for customers.
     Includes searching, filtering and ordering suppliers's marketing campaigns objects.
+    List and detail responses are cached (common.cache.CatalogCacheMixin).
 
     HTTP methods:
     - GET
@@ -135,6 +166,7 @@ class SuplierMarketingCampaignAPIView(
     -GET : Retrieve a list of all suppliers' marketing campaigns.
     -GET : Retrieve a supplier's marketing campaigns detail by deaker ID.
     -PUT/PATCH : Update supplier's marketing campaign data by ID.
+    -POST import/ : Create or update supplier's marketing campaigns from CSV or NDJSON file.
     """
 
     queryset = SupplierMarketingCampaign.objects.all()
@@ -147,9 +179,11 @@ class SuplierMarketingCampaignAPIView(
     search_fields = ["description", "name"]
     ordering_fields = ["end_date", "start_date", "percentage"]
     filterset_class = SupplierMarketingCampaignFilter
+    cache_namespaces = (SUPPLIER_CAMPAIGNS, CARS)
+    bulk_import = SUPPLIER_CAMPAIGNS_IMPORT
 
 
-class DealerDiscountsAPIView(DealerOwnerMixin, viewsets.ModelViewSet):
+class DealerDiscountsAPIView(BulkImportMixin, DealerOwnerMixin, viewsets.ModelViewSet):
     """
     Dealer discount endpoint.
 
@@ -170,6 +204,7 @@ class DealerDiscountsAPIView(DealerOwnerMixin, viewsets.ModelViewSet):
     -GET : Retrieve a list of all dealers' discounts.
     -GET : Retrieve a dealer's discounts detail by deaker ID.
     -PUT/PATCH : Update dealer's discount data by ID.
+    -POST import/ : Create or update dealer's discounts from CSV or NDJSON file.
     """
 
     queryset = DealerDiscount.objects.all()
@@ -178,9 +213,12 @@ class DealerDiscountsAPIView(DealerOwnerMixin, viewsets.ModelViewSet):
     filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
     ordering_fields = ["percentage", "min_amount"]
     filterset_class = DealerDiscountFilter
+    bulk_import = DEALER_DISCOUNTS_IMPORT
 
 
-class SuplierDiscountsAPIView(SupplierOwnerMixin, viewsets.ModelViewSet):
+class SuplierDiscountsAPIView(
+    BulkImportMixin, SupplierOwnerMixin, viewsets.ModelViewSet
+):
     """
     Supplier discount endpoint.
 
@@ -201,6 +239,7 @@ class SuplierDiscountsAPIView(SupplierOwnerMixin, viewsets.ModelViewSet):
     -GET : Retrieve a list of all suppliers' discounts.
     -GET : Retrieve a supplier's discounts detail by deaker ID.
     -PUT/PATCH : Update supplier's discount data by ID.
+    -POST import/ : Create or update supplier's discounts from CSV or NDJSON file.
     """
 
     queryset = SupplierDiscount.objects.all()
@@ -212,3 +251,26 @@ class SuplierDiscountsAPIView(SupplierOwnerMixin, viewsets.ModelViewSet):
     filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
     ordering_fields = ["percentage", "min_amount"]
     filterset_class = SupplierDiscountFilter
+    bulk_import = SUPPLIER_DISCOUNTS_IMPORT
+
+
+class AsyncDealerMarketingCampaignAPIView(
+    AsyncCatalogCacheMixin, AsyncReadMixin, DealerMarketingCampaignAPIView
+):
+    """
+    Async read-only variant of DealerMarketingCampaignAPIView served by ASGI.
+    Campaigns' cars are prefetched, since relations can't be loaded lazily in async views.
+    """
+
+    queryset = DealerMarketingCampaign.objects.prefetch_related("cars")
+
+
+class AsyncSuplierMarketingCampaignAPIView(
+    AsyncCatalogCacheMixin, AsyncReadMixin, SuplierMarketingCampaignAPIView
+):
+    """
+    Async read-only variant of SuplierMarketingCampaignAPIView served by ASGI.
+    Campaigns' cars are prefetched, since relations can't be loaded lazily in async views.
+    """
+
+    queryset = SupplierMarketingCampaign.objects.prefetch_related("cars")
@@ -0,0 +1,40 @@
+from common.bulk_import import BulkImport
+from common.cache import DEALER_CAMPAIGNS, SUPPLIER_CAMPAIGNS, SUPPLIER_MARKET
+from marketing.models import (
+    DealerDiscount,
+    DealerMarketingCampaign,
+    SupplierDiscount,
+    SupplierMarketingCampaign,
+)
+
+DISCOUNT_FIELDS = ["name", "min_amount", "percentage", "discount_type", "is_active"]
+CAMPAIGN_FIELDS = [
+    "name",
+    "description",
+    "percentage",
+    "start_date",
+    "end_date",
+    "is_active",
+]
+
+DEALER_DISCOUNTS_IMPORT = BulkImport(DealerDiscount, "dealer", DISCOUNT_FIELDS)
+SUPPLIER_DISCOUNTS_IMPORT = BulkImport(
+    SupplierDiscount,
+    "supplier",
+    DISCOUNT_FIELDS,
+    cache_namespaces=(SUPPLIER_MARKET,),
+)
+DEALER_CAMPAIGNS_IMPORT = BulkImport(
+    DealerMarketingCampaign,
+    "dealer",
+    CAMPAIGN_FIELDS,
+    with_cars=True,
+    cache_namespaces=(DEALER_CAMPAIGNS,),
+)
+SUPPLIER_CAMPAIGNS_IMPORT = BulkImport(
+    SupplierMarketingCampaign,
+    "supplier",
+    CAMPAIGN_FIELDS,
+    with_cars=True,
+    cache_namespaces=(SUPPLIER_CAMPAIGNS, SUPPLIER_MARKET),
+)
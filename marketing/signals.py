@@ -0,0 +1,47 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from common.cache import (
+    DEALER_CAMPAIGNS,
+    SUPPLIER_CAMPAIGNS,
+    SUPPLIER_MARKET,
+    bump_generation,
+)
+from marketing.models import (
+    DealerMarketingCampaign,
+    SupplierDiscount,
+    SupplierMarketingCampaign,
+)
+
+
+@receiver([post_save, post_delete], sender=DealerMarketingCampaign)
+@receiver(m2m_changed, sender=DealerMarketingCampaign.cars.through)
+def dealer_campaign_changed_handler(sender, *args, **kwargs):
+    """
+    Signal handler after dealer's marketing campaign or its cars change.
+
+    Invalidates cached dealers' marketing campaigns.
+    """
+    bump_generation(DEALER_CAMPAIGNS)
+
+
+@receiver([post_save, post_delete], sender=SupplierMarketingCampaign)
+@receiver(m2m_changed, sender=SupplierMarketingCampaign.cars.through)
+def supplier_campaign_changed_handler(sender, *args, **kwargs):
+    """
+    Signal handler after supplier's marketing campaign or its cars change.
+
+    Invalidates cached suppliers' marketing campaigns and suppliers market.
+    """
+    bump_generation(SUPPLIER_CAMPAIGNS)
+    bump_generation(SUPPLIER_MARKET)
+
+
+@receiver([post_save, post_delete], sender=SupplierDiscount)
+def supplier_discount_changed_handler(sender, *args, **kwargs):
+    """
+    Signal handler after supplier's discount change.
+
+    Invalidates cached suppliers market.
+    """
+    bump_generation(SUPPLIER_MARKET)
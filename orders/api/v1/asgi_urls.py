@@ -0,0 +1,19 @@
+from django.urls import path
+from orders.api.v1 import views
+
+urlpatterns = [
+    path("customers/<int:pk>", views.AsyncCustomersDealsHistoryView.as_view()),
+    path("customers", views.AsyncCustomersDealsHistoryView.as_view()),
+    path(
+        "dealers/<int:pk>/customers",
+        views.AsyncDealersHistoryWithCustomersView.as_view(),
+    ),
+    path(
+        "dealers/<int:pk>/suppliers",
+        views.AsyncDealersHistoryWithSuppliersView.as_view(),
+    ),
+    path(
+        "suppliers/<int:pk>/dealers",
+        views.AsyncSuppliersHistoryWithDealersView.as_view(),
+    ),
+]
@@ -3,7 +3,15 @@ from rest_framework.response import Response
 from django_filters import rest_framework as filters
 from rest_framework.filters import OrderingFilter
 
-from common.mixins import CustomerOwnerMixin, DealerOwnerMixin
+from common.mixins import (
+    AsyncNDJSONExportMixin,
+    AsyncReadMixin,
+    CustomerOwnerMixin,
+    DealerOwnerMixin,
+    NDJSONExportMixin,
+)
+from common.pagination import KeysetPagination, OffersKeysetPagination
+from common.renderers import EventStreamRenderer
 from customers.models import Customer
 from customers.permissions import IsActiveUserOrReadOnly, IsCustomerOrReadOnly
 from dealers.models import Dealer
@@ -33,12 +41,16 @@ from orders.models import (
     TotalDealerPurchase,
     TotalSupplierPurchase,
 )
+from orders.offer_events import offer_events_response
+from orders.offer_queue import enqueue_offer
 from orders.tasks import handle_customer_offer, handle_dealer_offer
 from suppliers.models import Supplier
 from suppliers.permissions import IsSupplierOwner
 
 
-class CustomersDealsHistoryView(generics.ListAPIView, generics.RetrieveAPIView):
+class CustomersDealsHistoryView(
+    NDJSONExportMixin, generics.ListAPIView, generics.RetrieveAPIView
+):
     """
     Customer's deals history API endpoint.
 
@@ -51,6 +63,8 @@ class CustomersDealsHistoryView(generics.ListAPIView, generics.RetrieveAPIView):
 
     Request parameters:
     - id (path parameter, optional)
+    - cursor, page_size (query parameters, optional) - keyset pagination
+    - export (query parameter, optional) - "ndjson" streams the whole list
 
     Actions:
     -GET : Retrieve a list of all customer's cars
@@ -58,6 +72,7 @@ class CustomersDealsHistoryView(generics.ListAPIView, generics.RetrieveAPIView):
     """
 
     serializer_class = CustomerDealsHistorySerializer
+    pagination_class = KeysetPagination
     filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
     ordering_fields = ["price_per_one", "amount", "date"]
     filterset_class = CustomerDealsHistoryFilter
@@ -73,7 +88,9 @@ class CustomersDealsHistoryView(generics.ListAPIView, generics.RetrieveAPIView):
         return CustomerDealsHistory.objects.all()
 
 
-class CustomersOffersAPIView(CustomerOwnerMixin, generics.ListCreateAPIView):
+class CustomersOffersAPIView(
+    CustomerOwnerMixin, NDJSONExportMixin, generics.ListCreateAPIView
+):
     """
     Customer's offers API endpoint.
 
@@ -86,6 +103,8 @@ class CustomersOffersAPIView(CustomerOwnerMixin, generics.ListCreateAPIView):
 
     Request parameters:
     - id (path parameter)
+    - cursor, page_size (query parameters, optional) - keyset pagination
+    - export (query parameter, optional) - "ndjson" streams the whole list
 
     Actions:
     -GET : Retrieve a list of customer's offers
@@ -101,6 +120,7 @@ class CustomersOffersAPIView(CustomerOwnerMixin, generics.ListCreateAPIView):
         IsCustomerOrReadOnly,
         IsActiveUserOrReadOnly,
     ]
+    pagination_class = OffersKeysetPagination
     filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
     ordering_fields = ["max_price", "amount"]
     filterset_fields = ["car", "is_closed"]
@@ -112,7 +132,7 @@ class CustomersOffersAPIView(CustomerOwnerMixin, generics.ListCreateAPIView):
         self.perform_create(serializer)
         offer = serializer.save()
 
-        handle_customer_offer.delay(offer.pk)
+        enqueue_offer(handle_customer_offer, offer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
@@ -144,7 +164,40 @@ class CustomersOffersRetrieveAPIView(generics.RetrieveAPIView):
     ]
 
 
-class DealersOffersAPIView(DealerOwnerMixin, generics.ListCreateAPIView):
+class CustomersOffersEventsAPIView(generics.RetrieveAPIView):
+    """
+    Customer's offer status events API endpoint.
+
+    This endpoint streams status of specific offer as server-sent events
+    until the offer is closed, instead of polling the offer.
+    Must be served by ASGI server.
+
+    HTTP methods:
+    - GET
+
+    Request parameters:
+    - id (path parameter)
+
+    Actions:
+    -GET : Stream "status" events of the offer.
+    """
+
+    queryset = CustomerOffer.objects.only("id")
+    renderer_classes = [EventStreamRenderer]
+    permission_classes = [
+        permissions.IsAuthenticated,
+        IsCustomerOrReadOnly,
+        IsActiveUserOrReadOnly,
+    ]
+
+    def retrieve(self, request, *args, **kwargs):
+        offer = self.get_object()
+        return offer_events_response(CustomerOffer, offer.pk)
+
+
+class DealersOffersAPIView(
+    DealerOwnerMixin, NDJSONExportMixin, generics.ListCreateAPIView
+):
     """
     Dealer's retrieve offers API endpoint.
 
@@ -157,6 +210,8 @@ class DealersOffersAPIView(DealerOwnerMixin, generics.ListCreateAPIView):
 
     Request parameters:
     - id (path parameter)
+    - cursor, page_size (query parameters, optional) - keyset pagination
+    - export (query parameter, optional) - "ndjson" streams the whole list
 
     Actions:
     -GET : Retrieve a list of dealer's offers
@@ -170,6 +225,7 @@ class DealersOffersAPIView(DealerOwnerMixin, generics.ListCreateAPIView):
         IsDealerOrReadOnly,
         IsActiveUserOrReadOnly,
     ]
+    pagination_class = OffersKeysetPagination
     filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
     ordering_fields = ["max_price", "amount"]
     filterset_fields = ["car", "is_closed"]
@@ -181,7 +237,7 @@ class DealersOffersAPIView(DealerOwnerMixin, generics.ListCreateAPIView):
         self.perform_create(serializer)
         offer = serializer.save()
 
-        handle_dealer_offer.delay(offer.pk)
+        enqueue_offer(handle_dealer_offer, offer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
@@ -210,7 +266,38 @@ class DealersOffersRetrieveAPIView(generics.RetrieveAPIView):
     ]
 
 
-class DealersHistoryWithCustomersView(generics.ListAPIView):
+class DealersOffersEventsAPIView(generics.RetrieveAPIView):
+    """
+    Dealer's offer status events API endpoint.
+
+    This endpoint streams status of specific dealer's offer as server-sent events
+    until the offer is closed, instead of polling the offer.
+    Must be served by ASGI server.
+
+    HTTP methods:
+    - GET
+
+    Request parameters:
+    - id (path parameter)
+
+    Actions:
+    -GET : Stream "status" events of the offer.
+    """
+
+    queryset = DealerOffer.objects.only("id")
+    renderer_classes = [EventStreamRenderer]
+    permission_classes = [
+        permissions.IsAuthenticated,
+        IsDealerOrReadOnly,
+        IsActiveUserOrReadOnly,
+    ]
+
+    def retrieve(self, request, *args, **kwargs):
+        offer = self.get_object()
+        return offer_events_response(DealerOffer, offer.pk)
+
+
+class DealersHistoryWithCustomersView(NDJSONExportMixin, generics.ListAPIView):
     """
     Dealer's deals with customers API endpoint.
 
@@ -223,6 +310,8 @@ class DealersHistoryWithCustomersView(generics.ListAPIView):
 
     Request parameters:
     - id (path parameter)
+    - cursor, page_size (query parameters, optional) - keyset pagination
+    - export (query parameter, optional) - "ndjson" streams the whole list
 
     Actions:
     -GET : Retrieve a list of customers' deals with specific dealer.
@@ -230,6 +319,7 @@ class DealersHistoryWithCustomersView(generics.ListAPIView):
 
     serializer_class = CustomerDealsHistorySerializer
     permission_classes = [permissions.IsAuthenticated, IsDealerOwner]
+    pagination_class = KeysetPagination
     filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
     ordering_fields = ["amount", "price_per_one", "date"]
     filterset_class = DealerDealsWithCustomerFilter
@@ -276,7 +366,7 @@ class DealersTotalHistoryWithCustomersView(generics.ListAPIView):
             return TotalDealerPurchase.objects.none()
 
 
-class DealersHistoryWithSuppliersView(generics.ListAPIView):
+class DealersHistoryWithSuppliersView(NDJSONExportMixin, generics.ListAPIView):
     """
     Dealer's deals with supplier API endpoint.
 
@@ -289,6 +379,8 @@ class DealersHistoryWithSuppliersView(generics.ListAPIView):
 
     Request parameters:
     - id (path parameter)
+    - cursor, page_size (query parameters, optional) - keyset pagination
+    - export (query parameter, optional) - "ndjson" streams the whole list
 
     Actions:
     -GET : Retrieve a list of dealer's deals with supplier.
@@ -296,6 +388,7 @@ class DealersHistoryWithSuppliersView(generics.ListAPIView):
 
     serializer_class = DealerDealsHistorySerializer
     permission_classes = [permissions.IsAuthenticated, IsDealerOwner]
+    pagination_class = KeysetPagination
     filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
     ordering_fields = ["amount", "price_per_one", "date"]
     filterset_class = DealerDealsWithSupplierFilter
@@ -342,7 +435,7 @@ class DealersTotalHistoryWithSuppliersView(generics.ListAPIView):
             return TotalSupplierPurchase.objects.none()
 
 
-class SuppliersHistoryWithDealersView(generics.ListAPIView):
+class SuppliersHistoryWithDealersView(NDJSONExportMixin, generics.ListAPIView):
     """
     Supplier's deals with dealer API endpoint.
 
@@ -355,6 +448,8 @@ class SuppliersHistoryWithDealersView(generics.ListAPIView):
 
     Request parameters:
     - id (path parameter)
+    - cursor, page_size (query parameters, optional) - keyset pagination
+    - export (query parameter, optional) - "ndjson" streams the whole list
 
     Actions:
     -GET : Retrieve a list of supplier's deals with dealer.
@@ -362,6 +457,7 @@ class SuppliersHistoryWithDealersView(generics.ListAPIView):
 
     serializer_class = DealerDealsHistorySerializer
     permission_classes = [permissions.IsAuthenticated, IsSupplierOwner]
+    pagination_class = KeysetPagination
     filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
     ordering_fields = ["amount", "price_per_one", "date"]
     filterset_class = SupplierDealsWithDealerFilter
@@ -406,3 +502,35 @@ class SuppliersTotalPurchasesWithDealersView(generics.ListAPIView):
             return supplier.total_purchases.all()
         except Supplier.DoesNotExist:
             return TotalSupplierPurchase.objects.none()
+
+
+class AsyncCustomersDealsHistoryView(
+    AsyncNDJSONExportMixin, AsyncReadMixin, CustomersDealsHistoryView
+):
+    """
+    Async read-only variant of CustomersDealsHistoryView served by ASGI.
+    """
+
+
+class AsyncDealersHistoryWithCustomersView(
+    AsyncNDJSONExportMixin, AsyncReadMixin, DealersHistoryWithCustomersView
+):
+    """
+    Async read-only variant of DealersHistoryWithCustomersView served by ASGI.
+    """
+
+
+class AsyncDealersHistoryWithSuppliersView(
+    AsyncNDJSONExportMixin, AsyncReadMixin, DealersHistoryWithSuppliersView
+):
+    """
+    Async read-only variant of DealersHistoryWithSuppliersView served by ASGI.
+    """
+
+
+class AsyncSuppliersHistoryWithDealersView(
+    AsyncNDJSONExportMixin, AsyncReadMixin, SuppliersHistoryWithDealersView
+):
+    """
+    Async read-only variant of SuppliersHistoryWithDealersView served by ASGI.
+    """
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from dealers.models import Dealer, DealerStockItem
+from orders.models import CustomerDealsHistory
+
+# period of deals history used for forecasting
+SALES_PERIOD_DAYS = 90
+
+# car pk: (amount of sold cars, date of the first deal)
+CarsSalesType = Dict[int, Tuple[int, datetime]]
+StockItemType = Dict[str, Union[DealerStockItem, int, int]]
+
+
+def dealer_cars_sales(dealer: Dealer) -> CarsSalesType:
+    """
+    Function to get sales of dealer's cars for the period by one grouped query.
+    """
+    since = timezone.now() - timedelta(days=SALES_PERIOD_DAYS)
+    sales = CustomerDealsHistory.objects.filter(dealer=dealer).cars_sales(since)
+    return {row["car"]: (row["total"], row["first_date"]) for row in sales}
+
+
+def forecast_stock_purchases(
+    stock_items: List[DealerStockItem], sales: CarsSalesType
+) -> List[StockItemType]:
+    """
+    Function to forecast purchases of all stock items at once.
+
+    Units sold per day are counted from the first deal of the car in the period,
+    days of cover is amount on stock divided by units per day.
+    Stock items covering less than SELL_OUT_DAYS are restocked for SELL_OUT_DAYS
+    after delivery: (SELL_OUT_DAYS + AVERAGE_DELIVERY_DAYS - days of cover) * units per day.
+    Returns the same list of dicts as prepare_stock_data, without stock items needing nothing.
+    """
+    now = timezone.now()
+    size = len(stock_items)
+    amounts = np.fromiter((item.amount for item in stock_items), np.int64, size)
+    totals = np.zeros(size, dtype=np.int64)
+    days = np.ones(size, dtype=np.int64)
+    for index, item in enumerate(stock_items):
+        if item.car_id in sales:
+            total, first_date = sales[item.car_id]
+            totals[index] = total
+            days[index] = max(1, (now - first_date).days)
+
+    per_day = totals // days
+    days_of_cover = np.where(per_day > 0, amounts // np.maximum(per_day, 1), 0)
+    to_buy = (
+        settings.SELL_OUT_DAYS + settings.AVERAGE_DELIVERY_DAYS - days_of_cover
+    ) * per_day
+
+    return [
+        {
+            "stock_item": stock_items[index],
+            "amount_to_buy": int(to_buy[index]),
+            "total": int(totals[index]),
+        }
+        for index in np.flatnonzero(
+            (days_of_cover < settings.SELL_OUT_DAYS) & (to_buy > 0)
+        )
+    ]
@@ -0,0 +1,487 @@
+import hashlib
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model, QuerySet
+
+from cars.models import Car, CarCharacteristic, CarStockItem
+from common.cache import SUPPLIER_MARKET, get_generations
+from common.models import Company
+from marketing.models import (
+    Discount,
+    MarketingCampaign,
+    SupplierDiscount,
+    SupplierMarketingCampaign,
+)
+from suppliers.models import Supplier, SupplierStockItem
+
+StockEntryType = Tuple[int, CarStockItem, int]
+# (sorted min amounts, best discount among discounts with min amount up to the index)
+DiscountTierType = Tuple[List[int], List[Tuple[int, Discount]]]
+
+CHARACTERISTIC_FIELDS = (
+    "brand",
+    "car_model",
+    "generation",
+    "year_release",
+    "year_end_of_production",
+)
+
+
+class CharacteristicIndex:
+    """
+    Inverted index for matching cars and dealers by car characteristic.
+
+    Empty characteristic fields act as wildcards:
+    - car fits characteristic if all filled fields of characteristic are equal to car fields
+      (Car.is_fit_characteristic);
+    - dealer fits characteristic if one of dealer's characteristics has no filled fields
+      different from characteristic in offer (CarCharacteristic.is_suitable).
+
+    Attributes
+    ----------
+    cars_by_field : dict[str, dict[Any, set[int]]]
+        characteristic field -> field value -> car pks
+    car_ids : set[int]
+        all indexed car pks
+    dealers_by_key : dict[tuple, set[int]]
+        dealer characteristic key (empty fields are None) -> dealer pks
+    """
+
+    def __init__(self):
+        self.cars_by_field: Dict[str, Dict[object, Set[int]]] = {
+            field: defaultdict(set) for field in CHARACTERISTIC_FIELDS
+        }
+        self.car_ids: Set[int] = set()
+        self.dealers_by_key: Dict[tuple, Set[int]] = defaultdict(set)
+
+    @staticmethod
+    def characteristic_key(characteristic) -> tuple:
+        """
+        Function to make index key from car or car characteristic. Empty fields become None.
+        """
+        return tuple(
+            getattr(characteristic, field) or None for field in CHARACTERISTIC_FIELDS
+        )
+
+    def add_car(self, car: Car):
+        if car.pk in self.car_ids:
+            return
+        self.car_ids.add(car.pk)
+        for field, value in zip(CHARACTERISTIC_FIELDS, self.characteristic_key(car)):
+            self.cars_by_field[field][value].add(car.pk)
+
+    def add_dealer_characteristic(
+        self, dealer_id: int, characteristic: CarCharacteristic
+    ):
+        self.dealers_by_key[self.characteristic_key(characteristic)].add(dealer_id)
+
+    def cars_for(self, characteristic: CarCharacteristic) -> Set[int]:
+        """
+        Function to get pks of cars fitting the characteristic.
+
+        Intersects car pks by every filled field of characteristic, starting from the smallest set.
+        """
+        key = self.characteristic_key(characteristic)
+        cars_sets = [
+            self.cars_by_field[field].get(value, set())
+            for field, value in zip(CHARACTERISTIC_FIELDS, key)
+            if value is not None
+        ]
+        if not cars_sets:
+            return set(self.car_ids)
+
+        cars_sets.sort(key=len)
+        return set.intersection(*cars_sets)
+
+    def dealers_for(self, characteristic: CarCharacteristic) -> Set[int]:
+        """
+        Function to get pks of dealers with characteristic suitable for the characteristic.
+
+        Looks up every combination of filled fields with other fields as wildcards
+        (at most 2^5 lookups).
+        """
+        key = self.characteristic_key(characteristic)
+        filled = [index for index, value in enumerate(key) if value is not None]
+
+        dealer_ids = set()
+        for size in range(len(filled) + 1):
+            for indexes in combinations(filled, size):
+                lookup_key = tuple(
+                    value if index in indexes else None
+                    for index, value in enumerate(key)
+                )
+                dealer_ids |= self.dealers_by_key.get(lookup_key, set())
+        return dealer_ids
+
+
+class MarketSnapshot:
+    """
+    In-memory index of sellers market.
+
+    Built once from prefetched sellers queryset
+    (Dealer.objects.prepare_for_offer() / Supplier.objects.pre_order_queryset())
+    and shared between offers, so handlers look up candidates by car
+    instead of scanning every seller's stock and marketing campaigns.
+
+    Attributes
+    ----------
+    sellers : dict[int, Company]
+        sellers on market with seller pk as a key (queryset order is kept)
+    stock_by_car : dict[int, list[tuple[int, CarStockItem, int]]]
+        car pk -> [(seller pk, stock item, price per one)] for active stock items with positive amount
+    campaigns_by_seller_car : dict[tuple[int, int], MarketingCampaign]
+        (seller pk, car pk) -> marketing campaign with the biggest percentage
+    campaign_cars_by_seller : dict[int, dict[int, Car]]
+        seller pk -> cars participating in seller's marketing campaigns
+    discount_tiers : dict[int, dict[str, tuple[list[int], list[tuple[int, Discount]]]]]
+        seller pk -> discount type -> discounts tiers sorted by min amount
+    characteristic_index : CharacteristicIndex
+        index of snapshot's cars and dealers' characteristics.
+        Built on first access from the same prefetched rows as snapshot
+    """
+
+    def __init__(self, sellers: Iterable[Company]):
+        self.sellers: Dict[int, Company] = {}
+        self.stock_by_car: Dict[int, List[StockEntryType]] = defaultdict(list)
+        self.campaigns_by_seller_car: Dict[Tuple[int, int], MarketingCampaign] = {}
+        self.campaign_cars_by_seller: Dict[int, Dict[int, Car]] = defaultdict(dict)
+        self.discount_tiers: Dict[int, Dict[str, DiscountTierType]] = {}
+        self._characteristic_index: CharacteristicIndex = None
+
+        for seller in sellers:
+            self.add_seller(seller)
+
+    @property
+    def characteristic_index(self) -> CharacteristicIndex:
+        """
+        Index for offers with car characteristic.
+
+        Built lazily as only offers with characteristic need it
+        and dealers' characteristics are prefetched only for them.
+        """
+        if self._characteristic_index is None:
+            index = CharacteristicIndex()
+            for entries in self.stock_by_car.values():
+                for _seller_id, stock_item, _price in entries:
+                    index.add_car(stock_item.car)
+            for cars in self.campaign_cars_by_seller.values():
+                for car in cars.values():
+                    index.add_car(car)
+            for seller in self.sellers.values():
+                if hasattr(seller, "car_characteristics"):
+                    for characteristic in seller.car_characteristics.all():
+                        index.add_dealer_characteristic(seller.pk, characteristic)
+            self._characteristic_index = index
+        return self._characteristic_index
+
+    def add_seller(self, seller: Company):
+        """
+        Function to index seller's stock items and marketing campaigns.
+        """
+        self.sellers[seller.pk] = seller
+        self._characteristic_index = None
+
+        for stock_item in seller.stock.all():
+            if stock_item.is_active and stock_item.amount:
+                self.stock_by_car[stock_item.car_id].append(
+                    (seller.pk, stock_item, stock_item.price_per_one)
+                )
+
+        for campaign in seller.marketing_campaigns.all():
+            if campaign.percentage == 0:
+                continue
+            for car in campaign.cars.all():
+                key = (seller.pk, car.pk)
+                best_campaign = self.campaigns_by_seller_car.get(key)
+                if not best_campaign or campaign.percentage > best_campaign.percentage:
+                    self.campaigns_by_seller_car[key] = campaign
+                self.campaign_cars_by_seller[seller.pk][car.pk] = car
+
+        self.discount_tiers[seller.pk] = self._build_discount_tiers(
+            seller.discounts.all()
+        )
+
+    @staticmethod
+    def _build_discount_tiers(
+        discounts: Iterable[Discount],
+    ) -> Dict[str, DiscountTierType]:
+        """
+        Function to group discounts by type and sort them by min amount.
+
+        For every tier keeps the best discount among all discounts with smaller or equal min amount,
+        so the best discount for any purchases amount is found with binary search.
+        Discounts with equal percentage are ordered by their position in queryset.
+        """
+        discounts_by_type = defaultdict(list)
+        for position, discount in enumerate(discounts):
+            if discount.percentage:
+                discounts_by_type[discount.discount_type].append((position, discount))
+
+        tiers = {}
+        for discount_type, type_discounts in discounts_by_type.items():
+            type_discounts.sort(key=lambda d: d[1].min_amount)
+            min_amounts = []
+            best_discounts = []
+            best = None
+            for position, discount in type_discounts:
+                if (
+                    not best
+                    or discount.percentage > best[1].percentage
+                    or (
+                        discount.percentage == best[1].percentage and position < best[0]
+                    )
+                ):
+                    best = (position, discount)
+                min_amounts.append(discount.min_amount)
+                best_discounts.append(best)
+            tiers[discount_type] = (min_amounts, best_discounts)
+        return tiers
+
+    def stock_for_car(self, car_id: int) -> Dict[int, List[CarStockItem]]:
+        """
+        Function to collect sellers' stock items with specific car.
+
+        Returns dict with seller pk as a key and list of stock items as a value.
+        Stock items sold out after snapshot creation are skipped.
+        """
+        stock = {}
+        for seller_id, stock_item, _price in self.stock_by_car.get(car_id, []):
+            if stock_item.amount:
+                stock.setdefault(seller_id, []).append(stock_item)
+        return stock
+
+    def stock_for_characteristic(
+        self, characteristic: CarCharacteristic
+    ) -> Dict[int, List[CarStockItem]]:
+        """
+        Function to collect sellers' stock items with cars fitting the characteristic.
+
+        Returns dict with seller pk as a key and list of stock items as a value.
+        """
+        stock = {}
+        for car_id in self.characteristic_index.cars_for(characteristic):
+            for seller_id, stock_items in self.stock_for_car(car_id).items():
+                stock.setdefault(seller_id, []).extend(stock_items)
+        for stock_items in stock.values():
+            stock_items.sort(key=lambda item: item.pk)
+        return stock
+
+    def best_campaign(self, seller_id: int, car_id: int) -> MarketingCampaign:
+        """
+        Function to get seller's best marketing campaign for specific car.
+        """
+        return self.campaigns_by_seller_car.get((seller_id, car_id))
+
+    def best_campaign_percentage(self, seller_id: int, car_id: int):
+        """
+        Function to get percentage of seller's best marketing campaign for specific car.
+        """
+        campaign = self.best_campaign(seller_id, car_id)
+        return campaign.percentage if campaign else 0
+
+    def best_campaign_by_characteristic(
+        self, seller_id: int, characteristic: CarCharacteristic
+    ) -> MarketingCampaign:
+        """
+        Function to get seller's best marketing campaign
+        with at least one car fitting the characteristic.
+        """
+        campaign_cars = self.campaign_cars_by_seller.get(seller_id, {})
+        fitting_cars = self.characteristic_index.cars_for(characteristic)
+
+        best_marketing_campaign = None
+        for car_id in campaign_cars:
+            if car_id not in fitting_cars:
+                continue
+            campaign = self.best_campaign(seller_id, car_id)
+            if (
+                not best_marketing_campaign
+                or campaign.percentage > best_marketing_campaign.percentage
+            ):
+                best_marketing_campaign = campaign
+        return best_marketing_campaign
+
+    def best_discount(
+        self, seller_id: int, total_purchases: int = 0, current_purchase_amount: int = 1
+    ) -> Discount:
+        """
+        Function to get seller's discount with the biggest percentage.
+
+        Cumulative discounts are checked only for buyers with purchases history.
+        Bulk discounts are checked by amount of cars in current purchase.
+        """
+        tiers = self.discount_tiers.get(seller_id, {})
+        candidates = []
+        if total_purchases:
+            candidates.append(self._tier_lookup(tiers.get("CD"), total_purchases))
+        candidates.append(self._tier_lookup(tiers.get("BD"), current_purchase_amount))
+
+        best = None
+        for candidate in candidates:
+            if not candidate:
+                continue
+            if (
+                not best
+                or candidate[1].percentage > best[1].percentage
+                or (
+                    candidate[1].percentage == best[1].percentage
+                    and candidate[0] < best[0]
+                )
+            ):
+                best = candidate
+        return best[1] if best else None
+
+    @staticmethod
+    def _tier_lookup(tier: DiscountTierType, amount: int) -> Tuple[int, Discount]:
+        """
+        Function to find the best discount in tier with min amount less or equal than amount.
+        """
+        if not tier:
+            return None
+        min_amounts, best_discounts = tier
+        index = bisect_right(min_amounts, amount) - 1
+        return best_discounts[index] if index >= 0 else None
+
+
+# models of cached suppliers market rows
+SUPPLIER_MARKET_MODELS = (
+    Supplier,
+    SupplierStockItem,
+    Car,
+    SupplierMarketingCampaign,
+    SupplierDiscount,
+)
+
+
+def _model_fields(model) -> List[str]:
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _rows(queryset: QuerySet) -> List[tuple]:
+    return list(queryset.order_by("pk").values_list(*_model_fields(queryset.model)))
+
+
+def _from_rows(model, rows: Iterable[tuple]) -> List[Model]:
+    fields = _model_fields(model)
+    return [model.from_db(DEFAULT_DB_ALIAS, fields, row) for row in rows]
+
+
+def _set_prefetched(instance: Model, name: str, objects: List[Model]):
+    """
+    Function to fill related manager of instance with objects as if they were prefetched,
+    so instance.<name>.all() doesn't query database.
+    Name of related manager is its prefetch cache name for related_name and m2m fields.
+    """
+    queryset = getattr(instance, name).model._base_manager.all()
+    queryset._result_cache = objects
+    queryset._prefetch_done = True
+    instance.__dict__.setdefault("_prefetched_objects_cache", {})[name] = queryset
+
+
+def supplier_market_rows() -> Dict[str, List[tuple]]:
+    """
+    Function to load compact rows of suppliers market:
+    the same data as Supplier.objects.pre_order_queryset() prefetches as tuples of field values.
+    """
+    campaign_cars_field = SupplierMarketingCampaign._meta.get_field("cars")
+    campaign_cars = (
+        campaign_cars_field.remote_field.through.objects.filter(
+            **{
+                f"{campaign_cars_field.m2m_field_name()}__supplier__is_active": True,
+            }
+        )
+        .order_by("pk")
+        .values_list(
+            campaign_cars_field.m2m_column_name(),
+            campaign_cars_field.m2m_reverse_name(),
+        )
+    )
+    rows = {
+        "suppliers": _rows(Supplier.objects.filter(is_active=True)),
+        "stock": _rows(
+            SupplierStockItem.objects.available().filter(supplier__is_active=True)
+        ),
+        "campaigns": _rows(
+            SupplierMarketingCampaign.objects.filter(supplier__is_active=True)
+        ),
+        "campaign_cars": list(campaign_cars),
+        "discounts": _rows(SupplierDiscount.objects.filter(supplier__is_active=True)),
+    }
+    car_index = _model_fields(SupplierStockItem).index("car_id")
+    car_ids = {row[car_index] for row in rows["stock"]}
+    car_ids.update(car_id for _campaign_id, car_id in rows["campaign_cars"])
+    rows["cars"] = _rows(Car.objects.filter(pk__in=car_ids))
+    return rows
+
+
+def supplier_market_from_rows(
+    rows: Dict[str, List[tuple]], stock_amounts: Dict[int, int]
+) -> MarketSnapshot:
+    """
+    Function to build suppliers market snapshot from compact rows.
+
+    Stock items get actual amounts from stock_amounts (stock item pk -> amount),
+    stock items missing in it aren't available anymore and are skipped.
+    """
+    cars = {car.pk: car for car in _from_rows(Car, rows["cars"])}
+
+    stock = defaultdict(list)
+    for stock_item in _from_rows(SupplierStockItem, rows["stock"]):
+        if stock_item.pk not in stock_amounts:
+            continue
+        stock_item.amount = stock_amounts[stock_item.pk]
+        stock_item.car = cars[stock_item.car_id]
+        stock[stock_item.supplier_id].append(stock_item)
+
+    cars_by_campaign = defaultdict(list)
+    for campaign_id, car_id in rows["campaign_cars"]:
+        cars_by_campaign[campaign_id].append(cars[car_id])
+    campaigns = defaultdict(list)
+    for campaign in _from_rows(SupplierMarketingCampaign, rows["campaigns"]):
+        _set_prefetched(campaign, "cars", cars_by_campaign[campaign.pk])
+        campaigns[campaign.supplier_id].append(campaign)
+
+    discounts = defaultdict(list)
+    for discount in _from_rows(SupplierDiscount, rows["discounts"]):
+        discounts[discount.supplier_id].append(discount)
+
+    suppliers = _from_rows(Supplier, rows["suppliers"])
+    for supplier in suppliers:
+        _set_prefetched(supplier, "stock", stock[supplier.pk])
+        _set_prefetched(supplier, "marketing_campaigns", campaigns[supplier.pk])
+        _set_prefetched(supplier, "discounts", discounts[supplier.pk])
+    return MarketSnapshot(suppliers)
+
+
+def load_supplier_market() -> MarketSnapshot:
+    """
+    Function to load suppliers market snapshot shared by all workers through cache.
+
+    Compact rows of suppliers, available stock items, cars, marketing campaigns
+    and discounts are read from cache in one request and rebuilt
+    only when their generation is changed by signals of suppliers and marketing apps.
+    Stock amounts are changed by every deal, so they are loaded from database
+    by one narrow query instead of invalidating cached rows.
+    """
+    schema = hashlib.sha1(
+        repr([_model_fields(model) for model in SUPPLIER_MARKET_MODELS]).encode()
+    ).hexdigest()[:8]
+    key = f"{SUPPLIER_MARKET}:{schema}:{get_generations([SUPPLIER_MARKET])}"
+
+    rows = cache.get(key)
+    if rows is None:
+        rows = supplier_market_rows()
+        cache.set(key, rows, timeout=settings.SUPPLIER_MARKET_CACHE_TIMEOUT)
+
+    stock_amounts = dict(
+        SupplierStockItem.objects.available()
+        .filter(supplier__is_active=True)
+        .values_list("pk", "amount")
+    )
+    return supplier_market_from_rows(rows, stock_amounts)
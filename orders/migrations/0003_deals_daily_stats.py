@@ -0,0 +1,147 @@
+# Generated by Django 4.2.6 on 2026-10-17 11:57
+
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def fill_daily_stats(apps, schema_editor):
+    """
+    Function to fill daily rollup with existing deals history.
+    """
+    for history_name, stats_name, key_fields in [
+        ("CustomerDealsHistory", "CustomerDealsDailyStats", ["customer", "dealer"]),
+        ("DealerDealsHistory", "DealerDealsDailyStats", ["dealer", "supplier"]),
+    ]:
+        history_model = apps.get_model("orders", history_name)
+        stats_model = apps.get_model("orders", stats_name)
+        rows = (
+            history_model.objects.annotate(day=TruncDate("date"))
+            .values("day", "car_id", *[f"{field}_id" for field in key_fields])
+            .annotate(
+                total_amount=Sum("amount"),
+                revenue=Sum(F("amount") * F("price_per_one")),
+            )
+            .order_by()
+        )
+        stats_model.objects.bulk_create(
+            [
+                stats_model(
+                    day=row["day"],
+                    car_id=row["car_id"],
+                    amount=row["total_amount"],
+                    revenue=row["revenue"],
+                    **{f"{field}_id": row[f"{field}_id"] for field in key_fields},
+                )
+                for row in rows.iterator()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("suppliers", "0006_alter_supplier_place"),
+        ("customers", "0005_alter_customer_place"),
+        ("cars", "0002_rename_model_carcharacteristic_car_model_and_more"),
+        ("dealers", "0006_alter_dealer_place"),
+        ("orders", "0002_customeroffer_bought_car_customeroffer_car_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DealerDealsDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("amount", models.PositiveBigIntegerField(default=0)),
+                ("revenue", models.BigIntegerField(default=0)),
+                (
+                    "car",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="cars.car"
+                    ),
+                ),
+                (
+                    "dealer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="dealers.dealer",
+                    ),
+                ),
+                (
+                    "supplier",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dealer_daily_stats",
+                        to="suppliers.supplier",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CustomerDealsDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("amount", models.PositiveBigIntegerField(default=0)),
+                ("revenue", models.BigIntegerField(default=0)),
+                (
+                    "car",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="cars.car"
+                    ),
+                ),
+                (
+                    "customer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="customers.customer",
+                    ),
+                ),
+                (
+                    "dealer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="customer_daily_stats",
+                        to="dealers.dealer",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="dealerdealsdailystats",
+            constraint=models.UniqueConstraint(
+                fields=("day", "dealer", "supplier", "car"),
+                name="unique_dealer_deals_daily_stats",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="customerdealsdailystats",
+            constraint=models.UniqueConstraint(
+                fields=("day", "customer", "dealer", "car"),
+                name="unique_customer_deals_daily_stats",
+            ),
+        ),
+        migrations.RunPython(fill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0003_deals_daily_stats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="customerdealsdailystats",
+            index=models.Index(
+                fields=["customer", "day"], name="customer_daily_stats_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customerdealsdailystats",
+            index=models.Index(
+                fields=["dealer", "day"], name="dealer_customers_stats_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customerdealshistory",
+            index=models.Index(
+                fields=["customer", "date"],
+                include=("dealer", "car", "amount", "price_per_one"),
+                name="customer_deals_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customerdealshistory",
+            index=models.Index(
+                fields=["dealer", "date"],
+                include=("customer", "car", "amount", "price_per_one"),
+                name="dealer_customer_deals_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dealerdealsdailystats",
+            index=models.Index(fields=["dealer", "day"], name="dealer_daily_stats_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="dealerdealsdailystats",
+            index=models.Index(
+                fields=["supplier", "day"], name="supplier_dealers_stats_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dealerdealshistory",
+            index=models.Index(
+                fields=["dealer", "date"],
+                include=("supplier", "car", "amount", "price_per_one"),
+                name="dealer_deals_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dealerdealshistory",
+            index=models.Index(
+                fields=["supplier", "date"],
+                include=("dealer", "car", "amount", "price_per_one"),
+                name="supplier_deals_date_idx",
+            ),
+        ),
+    ]
@@ -1,8 +1,14 @@
-from django.db import models
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List
+
+from django.db import connection, models, transaction
 from django_countries.fields import CountryField
 from django.db.models import Sum
 from django.db.models.query import QuerySet
-from django.db.models import Sum, F
+from django.db.models import Sum, F, Min, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
 
 from cars.models import Car, CarCharacteristic
 from common.models import AmountCalculator, BaseModel, BaseQuerySet
@@ -11,6 +17,16 @@ from suppliers.models import Supplier
 from customers.models import Customer
 
 
+def deal_day(deal_date: datetime) -> date:
+    """
+    Function to get day of the deal in current time zone.
+    Naive date is considered to be in default time zone as it's saved in database.
+    """
+    if timezone.is_naive(deal_date):
+        deal_date = timezone.make_aware(deal_date)
+    return timezone.localdate(deal_date)
+
+
 class Offer(BaseModel):
     """
     An abstract class to represent a offer.
@@ -50,6 +66,9 @@ class Offer(BaseModel):
 
 
 class DealerOfferQuerySet(BaseQuerySet):
+    def pending(self, offer_id: int):
+        return self.filter(pk=offer_id, is_closed=False)
+
     def orders_history(self):
         return self.prefetch_related("orders_history")
 
@@ -67,11 +86,18 @@ class DealerOfferManager(models.Manager):
     def get_queryset(self) -> QuerySet:
         return DealerOfferQuerySet(self.model, using=self._db)
 
-    def prepare_offer(self, dealer_id: int):
+    def prepare_offer(self, offer_id: int):
         """
         Creates queryset with all necessary data for handling dealer offer.
+        Closed offer is not handled again.
         """
-        return self.get_queryset().dealer(dealer_id).car().dealer_history()
+        return (
+            self.get_queryset()
+            .pending(offer_id)
+            .select_related("dealer")
+            .car()
+            .dealer_history()
+        )
 
 
 class DealerOffer(Offer):
@@ -120,6 +146,9 @@ class DealerOffer(Offer):
 
 
 class CustomerOfferQuerySet(BaseQuerySet):
+    def pending(self, offer_id: int):
+        return self.filter(pk=offer_id, is_closed=False)
+
     def customer(self, customer_id: int):
         return self.filter(customer__id=customer_id).select_related("customer")
 
@@ -137,16 +166,18 @@ class CustomerOfferManager(models.Manager):
     def get_queryset(self) -> QuerySet:
         return CustomerOfferQuerySet(self.model, using=self._db)
 
-    def prepare_offer(self, customer_id: int):
+    def prepare_offer(self, offer_id: int):
         """
         Creates queryset with all necessary data for handling customer offer.
+        Closed offer is not handled again.
         """
         return (
             self.get_queryset()
+            .pending(offer_id)
+            .select_related("customer")
             .car()
             .characteristic()
             .customer_total_purchases()
-            .customer(customer_id)
         )
 
 
@@ -201,11 +232,194 @@ class CustomerOffer(Offer):
             return True
 
 
+class DealsDailyStatsManager(models.Manager):
+    """
+    A manager for daily rollup of deals.
+    """
+
+    def rollup_rows(self, deals: Iterable["DealHistory"]) -> Dict[tuple, List[int]]:
+        """
+        Function to group deals by rollup key (day and KEY_FIELDS).
+        Returns dict with key as a key and [amount, revenue] of its deals as a value.
+        """
+        rows = defaultdict(lambda: [0, 0])
+        for deal in deals:
+            key = (deal_day(deal.date),) + tuple(
+                getattr(deal, f"{field}_id") for field in self.model.KEY_FIELDS
+            )
+            rows[key][0] += deal.amount
+            rows[key][1] += deal.amount * deal.price_per_one
+        return rows
+
+    def add_deals(self, deals: Iterable["DealHistory"]):
+        """
+        Function to add deals to daily rollup.
+
+        Deals are grouped by rollup key and upserted with one query,
+        amount and revenue of existing rows are increased in the same statement.
+        """
+        rows = self.rollup_rows(deals)
+        if not rows:
+            return
+
+        columns = ["day"] + [f"{field}_id" for field in self.model.KEY_FIELDS]
+        table = self.model._meta.db_table
+        values = ", ".join(["%s"] * (len(columns) + 2))
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}, amount, revenue) "
+            f"VALUES {', '.join([f'({values})'] * len(rows))} "
+            f"ON CONFLICT ({', '.join(columns)}) DO UPDATE SET "
+            f"amount = {table}.amount + EXCLUDED.amount, "
+            f"revenue = {table}.revenue + EXCLUDED.revenue"
+        )
+        params = [value for key, row in rows.items() for value in (*key, *row)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def remove_deals(self, deals: Iterable["DealHistory"]):
+        """
+        Function to subtract changed or deleted deals from daily rollup.
+
+        Amount and revenue of rows are decreased with one query,
+        rows left without cars are deleted, so they aren't counted as unique clients or cars.
+        """
+        rows = self.rollup_rows(deals)
+        if not rows:
+            return
+
+        columns = ["day"] + [f"{field}_id" for field in self.model.KEY_FIELDS]
+        table = self.model._meta.db_table
+        values = ", ".join(["%s"] * (len(columns) + 2))
+        conditions = " AND ".join(
+            f"{table}.{column} = deals.{column}" for column in columns
+        )
+        sql = (
+            f"UPDATE {table} SET "
+            f"amount = {table}.amount - deals.amount, "
+            f"revenue = {table}.revenue - deals.revenue "
+            f"FROM (VALUES {', '.join([f'({values})'] * len(rows))}) "
+            f"AS deals ({', '.join(columns)}, amount, revenue) "
+            f"WHERE {conditions} "
+            f"RETURNING {table}.id, {table}.amount"
+        )
+        params = [value for key, row in rows.items() for value in (*key, *row)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            emptied = [pk for pk, amount in cursor.fetchall() if not amount]
+        if emptied:
+            self.filter(pk__in=emptied).delete()
+
+
+class DealsDailyStats(models.Model):
+    """
+    An abstract class to represent daily rollup of deals between two participants.
+    Contains one row per day, participants and car.
+
+    Attributes
+    ----------
+    day : DateField
+        day of the deals (in current time zone)
+    car : ForeignKey
+        car on sale
+    amount : PositiveBigIntegerField
+        total amount of sold cars
+    revenue : BigIntegerField
+        total cost of sold cars
+    """
+
+    # participants fields and car, together with day they are unique for every row
+    KEY_FIELDS = ()
+
+    day = models.DateField()
+    car = models.ForeignKey(Car, on_delete=models.CASCADE)
+    amount = models.PositiveBigIntegerField(default=0)
+    revenue = models.BigIntegerField(default=0)
+
+    objects = DealsDailyStatsManager()
+
+    class Meta:
+        abstract = True
+
+
+class CustomerDealsDailyStats(DealsDailyStats):
+    """
+    A class to represent daily rollup of deals between customers and dealers.
+    Inherits from class DealsDailyStats.
+
+    Attributes
+    ----------
+    customer : ForeignKey
+        relation to Customer table
+    dealer : ForeignKey
+        relation to Dealer table
+    """
+
+    KEY_FIELDS = ("customer", "dealer", "car")
+
+    customer = models.ForeignKey(
+        Customer, related_name="daily_stats", on_delete=models.CASCADE
+    )
+    dealer = models.ForeignKey(
+        Dealer, related_name="customer_daily_stats", on_delete=models.CASCADE
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "customer", "dealer", "car"],
+                name="unique_customer_deals_daily_stats",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["customer", "day"], name="customer_daily_stats_idx"),
+            models.Index(fields=["dealer", "day"], name="dealer_customers_stats_idx"),
+        ]
+
+
+class DealerDealsDailyStats(DealsDailyStats):
+    """
+    A class to represent daily rollup of deals between dealers and suppliers.
+    Inherits from class DealsDailyStats.
+
+    Attributes
+    ----------
+    dealer : ForeignKey
+        relation to Dealer table
+    supplier : ForeignKey
+        relation to Supplier table
+    """
+
+    KEY_FIELDS = ("dealer", "supplier", "car")
+
+    dealer = models.ForeignKey(
+        Dealer, related_name="daily_stats", on_delete=models.CASCADE
+    )
+    supplier = models.ForeignKey(
+        Supplier, related_name="dealer_daily_stats", on_delete=models.CASCADE
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "dealer", "supplier", "car"],
+                name="unique_dealer_deals_daily_stats",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["dealer", "day"], name="dealer_daily_stats_idx"),
+            models.Index(fields=["supplier", "day"], name="supplier_dealers_stats_idx"),
+        ]
+
+
 class DealHistory(BaseModel):
     """
     An abstract class to represent a deal history between two participants
     Inherits from class BaseModel.
 
+    Created deals are added to daily rollup (daily_stats_model) on save,
+    previous values of changed deals are subtracted from it.
+    Deleted deals are subtracted by orders.signals.
+
     Attributes
     ----------
     car : ForeignKey
@@ -218,6 +432,8 @@ class DealHistory(BaseModel):
         date of the deal
     """
 
+    daily_stats_model = None
+
     car = models.ForeignKey(Car, on_delete=models.PROTECT)
     amount = models.PositiveIntegerField(default=1)
     price_per_one = models.BigIntegerField()
@@ -235,6 +451,21 @@ class DealHistory(BaseModel):
         """
         return f"{self.car.car_model} ({self.amount})"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            self.daily_stats_model.objects.add_deals([self])
+            return
+
+        with transaction.atomic():
+            previous = (
+                type(self)._base_manager.select_for_update().filter(pk=self.pk).first()
+            )
+            super().save(*args, **kwargs)
+            if previous is not None:
+                self.daily_stats_model.objects.remove_deals([previous])
+            self.daily_stats_model.objects.add_deals([self])
+
 
 class CommonDealsQuerySet(models.QuerySet):
     """
@@ -250,37 +481,154 @@ class CommonDealsQuerySet(models.QuerySet):
     def total_sum(self):
         return self.aggregate(total_sum=Sum(F("amount") * F("price_per_one")))
 
+    def cars_sales(self, since: datetime):
+        """
+        Groups deals since the date by car with total amount of sold cars and date of the first deal.
+        """
+        return (
+            self.filter(date__gte=since)
+            .values("car")
+            .annotate(total=Sum("amount"), first_date=Min("date"))
+            .order_by()
+        )
+
 
-class CustomerDealsManager(models.Manager):
+class DealsStatsManager(models.Manager):
     """
-    A queryset manager for customer's deals with dealers.
+    Common manager for deals statistics.
+    Subclasses set client_field - buyer in deals.
+
+    Statistics are calculated by daily rollup (daily_stats_model of history model),
+    deals history is used only for partially covered days of the period.
     """
 
-    def get_total_amount_of_cars(self, filter_params: dict) -> QuerySet:
+    def split_filter_params(self, filter_params: dict) -> (dict, dict):
+        """
+        Function to split filter params (stats.utils.get_filter_params) into params
+        for days fully covered by period and params for deals of partially covered day.
+
+        Date of period boundary is converted to midnight, so:
+        - date__range covers end date only at midnight;
+        - date__gt covers start date except midnight;
+        - date__lt covers only days before end date.
+        Returns None instead of deals params if all days are fully covered.
+        """
+        stats_params = {}
+        deals_params = None
+        for key, value in filter_params.items():
+            if key == "date__range":
+                start_date, end_date = value
+                stats_params["day__gte"] = start_date
+                stats_params["day__lt"] = end_date
+                deals_params = {**filter_params, "date__date": end_date}
+            elif key == "date__gt":
+                stats_params["day__gt"] = value
+                deals_params = {**filter_params, "date__date": value}
+            elif key == "date__lt":
+                stats_params["day__lt"] = value
+            else:
+                stats_params[key] = value
+        return stats_params, deals_params
+
+    def _total(self, filter_params: dict, stats_field: str, deals_expression):
+        """
+        Function to sum rollup field and the same value of partially covered day deals.
+        Returns None if there are no deals for period.
+        """
+        stats_params, deals_params = self.split_filter_params(filter_params)
+        totals = [
+            self.model.daily_stats_model.objects.filter(**stats_params).aggregate(
+                total=Sum(stats_field)
+            )["total"]
+        ]
+        if deals_params:
+            totals.append(
+                self.filter(**deals_params).aggregate(total=Sum(deals_expression))[
+                    "total"
+                ]
+            )
+        totals = [total for total in totals if total is not None]
+        return sum(totals) if totals else None
+
+    def _count_unique(self, filter_params: dict, field: str) -> int:
+        """
+        Function to count unique values of field among rollup rows and partially covered day deals.
+        """
+        stats_params, deals_params = self.split_filter_params(filter_params)
+        queryset = self.model.daily_stats_model.objects.filter(**stats_params).values(
+            field
+        )
+        if deals_params:
+            return queryset.union(self.filter(**deals_params).values(field)).count()
+        return queryset.distinct().count()
+
+    def get_total_amount_of_cars(self, filter_params: dict) -> int:
         """
         Calculates total amount of cars in deals for specific or full period based on filter params.
         """
-        return self.filter(**filter_params).aggregate(total_amount=Sum(F("amount")))[
-            "total_amount"
-        ]
+        return self._total(filter_params, "amount", F("amount"))
 
-    def get_total_cost(self, filter_params: dict) -> QuerySet:
+    def get_total_cost(self, filter_params: dict) -> int:
         """
         Calculates total cost of cars for specific or full period based on filter params.
         """
-        return self.filter(**filter_params).total_sum()["total_sum"]
+        return self._total(filter_params, "revenue", F("amount") * F("price_per_one"))
 
-    def get_amount_of_unique_clients(self, filter_params: dict) -> QuerySet:
+    def get_amount_of_sold_unique_cars(self, filter_params: dict) -> int:
+        """
+        Calculates unique cars in deals for specific or full period based on filter params.
+        """
+        return self._count_unique(filter_params, "car")
+
+    def get_amount_of_unique_clients(self, filter_params: dict) -> int:
         """
         Calculates unique clients in deals for specific or full period based on filter params.
         """
-        return self.filter(**filter_params).values("customer").count_unique()
+        return self._count_unique(filter_params, self.client_field)
 
-    def get_amount_of_sold_unique_cars(self, filter_params: dict) -> QuerySet:
+    def deals_rows(self, filter_params: dict, source: int) -> List[QuerySet]:
         """
-        Calculates unique cars in deals for specific or full period based on filter params.
+        Function to prepare querysets of deals rows for statistics queries over several histories.
+
+        Every queryset returns rows of (source, day, client, car, amount, revenue):
+        rollup rows for fully covered days and deals of partially covered day.
         """
-        return self.filter(**filter_params).values("car").count_unique()
+        stats_params, deals_params = self.split_filter_params(filter_params)
+        querysets = [
+            self.model.daily_stats_model.objects.filter(**stats_params).annotate(
+                deal_day=F("day"), deal_revenue=F("revenue")
+            )
+        ]
+        if deals_params:
+            querysets.append(
+                self.filter(**deals_params).annotate(
+                    deal_day=TruncDate("date"),
+                    deal_revenue=F("amount") * F("price_per_one"),
+                )
+            )
+
+        # all columns are annotations, so their order in SQL is the same as in annotate
+        columns = {
+            "row_source": Value(source),
+            "row_day": F("deal_day"),
+            "row_client": F(self.client_field),
+            "row_car": F("car"),
+            "row_amount": F("amount"),
+            "row_revenue": F("deal_revenue"),
+        }
+        return [
+            queryset.annotate(**columns).values_list(*columns).order_by()
+            for queryset in querysets
+        ]
+
+
+class CustomerDealsManager(DealsStatsManager):
+    """
+    A queryset manager for customer's deals with dealers.
+    """
+
+    # buyer in deals
+    client_field = "customer"
 
 
 class CustomerDealsHistory(DealHistory):
@@ -296,6 +644,8 @@ class CustomerDealsHistory(DealHistory):
         relation to Dealer table
     """
 
+    daily_stats_model = CustomerDealsDailyStats
+
     customer = models.ForeignKey(
         Customer, related_name="history", on_delete=models.CASCADE
     )
@@ -305,37 +655,29 @@ class CustomerDealsHistory(DealHistory):
 
     objects = CustomerDealsManager.from_queryset(CommonDealsQuerySet)()
 
+    class Meta:
+        # covering indexes for statistics of partially covered days and series
+        indexes = [
+            models.Index(
+                fields=["customer", "date"],
+                include=["dealer", "car", "amount", "price_per_one"],
+                name="customer_deals_date_idx",
+            ),
+            models.Index(
+                fields=["dealer", "date"],
+                include=["customer", "car", "amount", "price_per_one"],
+                name="dealer_customer_deals_date_idx",
+            ),
+        ]
 
-class DealerDealsManager(models.Manager):
+
+class DealerDealsManager(DealsStatsManager):
     """
     A queryset manager for dealers's deals with suppliers.
     """
 
-    def get_total_amount_of_cars(self, filter_params: dict) -> QuerySet:
-        """
-        Calculates total amount of cars in deals for specific or full period based on filter params.
-        """
-        return self.filter(**filter_params).aggregate(total_amount=Sum(F("amount")))[
-            "total_amount"
-        ]
-
-    def get_total_cost(self, filter_params: dict) -> QuerySet:
-        """
-        Calculates total cost of cars for specific or full period based on filter params.
-        """
-        return self.filter(**filter_params).total_sum()["total_sum"]
-
-    def get_amount_of_unique_clients(self, filter_params: dict) -> QuerySet:
-        """
-        Calculates unique clients in deals for specific or full period based on filter params.
-        """
-        return self.filter(**filter_params).values("dealer").count_unique()
-
-    def get_amount_of_sold_unique_cars(self, filter_params: dict) -> QuerySet:
-        """
-        Calculates unique cars in deals for specific or full period based on filter params.
-        """
-        return self.filter(**filter_params).values("car").count_unique()
+    # buyer in deals
+    client_field = "dealer"
 
 
 class DealerDealsHistory(DealHistory):
@@ -351,6 +693,8 @@ class DealerDealsHistory(DealHistory):
         relation to Supplier table
     """
 
+    daily_stats_model = DealerDealsDailyStats
+
     dealer = models.ForeignKey(Dealer, related_name="history", on_delete=models.CASCADE)
     supplier = models.ForeignKey(
         Supplier, related_name="dealer_history", on_delete=models.CASCADE
@@ -358,6 +702,21 @@ class DealerDealsHistory(DealHistory):
 
     objects = DealerDealsManager.from_queryset(CommonDealsQuerySet)()
 
+    class Meta:
+        # covering indexes for statistics of partially covered days and series
+        indexes = [
+            models.Index(
+                fields=["dealer", "date"],
+                include=["supplier", "car", "amount", "price_per_one"],
+                name="dealer_deals_date_idx",
+            ),
+            models.Index(
+                fields=["supplier", "date"],
+                include=["dealer", "car", "amount", "price_per_one"],
+                name="supplier_deals_date_idx",
+            ),
+        ]
+
 
 class TotalDealerPurchase(AmountCalculator, BaseModel):
     """
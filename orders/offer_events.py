@@ -0,0 +1,117 @@
+import asyncio
+import json
+from functools import lru_cache
+from typing import AsyncIterator, Optional, Type
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from common.renderers import format_event
+from orders.models import Offer
+
+# prefix of offers status channels
+OFFER_EVENTS_PREFIX = "offer_events"
+# offer fields sent to clients waiting for the offer
+OFFER_STATUS_FIELDS = ["id", "is_closed", "bought_car", "car_price"]
+
+
+def offer_channel(model: Type[Offer], offer_id: int) -> str:
+    return f"{OFFER_EVENTS_PREFIX}:{model._meta.label_lower}:{offer_id}"
+
+
+def offer_status(offer: Offer) -> dict:
+    """
+    Function to get status of the offer as it's sent to clients.
+    """
+    return {
+        "id": offer.pk,
+        "is_closed": offer.is_closed,
+        "bought_car": offer.bought_car_id,
+        "car_price": offer.car_price,
+    }
+
+
+@lru_cache(maxsize=None)
+def _redis_client(url: str) -> redis.Redis:
+    return redis.Redis.from_url(url)
+
+
+def publish_offer_status(offer: Offer):
+    """
+    Function to publish status of handled offer to clients waiting for it.
+    Nothing is published if OFFER_EVENTS_REDIS_URL isn't set.
+    """
+    if not settings.OFFER_EVENTS_REDIS_URL:
+        return
+    try:
+        _redis_client(settings.OFFER_EVENTS_REDIS_URL).publish(
+            offer_channel(type(offer), offer.pk), json.dumps(offer_status(offer))
+        )
+    except redis.RedisError:
+        # the deal is already completed, waiting clients get status by timeout
+        pass
+
+
+async def _stored_status(model: Type[Offer], offer_id: int) -> Optional[dict]:
+    return await model.objects.filter(pk=offer_id).values(*OFFER_STATUS_FIELDS).afirst()
+
+
+async def offer_status_events(model: Type[Offer], offer_id: int) -> AsyncIterator[str]:
+    """
+    Function to stream status events of the offer until it's closed.
+
+    Channel of the offer is subscribed before the stored status is read,
+    so status published in between isn't lost.
+    Then the client waits for messages published by offer tasks without database reads.
+    Stream is finished by closed offer or OFFER_EVENTS_TIMEOUT,
+    heartbeat comments are sent every OFFER_EVENTS_HEARTBEAT seconds.
+    Only stored status is sent if OFFER_EVENTS_REDIS_URL isn't set.
+    """
+    if not settings.OFFER_EVENTS_REDIS_URL:
+        status = await _stored_status(model, offer_id)
+        if status:
+            yield format_event(status)
+        return
+
+    client = aioredis.Redis.from_url(settings.OFFER_EVENTS_REDIS_URL)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(offer_channel(model, offer_id))
+        status = await _stored_status(model, offer_id)
+        if not status:
+            return
+        yield format_event(status)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.OFFER_EVENTS_TIMEOUT
+        while not status["is_closed"]:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                yield format_event(status, event="timeout")
+                return
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=min(remaining, settings.OFFER_EVENTS_HEARTBEAT),
+            )
+            if message is None:
+                yield ": heartbeat\n\n"
+                continue
+            status = json.loads(message["data"])
+            yield format_event(status)
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+def offer_events_response(model: Type[Offer], offer_id: int) -> StreamingHttpResponse:
+    """
+    Function to create server-sent events response with status of the offer.
+    Stream is served without blocking a worker only by ASGI server.
+    """
+    return StreamingHttpResponse(
+        offer_status_events(model, offer_id),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -8,8 +8,12 @@ from marketing.models import (
     Discount,
     MarketingCampaign,
 )
+from orders.market import MarketSnapshot
 from orders.models import CustomerOffer, DealerOffer, Offer
+from orders.offer_profiling import OfferTrace, stage, traced
+from orders.pricing import CAMPAIGN_PRICE, DISCOUNT_PRICE, select_best_price
 from abc import ABC, abstractmethod
+from typing import Iterable, Optional, Union
 
 from suppliers.models import Supplier
 
@@ -28,6 +32,8 @@ class BaseOfferHandler(ABC):
         contains main info about buyer offer
     sellers : list[Company]
         queryset with all sellers on market
+    snapshot : MarketSnapshot
+        indexed sellers market. Built from sellers if it isn't passed
 
     purchase_car : Car
         suggested car for purchase
@@ -41,6 +47,8 @@ class BaseOfferHandler(ABC):
         discount in case suggested car have the best price with specific discunt
     purchase_stock_item : CarStockItem
         suggested dealer's stock item
+    trace : OfferTrace
+        stages of processed offer if OFFER_PROFILING_ENABLED (see orders.offer_profiling)
 
     sellers_data : dict
         Dictionary to handle data in different stages step by step.
@@ -56,9 +64,12 @@ class BaseOfferHandler(ABC):
             }
     """
 
+    trace: Optional[OfferTrace] = None
+
     def __init__(self):
         self.offer: Offer = None
         self.sellers: list[Company] = [None]
+        self.snapshot: MarketSnapshot = None
         self.sellers_data = {}
 
         self.purchase_car: Car = None
@@ -75,50 +86,49 @@ class BaseOfferHandler(ABC):
         """
         pass
 
+    @stage
     def _sellers_with_suitable_car_on_stock(self):
         """
         Function to exclude dealers with no suitable cars.
 
-        Iterating by sellers stock items and checking whether it equal with car in offer.
-        Also checking whether stock item price fits with max price in offer.
+        Looking up sellers' stock items with car in offer in market snapshot.
         Adding collected data to self.sellers_data for future handling.
         """
         sellers = []
-        for seller in self.sellers:
-            stock_items = []
-            for stock_item in seller.stock.all():
-                if stock_item.amount and self.offer.car == stock_item.car:
-                    stock_items.append(stock_item)
-
-            if stock_items:
-                self.sellers_data[seller.pk] = {
-                    "object": seller,
-                    "suitable_stock": stock_items,
-                }
-                sellers.append(seller)
+        stock = self.snapshot.stock_for_car(self.offer.car_id)
+        for seller_id, stock_items in stock.items():
+            seller = self.snapshot.sellers[seller_id]
+            self.sellers_data[seller_id] = {
+                "object": seller,
+                "suitable_stock": stock_items,
+            }
+            sellers.append(seller)
 
         self.sellers = sellers
 
+    @stage
     def _sellers_suitable_stock_items_by_characteristics(self):
         """
         Function to exclude dealers with no suitable car characteristics.
 
-        Iterating by sellers car characteristics and checking whether it  equal with characteristic in offer.
+        Looking up sellers' stock items with cars fitting characteristic in offer
+        in market snapshot's characteristic index.
+        Updates seller list only with dealers having suitable stock items.
         """
+        sellers = []
+        stock = self.snapshot.stock_for_characteristic(self.offer.characteristic)
         for seller in self.sellers:
-            stock_items = []
-            for stock_item in seller.stock.all():
-                if stock_item.amount and stock_item.is_fit_characteristic(
-                    self.offer.characteristic
-                ):
-                    stock_items.append(stock_item)
-
+            stock_items = stock.get(seller.pk)
             if stock_items:
                 self.sellers_data[seller.pk] = {
                     "object": seller,
                     "suitable_stock": stock_items,
                 }
+                sellers.append(seller)
 
+        self.sellers = sellers
+
+    @stage
     def _seller_best_stock_item(self):
         """
         Function to select the best stock item suitable for offer based on price.
@@ -152,59 +162,40 @@ class BaseOfferHandler(ABC):
         Function to analyze and select the best sellers marketing campaigns.
         """
 
+    @stage
     def _select_best_offer(self):
         """
         Function to select the best sellers offer.
         Handles data in self.sellers_data.
-        For every best stock item for each seller and select the best suggestion with its discounts
-        or marketing campaigns if they exists. Or just add price of stock item if no events exists.
-        """
-        for dealer_data in self.sellers_data.values():
-            stock_item = dealer_data["best_stock_item"]
-            price = stock_item.price_per_one
-
-            # Set best price for comparing with discounts price
-            best_price = self.purchase_price if self.purchase_price else price
-
-            best_marketing_campaign = dealer_data.get("best_marketing_campaign")
-            best_discount = dealer_data.get("best_discount")
-
-            # For existing campaigns calculating the price with discounts
-            # and set it in offer if price is more profitable.
-            if best_marketing_campaign:
-                price_with_discount = best_marketing_campaign.count_price_with_discount(
-                    price
-                )
-                if price_with_discount < best_price:
-                    self._change_best_offer(
-                        stock_item,
-                        price_with_discount,
-                        dealer_data["object"],
-                        marketing_campaign=best_marketing_campaign,
-                    )
-                    best_price = price_with_discount
-
-            # For existing discounts calculating the price with discounts
-            # and set it in offer if price is more profitable.
-            if best_discount:
-                price_with_discount = best_discount.count_price_with_discount(price)
-                if price_with_discount < best_price:
-                    self._change_best_offer(
-                        stock_item,
-                        price_with_discount,
-                        dealer_data["object"],
-                        discount=best_discount,
-                    )
-                    best_price = price_with_discount
-
-            # Change offer if we hadn't set best price before or
-            # current stock itemprice more profitable than saved.
-            if not self.purchase_price or (
-                self.purchase_price and stock_item.price_per_one < self.purchase_price
-            ):
-                self._change_best_offer(
-                    stock_item, stock_item.price_per_one, dealer_data["object"]
-                )
+        Prices of best stock items with marketing campaigns and discounts of all sellers
+        are evaluated at once (orders.pricing.select_best_price), then the best suggestion
+        with its discount or marketing campaign if they exists is set in offer.
+        """
+        sellers_data = [
+            dealer_data
+            for dealer_data in self.sellers_data.values()
+            if dealer_data.get("best_stock_item")
+        ]
+        if not sellers_data:
+            return
+
+        campaigns = [data.get("best_marketing_campaign") for data in sellers_data]
+        discounts = [data.get("best_discount") for data in sellers_data]
+        index, price, price_kind = select_best_price(
+            [data["best_stock_item"].price_per_one for data in sellers_data],
+            [campaign.percentage if campaign else 0 for campaign in campaigns],
+            [discount.percentage if discount else 0 for discount in discounts],
+        )
+
+        self._change_best_offer(
+            sellers_data[index]["best_stock_item"],
+            price,
+            sellers_data[index]["object"],
+            discount=discounts[index] if price_kind == DISCOUNT_PRICE else None,
+            marketing_campaign=(
+                campaigns[index] if price_kind == CAMPAIGN_PRICE else None
+            ),
+        )
 
     def _change_best_offer(
         self, stock_item, price, dealer, discount=None, marketing_campaign=None
@@ -219,6 +210,7 @@ class BaseOfferHandler(ABC):
         self.purchase_discount = discount
         self.purchase_stock_item = stock_item
 
+    @stage
     def _check_max_price(self):
         """
         Checks wether max price is less or equal than best offer.
@@ -246,9 +238,15 @@ class CustomersOfferHandler(BaseOfferHandler):
 
     """
 
-    def __init__(self, offer: CustomerOffer, dealers: list[Dealer]):
+    def __init__(
+        self,
+        offer: CustomerOffer,
+        dealers: list[Dealer] = None,
+        snapshot: MarketSnapshot = None,
+    ):
         self.offer: CustomerOffer = offer
-        self.sellers: list[Dealer] = dealers
+        self.snapshot: MarketSnapshot = snapshot or MarketSnapshot(dealers)
+        self.sellers: list[Dealer] = list(self.snapshot.sellers.values())
 
         self.sellers_data = {}
 
@@ -259,6 +257,7 @@ class CustomersOfferHandler(BaseOfferHandler):
         self.purchase_discount: DealerDiscount = None
         self.purchase_stock_item: DealerStockItem = None
 
+    @traced
     def process_offer(self):
         """
         Handle offer from start to the end
@@ -278,20 +277,21 @@ class CustomersOfferHandler(BaseOfferHandler):
             self._select_best_offer()
             self._check_max_price()
 
+    @stage
     def _sellers_with_suitable_characteristics(self):
         """
         Function to exclude dealers with no suitable characteristics.
-        Checking every dealer whether their car characteristics on sale fits to offer car characteristic.
+        Looking up dealers whose car characteristics on sale fit to offer car characteristic
+        in market snapshot's characteristic index.
         Updates seller list only with suitable dealers.
         """
-        dealers = []
-        for dealer in self.sellers:
-            for characteristic in dealer.car_characteristics.all():
-                if self.offer.characteristic.is_suitable(characteristic):
-                    dealers.append(dealer)
-                    break
+        dealer_ids = self.snapshot.characteristic_index.dealers_for(
+            self.offer.characteristic
+        )
+        dealers = [dealer for dealer in self.sellers if dealer.pk in dealer_ids]
         self.sellers = dealers
 
+    @stage
     def _seller_suitable_discounts(self):
         """
         Function to analyze and select the best sellers discounts.
@@ -301,7 +301,7 @@ class CustomersOfferHandler(BaseOfferHandler):
         # with dealer pk as a key
         customer_total_purchases_dict = {}
         for purchase in self.offer.customer.total_purchases.all():
-            customer_total_purchases_dict[purchase.dealer.pk] = purchase.amount
+            customer_total_purchases_dict[purchase.dealer_id] = purchase.amount
 
         if customer_total_purchases_dict:
             # handles self.sellers_data. Add best discount for every seller.
@@ -309,78 +309,34 @@ class CustomersOfferHandler(BaseOfferHandler):
                 total_purchases = customer_total_purchases_dict.get(dealer.pk, 0)
 
                 if total_purchases:
-                    # flags to define the best discount among every seller.
-                    best_discount_percentage = None
-                    best_discount = None
-
-                    # calculate best percentage for every dealer's discounts
-                    for discount in dealer.discounts.all():
-                        percentage = discount.get_discount_percentage(
-                            total_purchases=total_purchases
-                        )
-                        # saved new discount and its percentage if current percentage not 0 and
-                        # we haven't collect best_discount before of current percentage bigger than saved
-                        if percentage and (
-                            not best_discount_percentage
-                            or percentage > best_discount_percentage
-                        ):
-                            best_discount_percentage = percentage
-                            best_discount = discount
-
+                    best_discount = self.snapshot.best_discount(
+                        dealer.pk, total_purchases=total_purchases
+                    )
                     if best_discount:
                         self.sellers_data[dealer.pk]["best_discount"] = best_discount
                         self.sellers_data[dealer.pk][
                             "best_discount_percentage"
-                        ] = best_discount_percentage
+                        ] = best_discount.percentage
 
+    @stage
     def _seller_suitable_marketing_campaigns(self):
         """
         Function to analyze and select the best sellers marketing campaigns.
 
-        Checking cars in every marketing campaign for each seller
-        and select collect campaigns if they fits with cars by cars of by cars characteristics.
+        Looking up the best campaign for each seller in market snapshot
+        by car in offer or by cars fitting with car characteristic in offer.
         """
         for dealer in self.sellers:
-            # set flags to define the best campaign among every seller
-            best_marketing_campaign = None
-            marketing_campaigns_percentage = None
-
-            marketing_campaigns = dealer.marketing_campaigns.all()
-            for campaign in marketing_campaigns:
-                if campaign.percentage != 0:
-                    cars = campaign.cars.all()
-
-                    # if campaign have cars and it fits with our car in offer
-                    if cars and self.offer.car and self.offer.car in cars:
-                        if (
-                            best_marketing_campaign
-                            and campaign.percentage > marketing_campaigns_percentage
-                        ):
-                            best_marketing_campaign = campaign
-                            marketing_campaigns_percentage = campaign.percentage
-                        elif not best_marketing_campaign:
-                            best_marketing_campaign = campaign
-                            marketing_campaigns_percentage = campaign.percentage
-
-                    # if campaign have cars and it fits with our car characteristics in offer
-                    elif cars and self.offer.characteristic:
-                        # cheching whether one of the car in campaigns fits with characteristic in offer
-                        campaigng_fits_with_car = False
-                        for car in cars:
-                            if car.is_fit_characteristic(self.offer.characteristic):
-                                campaigng_fits_with_car = True
-                                break
-
-                        if campaigng_fits_with_car:
-                            if (
-                                best_marketing_campaign
-                                and campaign.percentage > marketing_campaigns_percentage
-                            ):
-                                best_marketing_campaign = campaign
-                                marketing_campaigns_percentage = campaign.percentage
-                            elif not best_marketing_campaign:
-                                best_marketing_campaign = campaign
-                                marketing_campaigns_percentage = campaign.percentage
+            if self.offer.car_id:
+                best_marketing_campaign = self.snapshot.best_campaign(
+                    dealer.pk, self.offer.car_id
+                )
+            elif self.offer.characteristic:
+                best_marketing_campaign = self.snapshot.best_campaign_by_characteristic(
+                    dealer.pk, self.offer.characteristic
+                )
+            else:
+                best_marketing_campaign = None
 
             if best_marketing_campaign:
                 self.sellers_data[dealer.pk][
@@ -388,7 +344,7 @@ class CustomersOfferHandler(BaseOfferHandler):
                 ] = best_marketing_campaign
                 self.sellers_data[dealer.pk][
                     "marketing_campaign_percentage"
-                ] = marketing_campaigns_percentage
+                ] = best_marketing_campaign.percentage
 
 
 class DealerOfferHandler(BaseOfferHandler):
@@ -413,9 +369,15 @@ class DealerOfferHandler(BaseOfferHandler):
         calculated weight for cooperation on current conditions
     """
 
-    def __init__(self, offer: DealerOffer, suppliers: list[Supplier]):
+    def __init__(
+        self,
+        offer: DealerOffer,
+        suppliers: list[Supplier] = None,
+        snapshot: MarketSnapshot = None,
+    ):
         self.offer = offer
-        self.sellers = suppliers
+        self.snapshot = snapshot or MarketSnapshot(suppliers)
+        self.sellers = list(self.snapshot.sellers.values())
         self.sellers_data = {}
 
         self.purchase_car = None
@@ -429,6 +391,7 @@ class DealerOfferHandler(BaseOfferHandler):
         self.forecast_cooperation_with_supplier = None
         self.forecast_weight = None
 
+    @traced
     def process_offer(self):
         """
         Handle offer from start to the end
@@ -444,6 +407,7 @@ class DealerOfferHandler(BaseOfferHandler):
             self._analyze_perspective_cooperation()
             self._check_max_price()
 
+    @stage
     def _seller_suitable_discounts(self):
         """
         Function to analyze and select the best sellers discounts.
@@ -457,78 +421,43 @@ class DealerOfferHandler(BaseOfferHandler):
         # with supplier pk as a key
         buyer_total_purchases_dict = {}
         for purchase in self.offer.dealer.orders_history.all():
-            buyer_total_purchases_dict[purchase.supplier.pk] = purchase.amount
+            buyer_total_purchases_dict[purchase.supplier_id] = purchase.amount
 
         if buyer_total_purchases_dict:
             for seller in self.sellers:
                 total_purchases = buyer_total_purchases_dict.get(seller.pk, 0)
-                # flags to define the best discount among every supplier.
-                best_discount_percentage = None
-                best_discount = None
-
-                for discount in seller.discounts.all():
-                    # calculate percentage based on discount type
-                    if discount.discount_type == "BD":
-                        percentage = discount.get_discount_percentage(
-                            current_purchase_amount=self.offer.amount
-                        )
-                    elif discount.discount_type == "CD" and total_purchases:
-                        percentage = discount.get_discount_percentage(
-                            total_purchases=total_purchases
-                        )
-                    else:
-                        percentage = 0
-
-                    if percentage and not best_discount_percentage:
-                        best_discount_percentage = percentage
-                        best_discount = discount
-                    elif percentage and percentage > best_discount_percentage:
-                        best_discount_percentage = percentage
-                        best_discount = discount
+                best_discount = self.snapshot.best_discount(
+                    seller.pk,
+                    total_purchases=total_purchases,
+                    current_purchase_amount=self.offer.amount,
+                )
 
                 if best_discount:
                     self.sellers_data[seller.pk]["best_discount"] = best_discount
                     self.sellers_data[seller.pk][
                         "best_discount_percentage"
-                    ] = best_discount_percentage
+                    ] = best_discount.percentage
 
+    @stage
     def _seller_suitable_marketing_campaigns(self):
         """
         Function to analyze and select the best sellers marketing campaigns.
 
-        Checking cars in every marketing campaign for each seller
-        and select collect campaigns if they fits with cars.
+        Looking up the best campaign for car in offer for each seller in market snapshot.
         """
-        for dealer in self.sellers:
-            # set flags to define the best campaign among each seller
-            best_marketing_campaign = None
-            marketing_campaigns_percentage = None
-
-            marketing_campaigns = dealer.marketing_campaigns.all()
-            # compare car with car in campaign for every supplier's marketing campaigns
-            # if cars participate in campaign and percentage isn't 0
-            for campaign in marketing_campaigns:
-                if campaign.percentage != 0:
-                    cars = campaign.cars.all()
-                    if cars and self.offer.car and self.offer.car in cars:
-                        if (
-                            best_marketing_campaign
-                            and campaign.percentage > marketing_campaigns_percentage
-                        ):
-                            best_marketing_campaign = campaign
-                            marketing_campaigns_percentage = campaign.percentage
-                        elif not best_marketing_campaign:
-                            best_marketing_campaign = campaign
-                            marketing_campaigns_percentage = campaign.percentage
-
+        for seller in self.sellers:
+            best_marketing_campaign = self.snapshot.best_campaign(
+                seller.pk, self.offer.car_id
+            )
             if best_marketing_campaign:
-                self.sellers_data[dealer.pk][
+                self.sellers_data[seller.pk][
                     "best_marketing_campaign"
                 ] = best_marketing_campaign
-                self.sellers_data[dealer.pk][
+                self.sellers_data[seller.pk][
                     "marketing_campaign_percentage"
-                ] = marketing_campaigns_percentage
+                ] = best_marketing_campaign.percentage
 
+    @stage
     def _analyze_perspective_cooperation(self):
         """
         Function to analyze perspective cooperation with supplier.
@@ -538,7 +467,7 @@ class DealerOfferHandler(BaseOfferHandler):
         # with supplier pk as a key
         seller_total_purchases_dict = {}
         for purchase in self.offer.dealer.orders_history.all():
-            seller_total_purchases_dict[purchase.supplier.pk] = purchase.amount
+            seller_total_purchases_dict[purchase.supplier_id] = purchase.amount
 
         if seller_total_purchases_dict:
             for seller in self.sellers:
@@ -571,3 +500,28 @@ class DealerOfferHandler(BaseOfferHandler):
                             self.forecast_cooperation_with_supplier = seller
                             self.forecast_weight = weight
                             break
+
+
+def process_offers(
+    offers: Iterable[Offer], sellers: Union[Iterable[Company], MarketSnapshot]
+) -> list[BaseOfferHandler]:
+    """
+    Function to process batch of offers against one shared sellers market.
+
+    Seller-side data (stock items by car, best campaigns, discount tiers) is indexed once
+    in MarketSnapshot and every offer is resolved against it.
+    Returns processed offer handlers in the same order as offers.
+    """
+    snapshot = (
+        sellers if isinstance(sellers, MarketSnapshot) else MarketSnapshot(sellers)
+    )
+
+    handlers = []
+    for offer in offers:
+        if isinstance(offer, DealerOffer):
+            offer_handler = DealerOfferHandler(offer, snapshot=snapshot)
+        else:
+            offer_handler = CustomersOfferHandler(offer, snapshot=snapshot)
+        offer_handler.process_offer()
+        handlers.append(offer_handler)
+    return handlers
@@ -0,0 +1,118 @@
+import logging
+import time
+from functools import wraps
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+
+from common.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# metrics of offer handler stages aggregated across tasks
+STAGE_SECONDS = "offer_stage_seconds"
+STAGE_SELLERS_IN = "offer_stage_sellers_in_total"
+STAGE_SELLERS_OUT = "offer_stage_sellers_out_total"
+STAGE_STOCK_ITEMS = "offer_stage_stock_items_total"
+
+# (stage, seconds, sellers in, sellers out, stock items)
+StageType = Tuple[str, float, int, int, int]
+
+
+class OfferTrace:
+    """
+    Stages of one processed offer.
+
+    Attributes
+    ----------
+    handler : str
+        name of offer handler class
+    stages : list[StageType]
+        wall time, amount of sellers before and after stage
+        and amount of sellers' suitable stock items after every stage
+    """
+
+    def __init__(self, handler: str):
+        self.handler = handler
+        self.stages: List[StageType] = []
+
+    def compact(self) -> list:
+        """
+        Function to get trace as list of [stage, microseconds, sellers in, sellers out, stock items].
+        """
+        return [
+            [stage, round(seconds * 1_000_000), sellers_in, sellers_out, stock_items]
+            for stage, seconds, sellers_in, sellers_out, stock_items in self.stages
+        ]
+
+    def record(self):
+        """
+        Function to add stages to metrics aggregated across offers.
+        """
+        for stage, seconds, sellers_in, sellers_out, stock_items in self.stages:
+            labels = (("handler", self.handler), ("stage", stage))
+            metrics.observe(STAGE_SECONDS, labels, seconds)
+            metrics.increment(STAGE_SELLERS_IN, labels, sellers_in)
+            metrics.increment(STAGE_SELLERS_OUT, labels, sellers_out)
+            metrics.increment(STAGE_STOCK_ITEMS, labels, stock_items)
+
+
+def _stock_items(handler) -> int:
+    return sum(len(data["suitable_stock"]) for data in handler.sellers_data.values())
+
+
+def stage(method):
+    """
+    Decorator of offer handler stage measured if offer processing is traced.
+    Untraced stages cost one attribute check.
+    """
+    name = method.__name__.lstrip("_")
+
+    @wraps(method)
+    def wrapper(handler, *args, **kwargs):
+        trace: Optional[OfferTrace] = handler.trace
+        if trace is None:
+            return method(handler, *args, **kwargs)
+
+        sellers_in = len(handler.sellers)
+        start = time.perf_counter()
+        result = method(handler, *args, **kwargs)
+        trace.stages.append(
+            (
+                name,
+                time.perf_counter() - start,
+                sellers_in,
+                len(handler.sellers),
+                _stock_items(handler),
+            )
+        )
+        return result
+
+    return wrapper
+
+
+def traced(process_offer):
+    """
+    Decorator of offer handler's process_offer tracing its stages if OFFER_PROFILING_ENABLED.
+    Compact trace is attached to the offer as 'handling_trace' and stages are added to metrics.
+    """
+
+    @wraps(process_offer)
+    def wrapper(handler, *args, **kwargs):
+        if not settings.OFFER_PROFILING_ENABLED:
+            return process_offer(handler, *args, **kwargs)
+
+        handler.trace = OfferTrace(type(handler).__name__)
+        try:
+            return process_offer(handler, *args, **kwargs)
+        finally:
+            handler.trace.record()
+            handler.offer.handling_trace = handler.trace.compact()
+            logger.debug(
+                "%s of offer %s: %s",
+                handler.trace.handler,
+                handler.offer.pk,
+                handler.offer.handling_trace,
+            )
+
+    return wrapper
@@ -0,0 +1,77 @@
+import logging
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Type
+
+from celery import Task
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from orders.models import Offer
+
+logger = logging.getLogger(__name__)
+
+# prefix of all offer queue cache keys
+OFFER_QUEUE_PREFIX = "offer_queue"
+# cache backends not shared between web and celery worker processes
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def _offer_key(model: Type[Offer], offer_id: int, kind: str) -> str:
+    return f"{OFFER_QUEUE_PREFIX}:{model._meta.label_lower}:{offer_id}:{kind}"
+
+
+@lru_cache(maxsize=None)
+def warn_process_local_cache() -> bool:
+    """
+    Function to warn once per process that queue marks and locks of offers
+    are kept in process-local cache (CACHE_REDIS_URL isn't set).
+    Then duplicated enqueues are coalesced and offers are locked only within one process,
+    tasks of the same offer on different workers are stopped only by closing the offer
+    in deal transaction.
+    Returns whether the cache is process-local.
+    """
+    process_local = isinstance(caches["default"], PROCESS_LOCAL_CACHES)
+    if process_local:
+        logger.warning(
+            "Offer queue marks and locks are process-local, "
+            "set CACHE_REDIS_URL to share them between workers."
+        )
+    return process_local
+
+
+def enqueue_offer(task: Task, offer: Offer) -> bool:
+    """
+    Function to enqueue task handling the offer unless it's already waiting in queue.
+    Duplicated enqueues of the same offer are coalesced into one task.
+    Returns whether the task was enqueued.
+    """
+    warn_process_local_cache()
+    queued_key = _offer_key(type(offer), offer.pk, "queued")
+    if not cache.add(queued_key, 1, timeout=settings.OFFER_QUEUE_TIMEOUT):
+        return False
+    try:
+        task.delay(offer.pk)
+    except Exception:
+        cache.delete(queued_key)
+        raise
+    return True
+
+
+@contextmanager
+def offer_lock(model: Type[Offer], offer_id: int) -> Iterator[bool]:
+    """
+    Context manager to handle the offer by one worker at once.
+    Yields whether the lock is acquired, only the owner of the lock handles the offer.
+    Offer can be enqueued again after the owner has finished handling it.
+    """
+    warn_process_local_cache()
+    lock_key = _offer_key(model, offer_id, "lock")
+    acquired = cache.add(lock_key, 1, timeout=settings.OFFER_LOCK_TIMEOUT)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete_many([lock_key, _offer_key(model, offer_id, "queued")])
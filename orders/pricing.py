@@ -0,0 +1,82 @@
+from decimal import Decimal
+from typing import Iterable, Tuple
+
+import numpy as np
+
+# price kinds returned by select_best_price
+PLAIN_PRICE = 0
+CAMPAIGN_PRICE = 1
+DISCOUNT_PRICE = 2
+
+# percentages are stored with 2 decimal places, so they are packed as basis points
+BASIS_POINTS = 10_000
+# prices bigger than it may overflow int64 during calculation with basis points
+MAX_VECTORIZED_PRICE = np.iinfo(np.int64).max // BASIS_POINTS
+
+
+def percentages_to_basis_points(percentages: Iterable) -> np.ndarray:
+    """
+    Function to pack discount percentages (Decimal with 2 decimal places) into int array of basis points.
+    Empty percentages (no discount) are packed as 0.
+    """
+    return np.array(
+        [int(Decimal(str(percentage or 0)) * 100) for percentage in percentages],
+        dtype=np.int64,
+    )
+
+
+def prices_with_discount(prices: np.ndarray, basis_points: np.ndarray) -> np.ndarray:
+    """
+    Function for calculating prices based on discount percentages for all items at once.
+
+    Same as DiscountCounter.count_price_with_discount,
+    ceil(price * (100 - percentage) / 100) is calculated in integer arithmetic.
+    """
+    return -((-prices * (BASIS_POINTS - basis_points)) // BASIS_POINTS)
+
+
+def select_best_price(
+    prices: Iterable[int],
+    campaign_percentages: Iterable,
+    discount_percentages: Iterable,
+) -> Tuple[int, int, int]:
+    """
+    Function to select the best price among sellers.
+
+    Calculates effective price for every seller in one pass:
+    marketing campaign or discount is applied only if it makes the price lower,
+    campaign is preferred over discount with the same price.
+    Returns index of the seller with the lowest effective price (the first one among equal prices),
+    its effective price and the kind of price (PLAIN_PRICE, CAMPAIGN_PRICE or DISCOUNT_PRICE).
+    """
+    prices = np.array(list(prices), dtype=np.int64)
+    if prices.size and prices.max() > MAX_VECTORIZED_PRICE:
+        # fallback to python integers to prevent overflow
+        prices = prices.astype(object)
+
+    campaign_prices = prices_with_discount(
+        prices, percentages_to_basis_points(campaign_percentages)
+    )
+    discount_prices = prices_with_discount(
+        prices, percentages_to_basis_points(discount_percentages)
+    )
+
+    # discount competes with campaign price only if campaign is applied
+    campaign_applied = campaign_prices < prices
+    discount_applied = discount_prices < np.where(
+        campaign_applied, campaign_prices, prices
+    )
+
+    effective_prices = np.where(
+        discount_applied,
+        discount_prices,
+        np.where(campaign_applied, campaign_prices, prices),
+    )
+    price_kinds = np.where(
+        discount_applied,
+        DISCOUNT_PRICE,
+        np.where(campaign_applied, CAMPAIGN_PRICE, PLAIN_PRICE),
+    )
+
+    index = int(np.argmin(effective_prices))
+    return index, int(effective_prices[index]), int(price_kinds[index])
@@ -1,74 +1,110 @@
-from typing import List, Dict, Union
-from django.db import transaction
+from collections import defaultdict
+from random import randint
+from typing import List, Dict, Optional, Tuple, Union
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import Case, F, Max, Min, Value, When
 from django.conf import settings
+from django.utils import timezone
 
 from orders.models import (
     CustomerDealsHistory,
     CustomerOffer,
+    DealerDealsDailyStats,
     DealerDealsHistory,
     DealerOffer,
+    Offer,
+    TotalSupplierPurchase,
 )
-from orders.offer_handler import CustomersOfferHandler, DealerOfferHandler
+from orders.offer_handler import (
+    CustomersOfferHandler,
+    DealerOfferHandler,
+    process_offers,
+)
+from orders.forecasting import (
+    StockItemType,
+    dealer_cars_sales,
+    forecast_stock_purchases,
+)
+from orders.market import MarketSnapshot, load_supplier_market
+from orders.sql_matcher import CustomersOfferSQLMatcher
 from dealers.models import Dealer, DealerStockItem
 from cars.models import Car, CarStockItem
-from suppliers.models import Supplier
+from suppliers.models import Supplier, SupplierStockItem
 from customers.models import Customer
 from common.models import Company
-from orders.utils import (
-    check_average_day_sellings,
-    count_item_per_purchase,
-    forecast_sellings,
-    sort_stock_data,
-)
+from orders.utils import sort_stock_data
+
+# (customer pk, car pk, max price)
+RandomCarOrderType = Tuple[int, int, int]
+# dealer's purchase decision: seller, car, price, stock_item, amount
+# and optional partial - whether a smaller amount may be bought on insufficient balance
+PurchaseType = Dict[str, Union[Supplier, Car, int, SupplierStockItem, bool]]
 
-StockItemType = Dict[str, Union[DealerStockItem, int, int]]
+# Results of deal transaction
+DEAL_COMPLETED = "completed"
+DEAL_OUT_OF_STOCK = "out_of_stock"
+DEAL_INSUFFICIENT_BALANCE = "insufficient_balance"
+DEAL_OFFER_CLOSED = "offer_closed"
+# Attempts to complete deal transaction in case of deadlock or conflicting inserts
+DEAL_TRANSACTION_ATTEMPTS = 3
 
 
-def dealer_regular_purchase_handler(dealer: Dealer, suppliers: List[Supplier]):
+class DealRejected(Exception):
+    """
+    Exception to rollback deal transaction which can't be completed.
+
+    Attributes
+    ----------
+    result : str
+        reason of rejection (DEAL_OUT_OF_STOCK, DEAL_INSUFFICIENT_BALANCE or DEAL_OFFER_CLOSED)
+    """
+
+    def __init__(self, result: str):
+        super().__init__(result)
+        self.result = result
+
+
+def dealer_regular_purchase_handler(
+    dealer: Dealer, suppliers: Union[List[Supplier], MarketSnapshot]
+):
     """
     Function to handle cars purchase on dealer's stock.
 
     Checks deals history for every stock item and calculate amount of cars to buy.
-    Then it searchs for best suppliers' offers and completes it.
+    Then it searchs for best suppliers' offers and settles all purchases in one transaction.
+    Balance is checked by the settlement against locked dealer's row,
+    so balance of purchases rejected as out of stock is spent on the next ones.
     """
     stock_data: List[StockItemType] = prepare_stock_data(dealer)
     stock_data = sort_stock_data(stock_data, "total")
-    for item in stock_data:
-        offer = DealerOffer(
+    offers = [
+        DealerOffer(
             dealer=dealer, car=item["stock_item"].car, amount=item["amount_to_buy"]
         )
-        offer_handler = DealerOfferHandler(offer, suppliers)
-        offer_handler.process_offer()
+        for item in stock_data
+    ]
 
+    purchases: List[PurchaseType] = []
+    for item, offer_handler in zip(stock_data, process_offers(offers, suppliers)):
         if not offer_handler.purchase_seller:
             continue
-        if dealer.balance >= offer_handler.purchase_price * item["amount_to_buy"]:
-            complete_deal_transaction(
-                buyer=dealer,
-                seller=offer_handler.purchase_seller,
-                car=offer_handler.purchase_car,
-                price=offer_handler.purchase_price,
-                stock_item=offer_handler.purchase_stock_item,
-                amount=item["amount_to_buy"],
-            )
-        elif (
-            offer_handler.purchase_discount
-            and offer_handler.purchase_discount.discount_type != "BD"
-        ):
-            amount = dealer.balance // offer_handler.purchase_price
-            if amount > 0:
-                complete_deal_transaction(
-                    buyer=dealer,
-                    seller=offer_handler.purchase_seller,
-                    car=offer_handler.purchase_car,
-                    price=offer_handler.purchase_price,
-                    stock_item=offer_handler.purchase_stock_item,
-                    amount=amount,
-                )
-                continue
-            break
-        else:
-            break
+        purchases.append(
+            {
+                "seller": offer_handler.purchase_seller,
+                "car": offer_handler.purchase_car,
+                "price": offer_handler.purchase_price,
+                "stock_item": offer_handler.purchase_stock_item,
+                "amount": item["amount_to_buy"],
+                # price of bulk discount depends on amount
+                "partial": bool(
+                    offer_handler.purchase_discount
+                    and offer_handler.purchase_discount.discount_type != "BD"
+                ),
+            }
+        )
+
+    if purchases:
+        settle_dealer_purchases(dealer, purchases)
 
 
 def prepare_stock_data(dealer) -> List[StockItemType]:
@@ -77,26 +113,25 @@ def prepare_stock_data(dealer) -> List[StockItemType]:
 
     Returns list of dicts. Every dict in list represents necessary data for each stock item.
     Constist of stock item, amount to buy on stock and total amount of sellings of specific car for last three months.
+    Sales of all cars are loaded by one grouped query and forecasted at once.
     """
-    stock_data = []
-    for stock_item in dealer.stock.all():
-        total, average = check_average_day_sellings(
-            stock_item, dealer.three_month_history
-        )
-        days = forecast_sellings(stock_item, average)
-        if days < settings.SELL_OUT_DAYS:
-            amount_to_buy = count_item_per_purchase(average, days)
-            if amount_to_buy == 0:
-                continue
-
-            stock_data.append(
-                {
-                    "stock_item": stock_item,
-                    "amount_to_buy": amount_to_buy,
-                    "total": total,
-                }
-            )
-    return stock_data
+    return forecast_stock_purchases(list(dealer.stock.all()), dealer_cars_sales(dealer))
+
+
+def _change_counter(instance, field: str, value: int, **conditions) -> bool:
+    """
+    Function to change numeric field of instance in database with F() expression.
+
+    Only the field and updated_at are written, conditions are checked in the same UPDATE,
+    so concurrent transactions can't lose updates or make the value invalid.
+    Returns False if the row doesn't fit conditions.
+    """
+    updated = (
+        type(instance)
+        ._base_manager.filter(pk=instance.pk, **conditions)
+        .update(**{field: F(field) + value, "updated_at": timezone.now()})
+    )
+    return bool(updated)
 
 
 def complete_deal_transaction(
@@ -106,100 +141,353 @@ def complete_deal_transaction(
     price: int,
     stock_item: CarStockItem,
     amount: int = 1,
-):
+    offer: Optional[Offer] = None,
+) -> str:
     """
     Function to make a transaction to buy car for dealer or customer.
 
     Changes all data related for transaction or rollback it if some error was catched during this transaction.
+    Stock item amount and buyer balance are decreased only if they are enough at the moment of update,
+    transaction is retried on deadlocks and conflicting inserts.
+    Saved offer is closed in the same transaction only if it's still open,
+    so the offer can't be paid twice by duplicated tasks.
+    Returns DEAL_COMPLETED, DEAL_OUT_OF_STOCK, DEAL_INSUFFICIENT_BALANCE or DEAL_OFFER_CLOSED.
+    In-memory buyer, seller, stock item and offer are updated only for completed deal,
+    stale stock item amount or buyer balance is reloaded for rejected one.
     """
-    with transaction.atomic():
-        total_sum = int(price * amount)
+    total_sum = int(price * amount)
+    for attempt in range(1, DEAL_TRANSACTION_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                if offer is not None and offer.pk:
+                    _close_offer(offer, car, price)
+                _complete_deal(buyer, seller, car, price, stock_item, amount)
+            break
+        except DealRejected as error:
+            # actualize stale value, so it's not offered again in the same batch
+            if error.result == DEAL_OUT_OF_STOCK:
+                stock_item.refresh_from_db(fields=["amount"])
+            elif error.result == DEAL_INSUFFICIENT_BALANCE:
+                buyer.refresh_from_db(fields=["balance"])
+            return error.result
+        except (IntegrityError, OperationalError):
+            if attempt == DEAL_TRANSACTION_ATTEMPTS:
+                raise
+
+    buyer.balance -= total_sum
+    seller.balance += total_sum
+    stock_item.amount -= amount
+    if offer is not None:
+        offer.is_closed, offer.bought_car, offer.car_price = True, car, price
+    return DEAL_COMPLETED
+
+
+def _close_offer(offer: Offer, car: Car, price: int):
+    """
+    Function to mark open offer as closed with bought car and its price.
+    Must be called inside transaction.
+    """
+    closed = (
+        type(offer)
+        .objects.filter(pk=offer.pk, is_closed=False)
+        .update(is_closed=True, bought_car=car, car_price=price)
+    )
+    if not closed:
+        raise DealRejected(DEAL_OFFER_CLOSED)
 
-        buyer.balance -= total_sum
-        buyer.save()
 
-        seller.balance += total_sum
-        seller.save()
+def _complete_deal(
+    buyer,
+    seller: Company,
+    car: Car,
+    price: int,
+    stock_item: CarStockItem,
+    amount: int,
+):
+    """
+    Function to write all data related to deal. Must be called inside transaction.
+    """
+    total_sum = int(price * amount)
+    if not _change_counter(stock_item, "amount", -amount, amount__gte=amount):
+        raise DealRejected(DEAL_OUT_OF_STOCK)
+    if not _change_counter(buyer, "balance", -total_sum, balance__gte=total_sum):
+        raise DealRejected(DEAL_INSUFFICIENT_BALANCE)
+    _change_counter(seller, "balance", total_sum)
+
+    if isinstance(buyer, Customer):
+        total_purchase, created = seller.total_purchases.get_or_create(
+            customer=buyer, dealer=seller, defaults={"amount": amount}
+        )
+        if not created:
+            total_purchase.add_amount(amount)
+
+        buyer.cars.add(car)
+        CustomerDealsHistory.objects.create(
+            customer=buyer,
+            dealer=seller,
+            car=car,
+            amount=amount,
+            price_per_one=price,
+        )
+    elif isinstance(buyer, Dealer):
+        total_purchase, created = seller.total_purchases.get_or_create(
+            dealer=buyer, supplier=seller, defaults={"amount": amount}
+        )
+        if not created:
+            total_purchase.add_amount(amount)
 
-        stock_item.amount -= amount
-        stock_item.save()
+        buyer_stock_item, created = buyer.stock.get_or_create(
+            dealer=buyer,
+            car=car,
+            defaults={"amount": amount, "price_per_one": price},
+        )
 
-        if isinstance(buyer, Customer):
-            total_purchase, created = seller.total_purchases.get_or_create(
-                customer=buyer, dealer=seller, defaults={"amount": amount}
-            )
-            if not created:
-                total_purchase.add_amount(amount)
-
-            buyer.cars.add(car)
-            CustomerDealsHistory.objects.create(
-                customer=buyer,
-                dealer=seller,
-                car=car,
-                amount=amount,
-                price_per_one=price,
-            )
-        elif isinstance(buyer, Dealer):
-            total_purchase, created = seller.total_purchases.get_or_create(
-                dealer=buyer, supplier=seller, defaults={"amount": amount}
-            )
-            if not created:
-                total_purchase.add_amount(amount)
+        if not created:
+            buyer_stock_item.add_amount(amount)
+
+        DealerDealsHistory.objects.create(
+            dealer=buyer,
+            supplier=seller,
+            car=car,
+            amount=amount,
+            price_per_one=price,
+        )
 
-            stock_item, created = buyer.stock.get_or_create(
-                dealer=buyer,
-                car=car,
-                defaults={"amount": amount, "price_per_one": price},
-            )
 
-            if not created:
-                stock_item.add_amount(amount)
+def _bulk_change_counters(queryset, field: str, changes: Dict[int, int]) -> int:
+    """
+    Function to change numeric field of several rows with one UPDATE.
 
-            DealerDealsHistory.objects.create(
-                dealer=buyer,
-                supplier=seller,
-                car=car,
+    changes is a dict with row pk as a key and value to add as a value.
+    Values are added with F() expression, so concurrent updates aren't lost.
+    """
+    if not changes:
+        return 0
+    return queryset.filter(pk__in=changes).update(
+        **{
+            field: F(field)
+            + Case(
+                *[When(pk=pk, then=Value(value)) for pk, value in changes.items()],
+                default=Value(0),
+            ),
+            "updated_at": timezone.now(),
+        }
+    )
+
+
+def settle_dealer_purchases(dealer: Dealer, purchases: List[PurchaseType]) -> List[str]:
+    """
+    Function to complete all dealer's purchases from suppliers in one transaction.
+
+    Alternative to complete_deal_transaction for every purchase which takes constant amount
+    of queries regardless of amount of purchases: counters are changed with bulk updates,
+    new stock items, total purchases and deals history are created with bulk_create.
+    Dealer's row is locked during settlement, so dealer's purchases are settled one by one.
+    Purchases are settled in priority order: purchase out of stock is skipped,
+    purchase allowing partial amount is reduced to affordable one,
+    and once the balance isn't enough the rest of purchases are rejected.
+    Returns result of every purchase (DEAL_COMPLETED, DEAL_OUT_OF_STOCK or DEAL_INSUFFICIENT_BALANCE),
+    amount of partially completed purchase is updated.
+    """
+    for attempt in range(1, DEAL_TRANSACTION_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                results, amounts = _settle_dealer_purchases(dealer, purchases)
+            break
+        except OperationalError:
+            if attempt == DEAL_TRANSACTION_ATTEMPTS:
+                raise
+
+    for purchase, result, amount in zip(purchases, results, amounts):
+        if result == DEAL_COMPLETED:
+            purchase["amount"] = amount
+            total_sum = int(purchase["price"] * purchase["amount"])
+            dealer.balance -= total_sum
+            purchase["seller"].balance += total_sum
+            purchase["stock_item"].amount -= purchase["amount"]
+    return results
+
+
+def _settle_dealer_purchases(
+    dealer: Dealer, purchases: List[PurchaseType]
+) -> Tuple[List[str], List[int]]:
+    """
+    Function to write all data related to dealer's purchases. Must be called inside transaction.
+    Returns result and settled amount of every purchase.
+
+    Stock items are locked before dealer's row in order of their pks,
+    the same order as stock item and buyer are updated by complete_deal_transaction,
+    so concurrent settlements and deals can't deadlock.
+    """
+    stock_amounts = dict(
+        SupplierStockItem._base_manager.select_for_update()
+        .filter(pk__in=[purchase["stock_item"].pk for purchase in purchases])
+        .order_by("pk")
+        .values_list("pk", "amount")
+    )
+    balance = (
+        Dealer._base_manager.select_for_update()
+        .values_list("balance", flat=True)
+        .get(pk=dealer.pk)
+    )
+
+    results = []
+    amounts = []
+    completed = []
+    for purchase in purchases:
+        stock_item_pk = purchase["stock_item"].pk
+        amount = purchase["amount"]
+        if purchase.get("partial") and balance < purchase["price"] * amount:
+            amount = int(balance // purchase["price"])
+        total_sum = int(purchase["price"] * amount)
+
+        if DEAL_INSUFFICIENT_BALANCE in results or not amount or balance < total_sum:
+            results.append(DEAL_INSUFFICIENT_BALANCE)
+        elif stock_amounts.get(stock_item_pk, 0) < amount:
+            results.append(DEAL_OUT_OF_STOCK)
+        else:
+            stock_amounts[stock_item_pk] -= amount
+            balance -= total_sum
+            results.append(DEAL_COMPLETED)
+            completed.append({**purchase, "amount": amount})
+        amounts.append(amount if results[-1] == DEAL_COMPLETED else 0)
+    if not completed:
+        return results, amounts
+
+    sold_amounts = defaultdict(int)
+    suppliers_income = defaultdict(int)
+    suppliers_amounts = defaultdict(int)
+    cars_amounts = defaultdict(int)
+    cars_prices = {}
+    for purchase in completed:
+        sold_amounts[purchase["stock_item"].pk] -= purchase["amount"]
+        suppliers_income[purchase["seller"].pk] += int(
+            purchase["price"] * purchase["amount"]
+        )
+        suppliers_amounts[purchase["seller"].pk] += purchase["amount"]
+        cars_amounts[purchase["car"].pk] += purchase["amount"]
+        cars_prices.setdefault(purchase["car"].pk, purchase["price"])
+
+    _bulk_change_counters(SupplierStockItem._base_manager, "amount", sold_amounts)
+    _bulk_change_counters(Supplier._base_manager, "balance", suppliers_income)
+    _change_counter(dealer, "balance", -sum(suppliers_income.values()))
+
+    total_purchases = {}
+    for pk, supplier_id in TotalSupplierPurchase.objects.filter(
+        dealer=dealer, supplier_id__in=suppliers_amounts
+    ).values_list("pk", "supplier_id"):
+        total_purchases.setdefault(supplier_id, pk)
+    _bulk_change_counters(
+        TotalSupplierPurchase.objects,
+        "amount",
+        {
+            total_purchases[supplier_id]: amount
+            for supplier_id, amount in suppliers_amounts.items()
+            if supplier_id in total_purchases
+        },
+    )
+    TotalSupplierPurchase.objects.bulk_create(
+        [
+            TotalSupplierPurchase(dealer=dealer, supplier_id=supplier_id, amount=amount)
+            for supplier_id, amount in suppliers_amounts.items()
+            if supplier_id not in total_purchases
+        ]
+    )
+
+    dealer_stock = {}
+    for pk, car_id in dealer.stock.filter(car_id__in=cars_amounts).values_list(
+        "pk", "car_id"
+    ):
+        dealer_stock.setdefault(car_id, pk)
+    _bulk_change_counters(
+        DealerStockItem._base_manager,
+        "amount",
+        {
+            dealer_stock[car_id]: amount
+            for car_id, amount in cars_amounts.items()
+            if car_id in dealer_stock
+        },
+    )
+    DealerStockItem.objects.bulk_create(
+        [
+            DealerStockItem(
+                dealer=dealer,
+                car_id=car_id,
                 amount=amount,
-                price_per_one=price,
+                price_per_one=cars_prices[car_id],
             )
+            for car_id, amount in cars_amounts.items()
+            if car_id not in dealer_stock
+        ]
+    )
+
+    deals = DealerDealsHistory.objects.bulk_create(
+        [
+            DealerDealsHistory(
+                dealer=dealer,
+                supplier=purchase["seller"],
+                car=purchase["car"],
+                amount=purchase["amount"],
+                price_per_one=purchase["price"],
+            )
+            for purchase in completed
+        ]
+    )
+    # bulk_create doesn't call save(), so deals are added to daily rollup explicitly
+    DealerDealsDailyStats.objects.add_deals(deals)
+    return results, amounts
 
 
-def customer_purchase_handler(offer):
-    dealers_queryset = Dealer.objects.prepare_for_offer()
-    offer_handler = CustomersOfferHandler(offer=offer, dealers=dealers_queryset)
+def customer_purchase_handler(offer: CustomerOffer) -> Optional[str]:
+    """
+    Function to match saved customer offer and complete the deal closing the offer.
+    Returns result of deal transaction or None if there is no suitable deal.
+    """
+    if settings.OFFER_MATCHING_ENGINE == "sql":
+        offer_handler = CustomersOfferSQLMatcher(offer=offer)
+    else:
+        dealers_queryset = Dealer.objects.prepare_for_offer()
+        offer_handler = CustomersOfferHandler(offer=offer, dealers=dealers_queryset)
     offer_handler.process_offer()
 
     if (
         offer_handler.purchase_seller
         and offer.customer.balance >= offer_handler.purchase_price
     ):
-        complete_deal_transaction(
+        return complete_deal_transaction(
             buyer=offer.customer,
             seller=offer_handler.purchase_seller,
             car=offer_handler.purchase_car,
             price=offer_handler.purchase_price,
             stock_item=offer_handler.purchase_stock_item,
             amount=1,
+            offer=offer,
         )
+    return None
 
 
-def dealer_purchase_handler(offer):
-    suppliers_queryset = Supplier.objects.pre_order_queryset()
-    offer_handler = DealerOfferHandler(offer=offer, suppliers=suppliers_queryset)
+def dealer_purchase_handler(offer: DealerOffer) -> Optional[str]:
+    """
+    Function to match saved dealer offer and complete the deal closing the offer.
+    Returns result of deal transaction or None if there is no suitable deal.
+    """
+    offer_handler = DealerOfferHandler(offer=offer, snapshot=load_supplier_market())
     offer_handler.process_offer()
 
     if (
         offer_handler.purchase_seller
         and offer.dealer.balance >= offer_handler.purchase_price * offer.amount
     ):
-        complete_deal_transaction(
+        return complete_deal_transaction(
             buyer=offer.dealer,
             seller=offer_handler.purchase_seller,
             car=offer_handler.purchase_car,
             price=offer_handler.purchase_price,
             stock_item=offer_handler.purchase_stock_item,
             amount=offer.amount,
+            offer=offer,
         )
+    return None
 
 
 def customer_regular_purchase_handler(
@@ -229,17 +517,114 @@ def customer_regular_purchase_handler(
         )
 
 
-def handle_cooperation_profitability(dealer: Dealer, suppliers: List[Supplier]):
+def stock_item_pk_range() -> Optional[Tuple[int, int]]:
+    """
+    Function to get the smallest and the largest primary keys of dealers' stock items.
+    """
+    pk_range = DealerStockItem.objects.aggregate(min_pk=Min("pk"), max_pk=Max("pk"))
+    if pk_range["min_pk"] is None:
+        return None
+    return pk_range["min_pk"], pk_range["max_pk"]
+
+
+def sample_stock_item_pks(size: int, pk_range: Tuple[int, int]) -> List[int]:
+    """
+    Function to draw random sample of dealers' stock items primary keys.
+
+    Random values within primary keys range are resolved to the next existing
+    primary key through primary key index in one query, so stock table isn't read whole.
+    Stock items following gaps of deleted rows are drawn more often.
+    """
+    table = connection.ops.quote_name(DealerStockItem._meta.db_table)
+    pk_column = connection.ops.quote_name(DealerStockItem._meta.pk.column)
+    drawn = [randint(*pk_range) for _ in range(size)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT (SELECT {pk_column} FROM {table} WHERE {pk_column} >= drawn "
+            f"ORDER BY {pk_column} LIMIT 1) FROM unnest(%s::bigint[]) AS drawn",
+            [drawn],
+        )
+        return [pk for pk, in cursor.fetchall() if pk is not None]
+
+
+def prepare_random_car_orders(
+    customer_ids: List[int], stock_item_pks: List[int]
+) -> List[RandomCarOrderType]:
+    """
+    Function to choose random car and max price for every customer.
+
+    Every customer gets dealer's stock item of sampled primary key
+    (see sample_stock_item_pks), only sampled stock items are loaded from database.
+    """
+    stock_items = {
+        pk: (car_id, price_per_one)
+        for pk, car_id, price_per_one in DealerStockItem.objects.filter(
+            pk__in=set(stock_item_pks)
+        ).values_list("pk", "car_id", "price_per_one")
+    }
+    return [
+        (customer_id, *stock_items[pk])
+        for customer_id, pk in zip(customer_ids, stock_item_pks)
+        if pk in stock_items
+    ]
+
+
+def customers_regular_purchase_handler(
+    orders: List[RandomCarOrderType], dealers: Union[List[Dealer], MarketSnapshot]
+):
+    """
+    Function to create and handle chunk of customers offers with random cars.
+
+    All offers are resolved against one dealers snapshot,
+    dealers' stock items bought by previous offers are updated in snapshot.
+    """
+    snapshot = (
+        dealers if isinstance(dealers, MarketSnapshot) else MarketSnapshot(dealers)
+    )
+    customers = (
+        Customer.objects.active()
+        .filter(pk__in=[customer_id for customer_id, _car_id, _price in orders])
+        .total_deals()
+        .in_bulk()
+    )
+    cars = Car.objects.in_bulk([car_id for _customer_id, car_id, _price in orders])
+
+    for customer_id, car_id, max_price in orders:
+        customer = customers.get(customer_id)
+        if not customer:
+            continue
+        offer = CustomerOffer(customer=customer, max_price=max_price, car=cars[car_id])
+
+        offer_handler = CustomersOfferHandler(offer, snapshot=snapshot)
+        offer_handler.process_offer()
+        if (
+            offer_handler.purchase_seller
+            and offer.customer.balance >= offer_handler.purchase_price
+        ):
+            complete_deal_transaction(
+                buyer=offer.customer,
+                seller=offer_handler.purchase_seller,
+                car=offer_handler.purchase_car,
+                price=offer_handler.purchase_price,
+                stock_item=offer_handler.purchase_stock_item,
+                amount=1,
+            )
+
+
+def handle_cooperation_profitability(
+    dealer: Dealer, suppliers: Union[List[Supplier], MarketSnapshot]
+):
     """
     Function to update dealer's list of suppliers with the most profitable values.
 
     Searches for best supplier for every stock item.
     """
+    offers = [
+        DealerOffer(dealer=dealer, car=stock_item.car, amount=1)
+        for stock_item in dealer.stock.all()
+    ]
     new_suppliers = []
-    for stock_item in dealer.stock.all():
-        offer = DealerOffer(dealer=dealer, car=stock_item.car, amount=1)
-        offer_handler = DealerOfferHandler(offer, suppliers)
-        offer_handler.process_offer()
+    for offer_handler in process_offers(offers, suppliers):
         if offer_handler.purchase_seller:
             new_suppliers.append(offer_handler.purchase_seller)
 
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from orders.models import CustomerDealsHistory, DealerDealsHistory
+
+
+@receiver(post_delete, sender=CustomerDealsHistory)
+@receiver(post_delete, sender=DealerDealsHistory)
+def deal_deleted_handler(sender, instance, *args, **kwargs):
+    """
+    Signal handler after deal deletion.
+
+    Subtracts the deal from daily rollup, so stats don't count deleted deals.
+    """
+    sender.daily_stats_model.objects.remove_deals([instance])
@@ -0,0 +1,229 @@
+from django.db import connection
+
+from cars.models import Car, CarCharacteristic
+from dealers.models import Dealer, DealerStockItem
+from marketing.models import DealerDiscount, DealerMarketingCampaign
+from orders.models import CustomerOffer, TotalDealerPurchase
+
+CHARACTERISTIC_FIELDS = [
+    "brand",
+    "car_model",
+    "generation",
+    "year_release",
+    "year_end_of_production",
+]
+
+BEST_CUSTOMER_OFFER_SQL = """
+WITH suitable_stock AS (
+    SELECT
+        stock.id AS stock_item_id,
+        stock.dealer_id,
+        stock.price_per_one,
+        ROW_NUMBER() OVER (
+            PARTITION BY stock.dealer_id ORDER BY stock.price_per_one, stock.id
+        ) AS price_rank
+    FROM {stock_table} stock
+    JOIN {dealer_table} dealer ON dealer.id = stock.dealer_id AND dealer.is_active
+    JOIN {car_table} car ON car.id = stock.car_id
+    WHERE stock.is_active AND stock.amount > 0 AND {car_filter} AND {dealer_filter}
+),
+priced_stock AS (
+    SELECT
+        suitable_stock.dealer_id,
+        suitable_stock.stock_item_id,
+        suitable_stock.price_per_one,
+        campaign.id AS campaign_id,
+        CEIL(
+            suitable_stock.price_per_one * (100 - campaign.percentage) / 100
+        )::bigint AS campaign_price,
+        discount.id AS discount_id,
+        CEIL(
+            suitable_stock.price_per_one * (100 - discount.percentage) / 100
+        )::bigint AS discount_price
+    FROM suitable_stock
+    LEFT JOIN LATERAL (
+        SELECT campaign.id, campaign.percentage
+        FROM {campaign_table} campaign
+        JOIN {campaign_cars_table} campaign_car
+            ON campaign_car.{campaign_column} = campaign.id
+        JOIN {car_table} car ON car.id = campaign_car.car_id
+        WHERE campaign.dealer_id = suitable_stock.dealer_id
+            AND campaign.percentage <> 0
+            AND {car_filter}
+        ORDER BY campaign.percentage DESC, campaign.id
+        LIMIT 1
+    ) campaign ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT discount.id, discount.percentage
+        FROM {discount_table} discount
+        JOIN {total_purchase_table} total_purchase
+            ON total_purchase.dealer_id = discount.dealer_id
+            AND total_purchase.customer_id = %(customer_id)s
+            AND total_purchase.amount > 0
+        WHERE discount.dealer_id = suitable_stock.dealer_id
+            AND discount.percentage <> 0
+            AND (
+                (discount.discount_type = 'CD' AND total_purchase.amount >= discount.min_amount)
+                OR (discount.discount_type = 'BD' AND discount.min_amount <= 1)
+            )
+        ORDER BY discount.percentage DESC, discount.id
+        LIMIT 1
+    ) discount ON TRUE
+    WHERE suitable_stock.price_rank = 1
+)
+SELECT
+    dealer_id,
+    stock_item_id,
+    price_per_one,
+    campaign_id,
+    campaign_price,
+    discount_id,
+    discount_price,
+    LEAST(price_per_one, campaign_price, discount_price) AS effective_price
+FROM priced_stock
+ORDER BY effective_price, dealer_id
+LIMIT 1
+"""
+
+
+class CustomersOfferSQLMatcher:
+    """
+    An interface for handling customer offer in database.
+    Alternative to CustomersOfferHandler which keeps memory flat regardless of amount of dealers.
+
+    Selects the best (dealer, stock item, effective price) with one query:
+    cheapest suitable stock item for every dealer is ranked by window function,
+    dealer's best marketing campaign and discount are joined with LATERAL subqueries.
+    Follows the same selection rules as CustomersOfferHandler, which is kept as a reference.
+
+    Attributes
+    ----------
+    offer : CustomerOffer
+        contains main info about buyer offer
+
+    purchase_car : Car
+        suggested car for purchase
+    purchase_seller : Dealer
+        suggested seller with best price
+    purchase_price : int
+        price of suggested car
+    purchase_marketing_campaign : DealerMarketingCampaign
+        marketing campaign in case suggested car have the best price with specific campaign
+    purchase_discount : DealerDiscount
+        discount in case suggested car have the best price with specific discunt
+    purchase_stock_item : DealerStockItem
+        suggested dealer's stock item
+    """
+
+    def __init__(self, offer: CustomerOffer):
+        self.offer: CustomerOffer = offer
+
+        self.purchase_car: Car = None
+        self.purchase_seller: Dealer = None
+        self.purchase_price: int = None
+        self.purchase_marketing_campaign: DealerMarketingCampaign = None
+        self.purchase_discount: DealerDiscount = None
+        self.purchase_stock_item: DealerStockItem = None
+
+    def process_offer(self):
+        """
+        Handle offer from start to the end.
+        Selects the best offer in database and loads related objects.
+        """
+        row = self._select_best_offer()
+        if not row:
+            return
+
+        (
+            _dealer_id,
+            stock_item_id,
+            price,
+            campaign_id,
+            campaign_price,
+            discount_id,
+            discount_price,
+            effective_price,
+        ) = row
+
+        if self.offer.max_price and effective_price > self.offer.max_price:
+            return
+
+        self.purchase_stock_item = DealerStockItem.objects.select_related(
+            "dealer", "car"
+        ).get(pk=stock_item_id)
+        self.purchase_seller = self.purchase_stock_item.dealer
+        self.purchase_car = self.purchase_stock_item.car
+        self.purchase_price = effective_price
+
+        # campaign is preferred over discount with the same price
+        # as it's done in CustomersOfferHandler
+        if campaign_id and campaign_price == effective_price and campaign_price < price:
+            self.purchase_marketing_campaign = DealerMarketingCampaign.objects.get(
+                pk=campaign_id
+            )
+        elif (
+            discount_id and discount_price == effective_price and discount_price < price
+        ):
+            self.purchase_discount = DealerDiscount.objects.get(pk=discount_id)
+
+    def _select_best_offer(self) -> tuple:
+        """
+        Function to run matching query for offer with car or car characteristic.
+        """
+        params = {"customer_id": self.offer.customer_id}
+        if self.offer.car_id:
+            car_filter = "car.id = %(car_id)s"
+            dealer_filter = "TRUE"
+            params["car_id"] = self.offer.car_id
+        else:
+            car_filter, dealer_filter = self._characteristic_filters(params)
+
+        sql = BEST_CUSTOMER_OFFER_SQL.format(
+            stock_table=DealerStockItem._meta.db_table,
+            dealer_table=Dealer._meta.db_table,
+            car_table=Car._meta.db_table,
+            campaign_table=DealerMarketingCampaign._meta.db_table,
+            campaign_cars_table=DealerMarketingCampaign.cars.through._meta.db_table,
+            campaign_column=DealerMarketingCampaign.cars.field.m2m_column_name(),
+            discount_table=DealerDiscount._meta.db_table,
+            total_purchase_table=TotalDealerPurchase._meta.db_table,
+            car_filter=car_filter,
+            dealer_filter=dealer_filter,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+
+    def _characteristic_filters(self, params: dict) -> (str, str):
+        """
+        Function to build SQL conditions for offer with car characteristic.
+
+        Car fits characteristic if all filled fields of characteristic equal to car fields.
+        Dealer fits characteristic if one of its characteristics has no filled fields
+        different from characteristic in offer.
+        """
+        characteristic = self.offer.characteristic
+        car_conditions = ["TRUE"]
+        dealer_conditions = []
+        for field in CHARACTERISTIC_FIELDS:
+            value = getattr(characteristic, field)
+            params[field] = value
+            if value:
+                car_conditions.append(f"car.{field} = %({field})s")
+
+            empty_value = "''" if field in ["brand", "car_model", "generation"] else "0"
+            dealer_conditions.append(
+                f"(characteristic.{field} IS NULL OR characteristic.{field} = {empty_value} "
+                f"OR characteristic.{field} = %({field})s)"
+            )
+
+        dealer_characteristics_table = Dealer.car_characteristics.through._meta.db_table
+        dealer_filter = f"""EXISTS (
+            SELECT 1
+            FROM {dealer_characteristics_table} dealer_characteristic
+            JOIN {CarCharacteristic._meta.db_table} characteristic
+                ON characteristic.id = dealer_characteristic.carcharacteristic_id
+            WHERE dealer_characteristic.dealer_id = dealer.id
+                AND {" AND ".join(dealer_conditions)}
+        )"""
+        return " AND ".join(car_conditions), dealer_filter
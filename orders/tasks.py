@@ -1,52 +1,76 @@
 from celery import shared_task
-from random import choice
+from django.conf import settings
+from typing import List
 
 from car_dealership.celery import app as celery_app
 from customers.models import Customer
 from orders.services import (
     customer_purchase_handler,
     customer_regular_purchase_handler,
+    customers_regular_purchase_handler,
     dealer_purchase_handler,
     dealer_regular_purchase_handler,
     handle_cooperation_profitability,
+    prepare_random_car_orders,
+    sample_stock_item_pks,
+    stock_item_pk_range,
+    RandomCarOrderType,
 )
+from orders.market import load_supplier_market
 from orders.models import CustomerOffer, DealerOffer
-from suppliers.models import Supplier
-from dealers.models import Dealer, DealerStockItem
+from orders.offer_events import publish_offer_status
+from orders.offer_queue import offer_lock
+from dealers.models import Dealer
+from orders.utils import chunked
 from users.models import UserProfile
 
+# deal tasks are acknowledged after completion,
+# so they are redelivered instead of being lost with killed worker
+DEAL_TASK_OPTIONS = {"acks_late": True, "reject_on_worker_lost": True}
 
-@celery_app.task
-def handle_customer_offer(customer_id: int):
+
+@celery_app.task(**DEAL_TASK_OPTIONS)
+def handle_customer_offer(offer_id: int):
     """
     Task to handle customer's offer.
+    Offer is skipped if it's handled by another worker or already closed.
+    Status of handled offer is published to clients waiting for it.
     """
-    offer = CustomerOffer.objects.prepare_offer(customer_id).last()
-    if offer:
-        customer_purchase_handler(offer)
+    with offer_lock(CustomerOffer, offer_id) as acquired:
+        if not acquired:
+            return
+        offer = CustomerOffer.objects.prepare_offer(offer_id).first()
+        if offer:
+            customer_purchase_handler(offer)
+            publish_offer_status(offer)
 
 
-@celery_app.task
-def handle_dealer_offer(dealer_id: int):
+@celery_app.task(**DEAL_TASK_OPTIONS)
+def handle_dealer_offer(offer_id: int):
     """
     Task to handle dealer's offer.
+    Offer is skipped if it's handled by another worker or already closed.
+    Status of handled offer is published to clients waiting for it.
     """
-    offer = DealerOffer.objects.prepare_offer(dealer_id).last()
-    if offer:
-        dealer_purchase_handler(offer)
+    with offer_lock(DealerOffer, offer_id) as acquired:
+        if not acquired:
+            return
+        offer = DealerOffer.objects.prepare_offer(offer_id).first()
+        if offer:
+            dealer_purchase_handler(offer)
+            publish_offer_status(offer)
 
 
-@celery_app.task
+@celery_app.task(**DEAL_TASK_OPTIONS)
 def run_cars_purchase(dealer_id: int):
     """
     Task to start cars purchase on dealer's stock.
     """
-    suppliers_queryset = Supplier.objects.pre_order_queryset()
     dealer_queryset = Dealer.objects.pre_order_queryset(dealer_id).first()
-    dealer_regular_purchase_handler(dealer_queryset, suppliers_queryset)
+    dealer_regular_purchase_handler(dealer_queryset, load_supplier_market())
 
 
-@celery_app.task
+@celery_app.task(**DEAL_TASK_OPTIONS)
 def run_customer_purchase_with_random_car(
     customer_id: int, random_car_pk: int, max_price: int
 ):
@@ -60,15 +84,24 @@ def run_customer_purchase_with_random_car(
     )
 
 
+@celery_app.task(**DEAL_TASK_OPTIONS)
+def run_customers_purchase_with_random_cars(orders: List[RandomCarOrderType]):
+    """
+    Task to make and process chunk of customers offers with random cars.
+    Dealers are loaded once and shared by all offers in chunk.
+    """
+    dealers_queryset = Dealer.objects.pre_customer_order_queryset()
+    customers_regular_purchase_handler(orders, dealers_queryset)
+
+
 @celery_app.task
 def check_cooperation_profitability(dealer_id: int):
     """
     Task to check dealers' cooperation with suppliers.
     """
     dealer = Dealer.objects.pre_order_queryset(dealer_id).first()
-    suppliers_queryset = Supplier.objects.pre_order_queryset()
     if dealer:
-        handle_cooperation_profitability(dealer, suppliers_queryset)
+        handle_cooperation_profitability(dealer, load_supplier_market())
 
 
 @shared_task
@@ -85,22 +118,41 @@ def regular_order_on_dealer_stock():
 def regular_order_by_customers():
     """
     Task to make orders by customers for every active customer with positive balance.
+
+    Customers are streamed from database and split into chunks of CUSTOMER_ORDERS_CHUNK_SIZE,
+    each chunk is handled by one task. Task per customer is enqueued if chunk size is 0.
+    Random cars of every chunk come from sample of dealers' stock items primary keys.
     """
-    stock_items = DealerStockItem.objects.all()
-    for customer in Customer.objects.active():
-        if Customer.user_profile and customer.balance > 0:
-            random_stock_item = choice(stock_items)
-            random_car_pk = random_stock_item.car.pk
-            max_price = random_stock_item.price_per_one
-            run_customer_purchase_with_random_car.delay(
-                customer.id, random_car_pk, max_price
-            )
+    pk_range = stock_item_pk_range()
+    if pk_range is None:
+        return
+
+    chunk_size = settings.CUSTOMER_ORDERS_CHUNK_SIZE
+    customer_ids = (
+        Customer.objects.active()
+        .filter(balance__gt=0)
+        .values_list("pk", flat=True)
+        .iterator(chunk_size=max(chunk_size, 1000))
+    )
+    for customers_chunk in chunked(customer_ids, chunk_size or 1000):
+        orders = prepare_random_car_orders(
+            customers_chunk, sample_stock_item_pks(len(customers_chunk), pk_range)
+        )
+        if chunk_size:
+            run_customers_purchase_with_random_cars.delay(orders)
+        else:
+            for customer_id, random_car_pk, max_price in orders:
+                run_customer_purchase_with_random_car.delay(
+                    customer_id, random_car_pk, max_price
+                )
 
 
 @shared_task
 def regular_cooperation_profitability_check():
     """
     Task to check dealers' cooperation with suppliers.
+    Every dealer is checked by separate task, so slow dealer doesn't block the rest.
     """
-    for dealer in Dealer.objects.active():
-        check_cooperation_profitability(dealer.pk)
+    dealer_ids = Dealer.objects.active().values_list("pk", flat=True).iterator()
+    for dealer_id in dealer_ids:
+        check_cooperation_profitability.delay(dealer_id)
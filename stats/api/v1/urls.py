@@ -9,4 +9,19 @@ urlpatterns = [
     path(
         "suppliers/<int:pk>", views.SupplierStatsView.as_view(), name="suppliers-stats"
     ),
+    path(
+        "customers/<int:pk>/series",
+        views.CustomerStatsSeriesView.as_view(),
+        name="customers-stats-series",
+    ),
+    path(
+        "dealers/<int:pk>/series",
+        views.DealerStatsSeriesView.as_view(),
+        name="dealers-stats-series",
+    ),
+    path(
+        "suppliers/<int:pk>/series",
+        views.SupplierStatsSeriesView.as_view(),
+        name="suppliers-stats-series",
+    ),
 ]
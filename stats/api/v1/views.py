@@ -1,3 +1,6 @@
+import itertools
+
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -9,11 +12,36 @@ from customers.permissions import IsCustomerOwner
 from dealers.models import Dealer
 from dealers.permissions import IsDealerOwner
 from orders.models import CustomerDealsHistory, DealerDealsHistory
-from stats.utils import get_filter_params
+from stats.utils import (
+    CUSTOMER_STATS,
+    DEALER_STATS,
+    SUPPLIER_STATS,
+    get_filter_params,
+    get_multiple_stats,
+    get_stats_series,
+    is_multiple_stats,
+    parse_stats_types,
+    stream_json_list,
+)
 from suppliers.models import Supplier
 from suppliers.permissions import IsSupplierOwner
 
 
+def multiple_stats_response(
+    available_stats: dict, stats_type: str, filter_params: dict
+) -> Response:
+    """
+    Function to make response with several statistics calculated at once.
+    """
+    try:
+        stats_types = parse_stats_types(stats_type, available_stats)
+    except ValueError as error:
+        raise ValidationError(str(error))
+
+    stats = get_multiple_stats(available_stats, stats_types, filter_params)
+    return Response({"stats": stats}, status=status.HTTP_200_OK)
+
+
 class CustomerStatsView(APIView):
     """
     CustomerStats API endpoint.
@@ -25,12 +53,12 @@ class CustomerStatsView(APIView):
 
     Request parameters:
     - id (path parameter)
-    - stats (query parameter)
+    - stats (query parameter, 'all' or comma-separated list of stats to get them at once)
     - start_date (query parameter, optional)
     - end_date (query parameter, optional)
 
     Actions:
-    -GET : Get specific statistic based on query param.
+    -GET : Get specific statistic or several statistics based on query param.
     """
 
     permission_classes = [permissions.IsAuthenticated, IsCustomerOwner]
@@ -44,6 +72,9 @@ class CustomerStatsView(APIView):
 
         filter_params = get_filter_params("customer", customer, start_date, end_date)
 
+        if is_multiple_stats(stats_type):
+            return multiple_stats_response(CUSTOMER_STATS, stats_type, filter_params)
+
         if stats_type == "bought_cars":
             amount = CustomerDealsHistory.objects.get_total_amount_of_cars(
                 filter_params
@@ -67,12 +98,12 @@ class DealerStatsView(APIView):
 
     Request parameters:
     - id (path parameter)
-    - stats (query parameter)
+    - stats (query parameter, 'all' or comma-separated list of stats to get them at once)
     - start_date (query parameter, optional)
     - end_date (query parameter, optional)
 
     Actions:
-    -GET : Get specific statistic based on query param.
+    -GET : Get specific statistic or several statistics based on query param.
     """
 
     permission_classes = [permissions.IsAuthenticated, IsDealerOwner]
@@ -86,6 +117,9 @@ class DealerStatsView(APIView):
 
         filter_params = get_filter_params("dealer", dealer, start_date, end_date)
 
+        if is_multiple_stats(stats_type):
+            return multiple_stats_response(DEALER_STATS, stats_type, filter_params)
+
         if stats_type == "amount_bought_cars":
             amount = DealerDealsHistory.objects.get_total_amount_of_cars(filter_params)
         elif stats_type == "spent_money":
@@ -121,12 +155,12 @@ class SupplierStatsView(APIView):
 
     Request parameters:
     - id (path parameter)
-    - stats (query parameter)
+    - stats (query parameter, 'all' or comma-separated list of stats to get them at once)
     - start_date (query parameter, optional)
     - end_date (query parameter, optional)
 
     Actions:
-    -GET : Get specific statistic based on query param.
+    -GET : Get specific statistic or several statistics based on query param.
     """
 
     permission_classes = [permissions.IsAuthenticated, IsSupplierOwner]
@@ -140,6 +174,9 @@ class SupplierStatsView(APIView):
 
         filter_params = get_filter_params("supplier", supplier, start_date, end_date)
 
+        if is_multiple_stats(stats_type):
+            return multiple_stats_response(SUPPLIER_STATS, stats_type, filter_params)
+
         if stats_type == "amount_unique_clients":
             amount = DealerDealsHistory.objects.get_amount_of_unique_clients(
                 filter_params
@@ -156,3 +193,130 @@ class SupplierStatsView(APIView):
             raise ValidationError("Get parameter 'stats' is required.")
 
         return Response({"amount": amount}, status=status.HTTP_200_OK)
+
+
+class StatsSeriesView(APIView):
+    """
+    Base class for stats series API endpoints.
+
+    Streams JSON list of statistics for every day, week or month of period.
+
+    Attributes
+    ----------
+    model : Customer | Dealer | Supplier
+        model of entity with statistics
+    field_name : str
+        name of entity's field in deals history
+    available_stats : dict
+        stats types which can be requested for entity
+    """
+
+    model = None
+    field_name = None
+    available_stats = None
+
+    def get(self, request, pk: int):
+        instance = get_object_or_404(self.model, pk=pk)
+
+        stats_type = request.query_params.get("stats")
+        bucket = request.query_params.get("bucket", "day")
+        start_date = request.query_params.get("start_date")
+        end_date = request.query_params.get("end_date")
+        if not stats_type:
+            raise ValidationError("Get parameter 'stats' is required.")
+
+        try:
+            filter_params = get_filter_params(
+                self.field_name, instance, start_date, end_date
+            )
+            stats_types = parse_stats_types(stats_type, self.available_stats)
+            series = get_stats_series(
+                self.available_stats, stats_types, filter_params, bucket
+            )
+            # checks bucket before response is started
+            first_row = next(series, None)
+        except ValueError as error:
+            raise ValidationError(str(error))
+
+        rows = [] if first_row is None else itertools.chain([first_row], series)
+        return StreamingHttpResponse(
+            stream_json_list(rows), content_type="application/json"
+        )
+
+
+class CustomerStatsSeriesView(StatsSeriesView):
+    """
+    CustomerStatsSeries API endpoint.
+
+    API to get customer's statistics grouped by days, weeks or months.
+
+    HTTP methods:
+    - GET
+
+    Request parameters:
+    - id (path parameter)
+    - stats (query parameter, stats type, 'all' or comma-separated list of stats)
+    - bucket (query parameter, optional: day, week or month, 'day' by default)
+    - start_date (query parameter, optional)
+    - end_date (query parameter, optional)
+
+    Actions:
+    -GET : Get list of statistics for every bucket with deals.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsCustomerOwner]
+    model = Customer
+    field_name = "customer"
+    available_stats = CUSTOMER_STATS
+
+
+class DealerStatsSeriesView(StatsSeriesView):
+    """
+    DealerStatsSeries API endpoint.
+
+    API to get dealer's statistics grouped by days, weeks or months.
+
+    HTTP methods:
+    - GET
+
+    Request parameters:
+    - id (path parameter)
+    - stats (query parameter, stats type, 'all' or comma-separated list of stats)
+    - bucket (query parameter, optional: day, week or month, 'day' by default)
+    - start_date (query parameter, optional)
+    - end_date (query parameter, optional)
+
+    Actions:
+    -GET : Get list of statistics for every bucket with deals.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsDealerOwner]
+    model = Dealer
+    field_name = "dealer"
+    available_stats = DEALER_STATS
+
+
+class SupplierStatsSeriesView(StatsSeriesView):
+    """
+    SupplierStatsSeries API endpoint.
+
+    API to get supplier's statistics grouped by days, weeks or months.
+
+    HTTP methods:
+    - GET
+
+    Request parameters:
+    - id (path parameter)
+    - stats (query parameter, stats type, 'all' or comma-separated list of stats)
+    - bucket (query parameter, optional: day, week or month, 'day' by default)
+    - start_date (query parameter, optional)
+    - end_date (query parameter, optional)
+
+    Actions:
+    -GET : Get list of statistics for every bucket with deals.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsSupplierOwner]
+    model = Supplier
+    field_name = "supplier"
+    available_stats = SUPPLIER_STATS
@@ -1,10 +1,17 @@
+import json
 from datetime import date
-from typing import Union
+from typing import Dict, Iterable, Iterator, List, Tuple, Type, Union
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
 
 from customers.models import Customer
 from dealers.models import Dealer
+from orders.models import CustomerDealsHistory, DealerDealsHistory, DealHistory
 from suppliers.models import Supplier
 
+StatsMetricType = Tuple[Type[DealHistory], str, str]
+
 
 def get_filter_params(
     field_name: str,
@@ -34,3 +41,165 @@ def get_filter_params(
         params["date__lt"] = end_date
 
     return params
+
+
+# Aggregations for stats metrics
+SUM = "sum"
+COUNT_UNIQUE = "count_unique"
+
+# stats type -> (deals history model, aggregation, field)
+# "client" field is a buyer in deals (client_field of history manager)
+CUSTOMER_STATS: Dict[str, StatsMetricType] = {
+    "bought_cars": (CustomerDealsHistory, SUM, "amount"),
+    "spent_money": (CustomerDealsHistory, SUM, "revenue"),
+}
+DEALER_STATS: Dict[str, StatsMetricType] = {
+    "amount_bought_cars": (DealerDealsHistory, SUM, "amount"),
+    "spent_money": (DealerDealsHistory, SUM, "revenue"),
+    "amount_unique_clients": (CustomerDealsHistory, COUNT_UNIQUE, "client"),
+    "amount_sold_cars": (CustomerDealsHistory, SUM, "amount"),
+    "amount_sold_unique_cars": (CustomerDealsHistory, COUNT_UNIQUE, "car"),
+    "revenue": (CustomerDealsHistory, SUM, "revenue"),
+}
+SUPPLIER_STATS: Dict[str, StatsMetricType] = {
+    "amount_unique_clients": (DealerDealsHistory, COUNT_UNIQUE, "client"),
+    "amount_sold_cars": (DealerDealsHistory, SUM, "amount"),
+    "amount_sold_unique_cars": (DealerDealsHistory, COUNT_UNIQUE, "car"),
+    "revenue": (DealerDealsHistory, SUM, "revenue"),
+}
+# Periods for stats series
+SERIES_BUCKETS = ("day", "week", "month")
+# Amount of stats series rows fetched from database at once
+SERIES_CHUNK_SIZE = 500
+
+
+def is_multiple_stats(stats_type: str) -> bool:
+    """
+    Function to check whether several stats are requested at once:
+    'all' or comma-separated list of stats types.
+    """
+    return bool(stats_type) and (stats_type == "all" or "," in stats_type)
+
+
+def parse_stats_types(
+    stats_type: str, available_stats: Dict[str, StatsMetricType]
+) -> List[str]:
+    """
+    Function to parse 'all' or comma-separated list of stats types.
+    """
+    if stats_type == "all":
+        return list(available_stats)
+
+    stats_types = [item.strip() for item in stats_type.split(",") if item.strip()]
+    unknown_stats = [item for item in stats_types if item not in available_stats]
+    if not stats_types or unknown_stats:
+        raise ValueError(f"Unknown stats: {', '.join(unknown_stats)}.")
+    return list(dict.fromkeys(stats_types))
+
+
+def get_multiple_stats(
+    available_stats: Dict[str, StatsMetricType],
+    stats_types: List[str],
+    filter_params: dict,
+) -> Dict[str, int]:
+    """
+    Function to calculate several stats with one query.
+
+    Deals of every history model used by requested stats are collected
+    (daily rollup rows and deals of partially covered day, see DealsStatsManager.deals_rows)
+    into one UNION ALL subquery, then every stats is calculated by conditional aggregation.
+    """
+    sql, params = _stats_sql(available_stats, stats_types, filter_params)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return dict(zip(stats_types, row))
+
+
+def get_stats_series(
+    available_stats: Dict[str, StatsMetricType],
+    stats_types: List[str],
+    filter_params: dict,
+    bucket: str,
+) -> Iterator[dict]:
+    """
+    Function to calculate stats for every day, week or month of period with one query.
+
+    Rows are fetched from server-side cursor by chunks, so long periods aren't loaded at once.
+    Server-side cursors are disabled behind PgBouncer, then rows are fetched
+    from plain cursor by the same chunks.
+    Yields dicts with start date of bucket and value of every stats type.
+    """
+    if bucket not in SERIES_BUCKETS:
+        raise ValueError(f"Bucket must be one of: {', '.join(SERIES_BUCKETS)}.")
+
+    sql, params = _stats_sql(available_stats, stats_types, filter_params, bucket)
+    if connection.settings_dict["DISABLE_SERVER_SIDE_CURSORS"]:
+        cursor = connection.cursor()
+    else:
+        cursor = connection.chunked_cursor()
+    with cursor:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(SERIES_CHUNK_SIZE):
+            for bucket_date, *values in rows:
+                yield {"date": bucket_date, **dict(zip(stats_types, values))}
+
+
+def _stats_sql(
+    available_stats: Dict[str, StatsMetricType],
+    stats_types: List[str],
+    filter_params: dict,
+    bucket: str = None,
+) -> (str, list):
+    """
+    Function to build query calculating stats for the whole period or grouped by buckets.
+    """
+    history_models = []
+    for stats_type in stats_types:
+        history_model = available_stats[stats_type][0]
+        if history_model not in history_models:
+            history_models.append(history_model)
+
+    subqueries = []
+    params = []
+    for source, history_model in enumerate(history_models):
+        for queryset in history_model.objects.deals_rows(filter_params, source):
+            sql, queryset_params = queryset.query.sql_with_params()
+            subqueries.append(f"({sql})")
+            params.extend(queryset_params)
+
+    columns = []
+    for stats_type in stats_types:
+        history_model, aggregation, field = available_stats[stats_type]
+        source = history_models.index(history_model)
+        if aggregation == SUM:
+            columns.append(
+                f"SUM(deals.{field}) FILTER (WHERE deals.source = {source})::bigint"
+            )
+        else:
+            columns.append(
+                f"COUNT(DISTINCT deals.{field}) FILTER (WHERE deals.source = {source})"
+            )
+
+    group_by = ""
+    if bucket:
+        columns.insert(0, f"DATE_TRUNC('{bucket}', deals.day)::date AS bucket")
+        group_by = " GROUP BY bucket ORDER BY bucket"
+
+    sql = (
+        f"SELECT {', '.join(columns)} "
+        f"FROM ({' UNION ALL '.join(subqueries)}) "
+        f"AS deals(source, day, client, car, amount, revenue)"
+        f"{group_by}"
+    )
+    return sql, params
+
+
+def stream_json_list(rows: Iterable[dict]) -> Iterator[str]:
+    """
+    Function to serialize rows into JSON list chunk by chunk.
+    """
+    yield "["
+    for index, row in enumerate(rows):
+        yield ("," if index else "") + json.dumps(row, cls=DjangoJSONEncoder)
+    yield "]"
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from suppliers.api.v1 import views
+
+urlpatterns = [
+    path("stock/", views.AsyncSupplierStockAPIView.as_view({"get": "list"})),
+    path(
+        "stock/<int:pk>/",
+        views.AsyncSupplierStockAPIView.as_view({"get": "retrieve"}),
+    ),
+]
@@ -1,7 +1,7 @@
 from rest_framework import generics, viewsets, permissions
 from rest_framework.filters import OrderingFilter
 from django_filters import rest_framework as filters
-from common.mixins import SupplierOwnerMixin
+from common.mixins import AsyncReadMixin, BulkImportMixin, SupplierOwnerMixin
 
 from common.permissions import IsProfileOwnerOrReadOnly
 from marketing.filters import SupplierDiscountFilter, SupplierMarketingCampaignFilter
@@ -14,6 +14,7 @@ from suppliers.api.v1.serializers import (
     SupplierStockItemSerializer,
 )
 from suppliers.filters import SupplierFilter, SupplierStockFilter
+from suppliers.importers import SUPPLIER_STOCK_IMPORT
 from suppliers.models import Supplier, SupplierStockItem
 from marketing.api.v1.serializers import (
     SupplierDiscountSerializer,
@@ -99,7 +100,7 @@ class SuppliersClientsListAPIView(generics.ListAPIView):
             return TotalSupplierPurchase.objects.none()
 
 
-class SupplierStockAPIView(SupplierOwnerMixin, viewsets.ModelViewSet):
+class SupplierStockAPIView(BulkImportMixin, SupplierOwnerMixin, viewsets.ModelViewSet):
     """
     Supplier stock endpoint.
 
@@ -120,6 +121,7 @@ class SupplierStockAPIView(SupplierOwnerMixin, viewsets.ModelViewSet):
     -GET : Retrieve a list of all supplier' stock items.
     -GET : Retrieve a supplier's stock item detail by supplier ID.
     -PUT/PATCH : Update supplier's stock item data by ID.
+    -POST import/ : Create or update supplier's stock items from CSV or NDJSON file.
     """
 
     queryset = SupplierStockItem.objects.all()
@@ -131,6 +133,7 @@ class SupplierStockAPIView(SupplierOwnerMixin, viewsets.ModelViewSet):
     filter_backends = (filters.DjangoFilterBackend, OrderingFilter)
     ordering_fields = ["price_per_one", "amount"]
     filterset_class = SupplierStockFilter
+    bulk_import = SUPPLIER_STOCK_IMPORT
 
 
 class SupplierDiscountListAPIView(generics.ListAPIView):
@@ -193,3 +196,9 @@ class SupplierMarketingListAPIView(generics.ListAPIView):
             return supplier.marketing_campaigns.all()
         except Supplier.DoesNotExist:
             return SupplierMarketingCampaign.objects.none()
+
+
+class AsyncSupplierStockAPIView(AsyncReadMixin, SupplierStockAPIView):
+    """
+    Async read-only variant of SupplierStockAPIView served by ASGI.
+    """
@@ -0,0 +1,10 @@
+from common.bulk_import import BulkImport
+from common.cache import SUPPLIER_MARKET
+from suppliers.models import SupplierStockItem
+
+SUPPLIER_STOCK_IMPORT = BulkImport(
+    SupplierStockItem,
+    "supplier",
+    ["car_id", "amount", "price_per_one", "is_active"],
+    cache_namespaces=(SUPPLIER_MARKET,),
+)
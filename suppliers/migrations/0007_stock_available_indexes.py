@@ -0,0 +1,21 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("suppliers", "0006_alter_supplier_place"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="supplierstockitem",
+            index=models.Index(
+                condition=models.Q(("amount__gt", 0), ("is_active", True)),
+                fields=["supplier"],
+                name="supplier_stock_available_idx",
+            ),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Prefetch, Q
 from django.db.models.query import QuerySet
 
 from cars.models import Car, CarStockItem
@@ -9,6 +10,15 @@ class SupplierQuerySet(BaseQuerySet):
     def stock(self):
         return self.prefetch_related("stock__car")
 
+    def available_stock(self):
+        """
+        Preloads only stock items which can be sold.
+        """
+        return self.prefetch_related(
+            Prefetch("stock", queryset=SupplierStockItem.objects.available()),
+            "stock__car",
+        )
+
     def marketing_campaigns(self):
         return self.prefetch_related("marketing_campaigns__cars")
 
@@ -28,7 +38,13 @@ class SupplierManager(models.Manager):
         """
         Creates queryset with all necessary data for completing order.
         """
-        return self.get_queryset().active().stock().marketing_campaigns().discounts()
+        return (
+            self.get_queryset()
+            .active()
+            .available_stock()
+            .marketing_campaigns()
+            .discounts()
+        )
 
 
 class Supplier(Company):
@@ -63,3 +79,13 @@ class SupplierStockItem(CarStockItem):
     supplier = models.ForeignKey(
         Supplier, related_name="stock", on_delete=models.CASCADE
     )
+
+    class Meta:
+        indexes = [
+            # preloading available stock of suppliers
+            models.Index(
+                fields=["supplier"],
+                condition=Q(is_active=True, amount__gt=0),
+                name="supplier_stock_available_idx",
+            ),
+        ]
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.cache import SUPPLIER_MARKET, bump_generation
+from suppliers.models import Supplier, SupplierStockItem
+
+
+@receiver([post_save, post_delete], sender=Supplier)
+@receiver([post_save, post_delete], sender=SupplierStockItem)
+def supplier_market_changed_handler(sender, *args, **kwargs):
+    """
+    Signal handler after supplier or supplier's stock item change.
+
+    Invalidates cached suppliers market.
+    Stock amounts changed by deals aren't cached, so deals don't invalidate it.
+    """
+    bump_generation(SUPPLIER_MARKET)
@@ -0,0 +1,102 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from benchmarks.market import SyntheticMarket
+from benchmarks.runner import BENCHMARKS, compare_results, measure
+from dealers.models import DealerStockItem
+from orders.models import CustomerDealsDailyStats, CustomerDealsHistory
+
+
+@pytest.mark.django_db
+class TestSyntheticMarket:
+    def test_market_is_seeded(self):
+        """
+        Checking whether the same seed generates the same market.
+        """
+        markets = []
+        for _ in range(2):
+            with transaction.atomic():
+                market = SyntheticMarket(3, 3, 10, 10, offers=5, seed=7).create()
+                markets.append(
+                    sorted(
+                        DealerStockItem.objects.filter(
+                            dealer__in=market["dealers"]
+                        ).values_list("dealer__name", "car__car_model", "amount")
+                    )
+                )
+                transaction.set_rollback(True)
+
+        assert markets[0] == markets[1]
+
+    def test_market_history_rollup(self):
+        """
+        Checking whether deals history is added to daily rollup.
+        """
+        SyntheticMarket(2, 2, 10, 5, offers=5).create()
+
+        assert sum(
+            CustomerDealsDailyStats.objects.values_list("amount", flat=True)
+        ) == sum(CustomerDealsHistory.objects.values_list("amount", flat=True))
+
+    def test_measure(self):
+        """
+        Checking whether every benchmark is measured and its changes are rolled back.
+        """
+        market = SyntheticMarket(2, 2, 10, 5, offers=5).create()
+        amounts = list(DealerStockItem.objects.values_list("pk", "amount"))
+
+        for name, benchmark in BENCHMARKS.items():
+            run, items = benchmark(market)
+            result = measure(run, repeat=1)
+            assert items > 0
+            assert result["min_seconds"] > 0
+            assert result["peak_memory_kb"] >= 0
+
+        assert list(DealerStockItem.objects.values_list("pk", "amount")) == amounts
+
+
+def test_compare_results():
+    """
+    Checking whether slower run or more queries than baseline is regression.
+    """
+    baseline = [
+        {"benchmark": "a", "scale": "small", "min_seconds": 1.0, "queries": 5},
+        {"benchmark": "b", "scale": "small", "min_seconds": 1.0, "queries": 5},
+    ]
+    results = [
+        {"benchmark": "a", "scale": "small", "min_seconds": 1.1, "queries": 5},
+        {"benchmark": "b", "scale": "small", "min_seconds": 0.5, "queries": 6},
+        {"benchmark": "c", "scale": "small", "min_seconds": 0.5, "queries": 6},
+    ]
+
+    compared = compare_results(results, baseline, threshold=1.2)
+
+    assert [item.get("regression") for item in compared] == [False, True, None]
+    assert compared[0]["time_ratio"] == pytest.approx(1.1)
+
+
+@pytest.mark.django_db
+def test_run_benchmarks_command(tmp_path):
+    """
+    Checking whether command prints JSON result of every benchmark and writes it to file.
+    """
+    output = tmp_path / "results.jsonl"
+    out = StringIO()
+    call_command(
+        "run_benchmarks",
+        "--scales",
+        "small",
+        "--repeat",
+        "1",
+        "--output",
+        str(output),
+        stdout=out,
+    )
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [result["benchmark"] for result in results] == list(BENCHMARKS)
+    assert output.read_text().splitlines() == out.getvalue().splitlines()
@@ -0,0 +1,97 @@
+import pytest
+from ddf import G
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from cars.models import Car
+from marketing.models import DealerMarketingCampaign
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "/api/v1/cars/",
+            "/api/v1/cars/characteristics/",
+            "/api/v1/marketing/dealers/campaigns/",
+            "/api/v1/marketing/suppliers/campaigns/",
+        ],
+    )
+    def test_cached_list_doesnt_query_database(self, api_client, url):
+        """
+        Checking whether repeated request with the same params is served from cache.
+        """
+        G(Car)
+        response = api_client.get(url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached_response = api_client.get(url)
+            assert len(ctx.captured_queries) == 0
+        assert cached_response.data == response.data
+        assert cached_response["ETag"] == response["ETag"]
+
+    def test_normalized_params_share_cache_entry(self, api_client):
+        """
+        Checking whether params order and empty params don't change cache key.
+        """
+        G(Car, brand="Brand1", year_release=2015)
+        response = api_client.get(
+            "/api/v1/cars/?year_release__gt=2010&brand__iexact=Brand1&search="
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached_response = api_client.get(
+                "/api/v1/cars/?brand__iexact=Brand1&year_release__gt=2010"
+            )
+            assert len(ctx.captured_queries) == 0
+        assert cached_response.data == response.data
+        assert len(response.data) == 1
+
+    def test_etag_not_modified(self, api_client):
+        """
+        Checking whether request with current ETag gets 304 without body.
+        """
+        car = G(Car)
+        url = f"/api/v1/cars/{car.pk}/"
+        etag = api_client.get(url)["ETag"]
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        assert not response.content
+
+    @pytest.mark.enable_signals
+    def test_car_change_invalidates_cache(self, api_client):
+        """
+        Checking whether car change invalidates cars and campaigns with cars.
+        """
+        car = G(Car, brand="Brand1")
+        campaign = G(DealerMarketingCampaign, cars=[car])
+        car_url = f"/api/v1/cars/{car.pk}/"
+        campaign_url = f"/api/v1/marketing/dealers/campaigns/{campaign.pk}/"
+        car_etag = api_client.get(car_url)["ETag"]
+        campaign_etag = api_client.get(campaign_url)["ETag"]
+
+        car.brand = "Brand2"
+        car.save()
+
+        response = api_client.get(car_url, HTTP_IF_NONE_MATCH=car_etag)
+        assert response.status_code == 200
+        assert response.data["brand"] == "Brand2"
+        response = api_client.get(campaign_url, HTTP_IF_NONE_MATCH=campaign_etag)
+        assert response.status_code == 200
+        assert response.data["cars"][0]["brand"] == "Brand2"
+
+    def test_campaign_cars_change_invalidates_cache(self, api_client):
+        """
+        Checking whether adding car to campaign invalidates cached campaigns.
+        """
+        campaign = G(DealerMarketingCampaign)
+        url = "/api/v1/marketing/dealers/campaigns/"
+        assert api_client.get(url).data[0]["cars"] == []
+
+        campaign.cars.add(G(Car))
+
+        assert len(api_client.get(url).data[0]["cars"]) == 1
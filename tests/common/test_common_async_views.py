@@ -0,0 +1,199 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from ddf import G
+from django.test import AsyncClient
+from rest_framework import status
+
+from cars.models import Car, CarCharacteristic
+from common.instrumentation import VIEW, metrics
+from common.middleware import InstrumentationMiddleware
+from customers.models import Customer
+from dealers.models import Dealer, DealerStockItem
+from marketing.models import DealerMarketingCampaign
+from orders.models import CustomerDealsHistory
+from users.models import UserProfile
+
+ASGI_URLCONF = "car_dealership.asgi_urls"
+
+
+@pytest.fixture
+def read_data() -> dict:
+    """
+    Fixture with catalog, stock, campaigns and deals history.
+    """
+    cars = [G(Car) for _ in range(3)]
+    dealer = G(Dealer)
+    customer = G(Customer)
+    campaign = G(DealerMarketingCampaign, dealer=dealer)
+    campaign.cars.set(cars[:2])
+    for car in cars:
+        G(CarCharacteristic, brand=car.brand)
+        G(DealerStockItem, dealer=dealer, car=car)
+        G(CustomerDealsHistory, dealer=dealer, customer=customer, car=car)
+    return {"cars": cars, "dealer": dealer, "campaign": campaign}
+
+
+@async_to_sync
+async def collect(content) -> list:
+    return [chunk async for chunk in content]
+
+
+def sync_and_async(api_client, settings, url: str, **params):
+    """
+    Function to get responses of the same request from sync and async view.
+    """
+    sync_response = api_client.get(url, data=params)
+    # resolver match is lazy, so it's resolved before urlconf is changed
+    assert not iscoroutinefunction(sync_response.resolver_match.func)
+    settings.ROOT_URLCONF = ASGI_URLCONF
+    async_response = api_client.get(url, data=params)
+    assert iscoroutinefunction(async_response.resolver_match.func)
+    return sync_response, async_response
+
+
+@pytest.mark.django_db
+class TestAsyncReadViews:
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "/api/v1/cars/",
+            "/api/v1/cars/characteristics/",
+            "/api/v1/dealers/stock/",
+            "/api/v1/suppliers/stock/",
+            "/api/v1/marketing/dealers/campaigns/",
+            "/api/v1/orders/customers",
+        ],
+    )
+    def test_list_same_as_sync(self, api_client, settings, read_data, url):
+        """
+        Checking whether async views list the same data as sync views.
+        """
+        sync_response, async_response = sync_and_async(api_client, settings, url)
+
+        assert async_response.status_code == status.HTTP_200_OK
+        assert async_response.json() == sync_response.json()
+
+    def test_retrieve_same_as_sync(self, api_client, settings, read_data):
+        """
+        Checking whether async views retrieve the same object as sync views.
+        """
+        campaign = read_data["campaign"]
+        sync_response, async_response = sync_and_async(
+            api_client, settings, f"/api/v1/marketing/dealers/campaigns/{campaign.pk}/"
+        )
+
+        assert async_response.status_code == status.HTTP_200_OK
+        assert async_response.json() == sync_response.json()
+        assert len(async_response.json()["cars"]) == 2
+
+    def test_retrieve_not_found(self, api_client, settings):
+        """
+        Checking whether missing object isn't found by async view.
+        """
+        settings.ROOT_URLCONF = ASGI_URLCONF
+
+        response = api_client.get("/api/v1/dealers/stock/0/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_keyset_pages_same_as_sync(self, api_client, settings, read_data):
+        """
+        Checking whether async history view paginates as sync view.
+        """
+        sync_response, async_response = sync_and_async(
+            api_client,
+            settings,
+            f"/api/v1/orders/dealers/{read_data['dealer'].pk}/customers",
+            page_size=2,
+        )
+
+        assert async_response.json() == sync_response.json()
+        assert len(async_response.json()["results"]) == 2
+        assert async_response.json()["next"]
+
+    def test_ndjson_export(self, api_client, settings, read_data):
+        """
+        Checking whether async history view streams the whole list as NDJSON.
+        """
+        settings.ROOT_URLCONF = ASGI_URLCONF
+
+        response = api_client.get(
+            f"/api/v1/orders/dealers/{read_data['dealer'].pk}/customers",
+            data={"export": "ndjson"},
+        )
+        rows = [json.loads(line) for line in collect(response.streaming_content)]
+
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert len(rows) == 3
+
+    def test_catalog_cache(self, api_client, settings, read_data):
+        """
+        Checking whether async catalog views use catalog cache and ETag.
+        """
+        settings.ROOT_URLCONF = ASGI_URLCONF
+
+        first = api_client.get("/api/v1/cars/")
+        Car.objects.filter(pk=read_data["cars"][0].pk).update(brand="changed")
+        cached = api_client.get("/api/v1/cars/")
+        not_modified = api_client.get("/api/v1/cars/", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        assert cached.json() == first.json()
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_write_not_allowed(self, api_client, settings):
+        """
+        Checking whether async views don't handle writes.
+        """
+        settings.ROOT_URLCONF = ASGI_URLCONF
+        api_client.force_authenticate(G(UserProfile, role=UserProfile.DEALER))
+
+        response = api_client.post("/api/v1/cars/", data={})
+
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+    @pytest.mark.enable_permissions
+    def test_permissions(self, api_client, settings, read_data):
+        """
+        Checking whether permissions are checked by async views.
+        """
+        settings.ROOT_URLCONF = ASGI_URLCONF
+
+        response = api_client.get(
+            f"/api/v1/orders/dealers/{read_data['dealer'].pk}/customers"
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_async_instrumentation(rf, read_data):
+    """
+    Checking whether queries of async views are measured.
+    """
+
+    async def view(request):
+        request.resolver_match = type("Match", (), {"route": "async"})()
+        return [car async for car in Car.objects.all()]
+
+    middleware = InstrumentationMiddleware(view)
+
+    cars = async_to_sync(middleware)(rf.get("/"))
+
+    assert len(cars) == 3
+    assert metrics.snapshot()[(VIEW, "GET async")]["queries_total"] == 1
+
+
+@pytest.mark.django_db
+def test_async_client(settings, read_data):
+    """
+    Checking whether async views are served through async middlewares chain.
+    """
+    settings.ROOT_URLCONF = ASGI_URLCONF
+
+    response = async_to_sync(AsyncClient().get)("/api/v1/dealers/stock/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 3
+    assert metrics.snapshot()[(VIEW, "GET api/v1/dealers/stock/")]["queries_total"]
@@ -0,0 +1,287 @@
+import json
+
+import pytest
+from ddf import G
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
+from django.db import DatabaseError, connection
+from rest_framework import status
+
+from cars.models import Car
+from common.bulk_import import CSV, NDJSON, read_rows
+from common.cache import SUPPLIER_MARKET, get_generations
+from dealers.models import DealerStockItem
+from marketing.importers import DEALER_CAMPAIGNS_IMPORT
+from marketing.models import DealerMarketingCampaign, SupplierDiscount
+from suppliers.importers import SUPPLIER_STOCK_IMPORT
+from suppliers.models import SupplierStockItem
+
+
+def csv_rows(*lines: str) -> list:
+    return list(read_rows(lines, CSV))
+
+
+def ndjson_rows(*rows) -> list:
+    return list(read_rows((json.dumps(row) for row in rows), NDJSON))
+
+
+@pytest.mark.django_db
+class TestBulkImport:
+    def test_upsert(self, specific_supplier):
+        """
+        Checking whether rows without id are created and rows with id are updated.
+        """
+        cars = [G(Car) for _ in range(2)]
+        item = G(SupplierStockItem, supplier=specific_supplier, car=cars[0], amount=1)
+
+        report = SUPPLIER_STOCK_IMPORT.run(
+            csv_rows(
+                "id,car_id,amount,price_per_one",
+                f"{item.pk},{cars[0].pk},5,100",
+                f",{cars[1].pk},7,200",
+            ),
+            company_id=specific_supplier.pk,
+        )
+        item.refresh_from_db()
+        created = SupplierStockItem.objects.exclude(pk=item.pk).get()
+
+        assert report == {"created": 1, "updated": 1, "errors": []}
+        assert (item.amount, item.price_per_one) == (5, 100)
+        assert (created.supplier, created.car, created.amount) == (
+            specific_supplier,
+            cars[1],
+            7,
+        )
+
+    def test_row_errors(self, specific_supplier, other_supplier):
+        """
+        Checking whether invalid rows are reported and valid rows of the batch are imported.
+        """
+        car = G(Car)
+        others_item = G(SupplierStockItem, supplier=other_supplier, car=car)
+
+        report = SUPPLIER_STOCK_IMPORT.run(
+            ndjson_rows(
+                {"car_id": car.pk, "amount": 1, "price_per_one": 10},
+                {"car_id": car.pk, "amount": -1, "price_per_one": 10},
+                {"car_id": 0, "amount": 1, "price_per_one": 10},
+                {
+                    "id": others_item.pk,
+                    "car_id": car.pk,
+                    "amount": 1,
+                    "price_per_one": 1,
+                },
+                {"car_id": car.pk},
+            )
+            + [(6, None)],
+            company_id=specific_supplier.pk,
+        )
+
+        assert report["created"] == 1
+        assert [
+            (error["row"], list(error["errors"])) for error in report["errors"]
+        ] == [
+            (2, ["amount"]),
+            (3, ["car_id"]),
+            (4, ["id"]),
+            (5, ["amount", "price_per_one"]),
+            (6, ["row"]),
+        ]
+        assert specific_supplier.stock.count() == 1
+
+    def test_repeated_id(self, specific_supplier):
+        """
+        Checking whether rows repeating id of previous row in batch are reported.
+        """
+        car = G(Car)
+        item = G(SupplierStockItem, supplier=specific_supplier, car=car, amount=1)
+        row = {"id": item.pk, "car_id": car.pk, "price_per_one": 10}
+
+        report = SUPPLIER_STOCK_IMPORT.run(
+            ndjson_rows({**row, "amount": 2}, {**row, "amount": 3}),
+            company_id=specific_supplier.pk,
+        )
+        item.refresh_from_db()
+
+        assert report["updated"] == 1
+        assert report["errors"] == [
+            {
+                "row": 2,
+                "errors": {
+                    "id": [f"Object with id {item.pk} is repeated in the batch."]
+                },
+            }
+        ]
+        assert item.amount == 2
+
+    def test_batch_queries(self, specific_supplier):
+        """
+        Checking whether amount of queries doesn't depend on amount of rows in batch.
+        """
+        cars = [G(Car) for _ in range(10)]
+        rows = ndjson_rows(
+            *({"car_id": car.pk, "amount": 1, "price_per_one": 10} for car in cars)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            report = SUPPLIER_STOCK_IMPORT.run(rows, company_id=specific_supplier.pk)
+
+        assert report["created"] == 10
+        # supplier, cars, ids from sequence, upsert, savepoint and its release
+        assert len(queries) == 6
+
+    def test_batches(self, specific_supplier):
+        """
+        Checking whether rows are imported in batches with continuous row numbers.
+        """
+        car = G(Car)
+        rows = ndjson_rows(
+            *({"car_id": car.pk, "amount": 1, "price_per_one": 10} for _ in range(4)),
+            {"car_id": car.pk},
+        )
+
+        report = SUPPLIER_STOCK_IMPORT.run(
+            rows, company_id=specific_supplier.pk, batch_size=2
+        )
+
+        assert report["created"] == 4
+        assert [error["row"] for error in report["errors"]] == [5]
+
+    def test_campaign_cars(self, specific_dealer):
+        """
+        Checking whether cars of imported campaigns are replaced.
+        """
+        cars = [G(Car) for _ in range(3)]
+        campaign = G(DealerMarketingCampaign, dealer=specific_dealer)
+        campaign.cars.set(cars[:2])
+        dates = "2023-09-15T14:30:00Z,2023-10-15T14:30:00Z"
+
+        report = DEALER_CAMPAIGNS_IMPORT.run(
+            csv_rows(
+                "id,name,description,percentage,start_date,end_date,cars",
+                f"{campaign.pk},Spring,Sale,5.5,{dates},{cars[2].pk}",
+                f",Summer,Sale,3,{dates},{cars[0].pk};{cars[1].pk}",
+            ),
+            company_id=specific_dealer.pk,
+        )
+        created = DealerMarketingCampaign.objects.get(name="Summer")
+
+        assert report["errors"] == []
+        assert list(campaign.cars.all()) == [cars[2]]
+        assert set(created.cars.all()) == set(cars[:2])
+
+    def test_cache_invalidated(self, specific_supplier):
+        """
+        Checking whether cached suppliers market is invalidated after import.
+        """
+        generation = get_generations([SUPPLIER_MARKET])
+
+        SUPPLIER_STOCK_IMPORT.run(
+            ndjson_rows({"car_id": G(Car).pk, "amount": 1, "price_per_one": 10}),
+            company_id=specific_supplier.pk,
+        )
+
+        assert get_generations([SUPPLIER_MARKET]) != generation
+
+    def test_cache_invalidated_on_failed_batch(self, specific_supplier, monkeypatch):
+        """
+        Checking whether cache is invalidated when a batch fails after imported ones.
+        """
+        car = G(Car)
+        generation = get_generations([SUPPLIER_MARKET])
+        import_batch = SUPPLIER_STOCK_IMPORT.import_batch
+        batches = []
+
+        def failing_import_batch(batch, company_id=None):
+            batches.append(batch)
+            if len(batches) > 1:
+                raise DatabaseError("batch failed")
+            return import_batch(batch, company_id)
+
+        monkeypatch.setattr(SUPPLIER_STOCK_IMPORT, "import_batch", failing_import_batch)
+
+        with pytest.raises(DatabaseError):
+            SUPPLIER_STOCK_IMPORT.run(
+                ndjson_rows(
+                    *({"car_id": car.pk, "amount": 1, "price_per_one": 10},) * 2
+                ),
+                company_id=specific_supplier.pk,
+                batch_size=1,
+            )
+
+        assert specific_supplier.stock.count() == 1
+        assert get_generations([SUPPLIER_MARKET]) != generation
+
+
+@pytest.mark.django_db
+class TestBulkImportEndpoint:
+    def test_import_stock(self, api_client, specific_dealer):
+        """
+        Checking whether uploaded stock is imported to request user's dealer.
+        """
+        car = G(Car)
+        api_client.force_authenticate(user=specific_dealer.user_profile)
+        upload = SimpleUploadedFile(
+            "stock.csv",
+            f"car_id,amount,price_per_one,dealer_id\n{car.pk},3,100,0\n".encode(),
+        )
+
+        response = api_client.post(
+            "/api/v1/dealers/stock/import/", {"file": upload}, format="multipart"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"created": 1, "updated": 0, "errors": []}
+        assert DealerStockItem.objects.get().dealer == specific_dealer
+
+    def test_import_unknown_format(self, api_client, specific_dealer):
+        """
+        Checking whether files of unsupported format aren't imported.
+        """
+        api_client.force_authenticate(user=specific_dealer.user_profile)
+        upload = SimpleUploadedFile("stock.xlsx", b"")
+
+        response = api_client.post(
+            "/api/v1/dealers/stock/import/", {"file": upload}, format="multipart"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.enable_permissions
+    def test_import_by_other_role(self, api_client, specific_dealer):
+        """
+        Checking whether dealers can't import suppliers' discounts.
+        """
+        api_client.force_authenticate(user=specific_dealer.user_profile)
+        upload = SimpleUploadedFile("discounts.ndjson", b"{}\n")
+
+        response = api_client.post(
+            "/api/v1/marketing/suppliers/discounts/import/",
+            {"file": upload},
+            format="multipart",
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_import_command(tmp_path, specific_supplier, capsys):
+    """
+    Checking whether command imports rows of every company and prints errors.
+    """
+    data_file = tmp_path / "discounts.ndjson"
+    row = {"supplier_id": specific_supplier.pk, "name": "Bulk", "min_amount": 5}
+    rows = [{**row, "percentage": 10}, row]
+    data_file.write_text("\n".join(json.dumps(row) for row in rows))
+
+    call_command("bulk_import", "supplier_discounts", str(data_file))
+    output = capsys.readouterr()
+
+    assert "created 1, updated 0, invalid rows 1" in output.out
+    assert json.loads(output.err) == {
+        "row": 2,
+        "errors": {"percentage": ["This field is required."]},
+    }
+    assert specific_supplier.discounts.filter(name="Bulk").exists()
+    assert SupplierDiscount.objects.filter(name="Bulk").count() == 1
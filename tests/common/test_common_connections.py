@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from django.db import connection
+
+from common.signals import task_connections_handler, worker_process_started_handler
+from orders.tasks import handle_customer_offer
+
+
+@pytest.fixture
+def open_connection():
+    connection.ensure_connection()
+    yield connection
+    connection.close_at = None
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTaskConnections:
+    def test_connection_reused(self, open_connection):
+        """
+        Checking whether persistent connection is reused by the next task.
+        """
+        raw_connection = open_connection.connection
+
+        task_connections_handler(task=handle_customer_offer)
+
+        assert open_connection.connection is raw_connection
+        assert not open_connection.health_check_done
+
+    def test_obsolete_connection_closed(self, open_connection):
+        """
+        Checking whether connection older than CONN_MAX_AGE is closed after task.
+        """
+        open_connection.close_at = time.monotonic() - 1
+
+        task_connections_handler(task=handle_customer_offer)
+
+        assert open_connection.connection is None
+
+    def test_eager_task_connection_kept(self, open_connection):
+        """
+        Checking whether connection of eagerly applied task isn't closed.
+        """
+        open_connection.close_at = time.monotonic() - 1
+        handle_customer_offer.push_request(is_eager=True)
+        try:
+            task_connections_handler(task=handle_customer_offer)
+        finally:
+            handle_customer_offer.pop_request()
+
+        assert open_connection.connection is not None
+
+    def test_worker_process_connections_closed(self, open_connection):
+        """
+        Checking whether forked worker process doesn't reuse parent's connection.
+        """
+        worker_process_started_handler()
+
+        assert open_connection.connection is None
+
+
+def test_asgi_connection_per_request():
+    """
+    Checking whether ASGI application doesn't reuse connections whatever environment is.
+    """
+    code = (
+        "import car_dealership.asgi;"
+        "from django.conf import settings;"
+        "print(settings.DATABASES['default']['CONN_MAX_AGE'], settings.ROOT_URLCONF)"
+    )
+    environment = {**os.environ, "DB_CONN_MAX_AGE": "60", "ROOT_URLCONF": "x.urls"}
+
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    assert output.split() == ["0", "car_dealership.asgi_urls"]
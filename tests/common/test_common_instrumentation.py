@@ -0,0 +1,193 @@
+import json
+
+import pytest
+from ddf import G
+from django.test import RequestFactory
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common.instrumentation import TASK, VIEW, Measurement, metrics
+from common.views import PROMETHEUS_CONTENT_TYPE, metrics_view
+from customers.models import Customer
+from orders.models import CustomerDealsHistory, CustomerOffer
+from orders.tasks import handle_customer_offer
+
+DEALS_ENDPOINT = "GET api/v1/orders/customers"
+
+# (role of request user, url, view name) of every view with query budget
+TOKEN_REQUESTS = [
+    ("customer", "/api/v1/orders/customers", DEALS_ENDPOINT),
+    ("customer", "/api/v1/orders/customers/offers", f"{DEALS_ENDPOINT}/offers"),
+    ("dealer", "/api/v1/orders/dealers/offers", "GET api/v1/orders/dealers/offers"),
+    *(
+        ("dealer", f"/api/v1/orders/dealers/{{pk}}/{path}", name)
+        for path, name in [
+            ("customers", "GET api/v1/orders/dealers/<int:pk>/customers"),
+            ("customers/total", "GET api/v1/orders/dealers/<int:pk>/customers/total"),
+            ("suppliers", "GET api/v1/orders/dealers/<int:pk>/suppliers"),
+            ("suppliers/total", "GET api/v1/orders/dealers/<int:pk>/suppliers/total"),
+        ]
+    ),
+    *(
+        ("supplier", f"/api/v1/orders/suppliers/{{pk}}/{path}", name)
+        for path, name in [
+            ("dealers", "GET api/v1/orders/suppliers/<int:pk>/dealers"),
+            ("total/dealers", "GET api/v1/orders/suppliers/<int:pk>/total/dealers"),
+        ]
+    ),
+    *(
+        (
+            role,
+            f"/api/v1/stats/{role}s/{{pk}}?stats=all",
+            f"GET api/v1/stats/{role}s/<int:pk>",
+        )
+        for role in ["customer", "dealer", "supplier"]
+    ),
+    *(
+        (
+            role,
+            f"/api/v1/stats/{role}s/{{pk}}/series?stats=revenue",
+            f"GET api/v1/stats/{role}s/<int:pk>/series",
+        )
+        for role in ["dealer", "supplier"]
+    ),
+    ("dealer", "/api/v1/dealers/", "GET api/v1/dealers/$"),
+    (
+        "dealer",
+        "/api/v1/marketing/dealers/campaigns/",
+        "GET api/v1/marketing/dealers/campaigns/$",
+    ),
+    (
+        "supplier",
+        "/api/v1/marketing/suppliers/campaigns/",
+        "GET api/v1/marketing/suppliers/campaigns/$",
+    ),
+]
+
+
+@pytest.fixture
+def deals_history():
+    customer = G(Customer)
+    return [G(CustomerDealsHistory, customer=customer) for _ in range(3)]
+
+
+@pytest.mark.django_db
+class TestInstrumentation:
+    def test_view_metrics(self, api_client, deals_history):
+        """
+        Checking whether queries, database, serialization and total time
+        of resolved endpoint are recorded.
+        """
+        api_client.get("/api/v1/orders/customers")
+        api_client.get("/api/v1/orders/customers")
+        api_client.get("/api/v1/orders/missing")
+
+        snapshot = metrics.snapshot()
+        endpoint_metrics = snapshot[(VIEW, DEALS_ENDPOINT)]
+
+        assert list(snapshot) == [(VIEW, DEALS_ENDPOINT)]
+        assert endpoint_metrics["calls_total"] == 2
+        assert endpoint_metrics["queries_total"] == 2
+        assert endpoint_metrics["max_queries"] == 1
+        assert endpoint_metrics["serialization_seconds_total"] > 0
+        assert endpoint_metrics["latency_seconds_total"] > (
+            endpoint_metrics["db_seconds_total"]
+            + endpoint_metrics["serialization_seconds_total"]
+        )
+
+    def test_query_budget_exceeded(self, api_client, deals_history, settings):
+        """
+        Checking whether calls exceeding query budget are recorded as violations.
+        """
+        settings.QUERY_BUDGETS = {DEALS_ENDPOINT: 0}
+
+        api_client.get("/api/v1/orders/customers")
+
+        violations = list(metrics.violations)
+        # violations fail tests, so they are cleared after checking
+        metrics.reset()
+        assert [(call["name"], call["queries"]) for call in violations] == [
+            (DEALS_ENDPOINT, 1)
+        ]
+
+    def test_json_log(self, api_client, deals_history, settings, tmp_path):
+        """
+        Checking whether every call is appended to JSON log.
+        """
+        settings.METRICS_JSON_LOG = tmp_path / "metrics.jsonl"
+
+        api_client.get("/api/v1/orders/customers")
+        api_client.get("/api/v1/orders/customers")
+
+        calls = [json.loads(line) for line in open(settings.METRICS_JSON_LOG)]
+        assert [(call["kind"], call["name"]) for call in calls] == [
+            (VIEW, DEALS_ENDPOINT)
+        ] * 2
+        assert calls[0]["queries"] == 1
+        assert calls[0]["query_budget"] == 2
+
+    @pytest.mark.enable_permissions
+    @pytest.mark.parametrize("role, url, name", TOKEN_REQUESTS)
+    def test_query_budget_with_token(
+        self,
+        api_client,
+        specific_customer,
+        specific_dealer,
+        specific_supplier,
+        settings,
+        role,
+        url,
+        name,
+    ):
+        """
+        Checking whether query budgets hold for requests authenticated by JWT.
+        """
+        company = {
+            "customer": specific_customer,
+            "dealer": specific_dealer,
+            "supplier": specific_supplier,
+        }[role]
+        token = RefreshToken.for_user(company.user_profile).access_token
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = api_client.get(url.format(pk=company.pk))
+        if response.streaming:
+            b"".join(response.streaming_content)
+
+        assert response.status_code == status.HTTP_200_OK
+        endpoint_metrics = metrics.snapshot()[(VIEW, name)]
+        assert 0 < endpoint_metrics["max_queries"] <= settings.QUERY_BUDGETS[name]
+
+    def test_task_metrics(self):
+        """
+        Checking whether queries of celery tasks are recorded.
+        """
+        offer = G(CustomerOffer, is_closed=True)
+
+        handle_customer_offer.apply(args=(offer.pk,))
+
+        task_metrics = metrics.snapshot()[(TASK, "orders.tasks.handle_customer_offer")]
+        assert task_metrics["calls_total"] == 1
+        assert task_metrics["queries_total"] == 1
+
+    def test_prometheus_export(self):
+        """
+        Checking whether metrics are exported in Prometheus text format.
+        """
+        measurement = Measurement()
+        measurement.queries = 4
+        metrics.record(VIEW, 'GET "quoted" route', measurement)
+
+        response = metrics_view(RequestFactory().get("/metrics"))
+        lines = response.content.decode().splitlines()
+
+        assert response["Content-Type"] == PROMETHEUS_CONTENT_TYPE
+        assert "# TYPE dealership_queries_total counter" in lines
+        assert (
+            'dealership_queries_total{kind="view",name="GET \\"quoted\\" route"} 4'
+            in lines
+        )
+        assert (
+            'dealership_max_queries{kind="view",name="GET \\"quoted\\" route"} 4'
+            in lines
+        )
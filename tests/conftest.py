@@ -25,6 +25,29 @@ def api_client():
     return APIClient()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Clears cache to prevent cached responses of previous tests.
+    """
+    from django.core.cache import cache
+
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def query_budgets():
+    """
+    Fails tests with views or tasks exceeding their query budgets (settings.QUERY_BUDGETS).
+    """
+    from common.instrumentation import metrics
+
+    metrics.reset()
+    yield
+    if metrics.violations:
+        pytest.fail(f"Query budgets exceeded: {metrics.violations}")
+
+
 @pytest.fixture(autouse=True)
 def mute_signals(request):
     if "enable_signals" in request.keywords:
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import pytest
+
+from orders import offer_events
+
+
+class FakePubSub:
+    """
+    Pub/sub of one channel with messages published after subscription.
+    """
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.channels = []
+        self.closed = False
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        if not self.messages:
+            await asyncio.sleep(timeout)
+            return None
+        return {"type": "message", "data": json.dumps(self.messages.pop(0))}
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeRedis:
+    """
+    Redis client recording published messages.
+    """
+
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+        self.published = []
+
+    def pubsub(self):
+        return self._pubsub
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def fake_redis(settings, monkeypatch):
+    """
+    Fixture to replace sync and async Redis clients of offer events with fake one.
+    Returns function creating the client with pub/sub delivering the given messages.
+    """
+    settings.OFFER_EVENTS_REDIS_URL = "redis://redis:6379/2"
+
+    def make_client(messages=()) -> FakeRedis:
+        client = FakeRedis(FakePubSub(messages))
+        monkeypatch.setattr(offer_events, "_redis_client", lambda url: client)
+        monkeypatch.setattr(offer_events.aioredis.Redis, "from_url", lambda url: client)
+        return client
+
+    return make_client
@@ -1,15 +1,22 @@
 import pytest
 from ddf import G
 
+from django.core.cache import cache
 from django.test.utils import CaptureQueriesContext
 from django.db import connection
 
 from cars.models import Car, CarCharacteristic
+from common.instrumentation import metrics
 from customers.models import Customer
 from dealers.models import Dealer, DealerStockItem
 from marketing.models import DealerDiscount, DealerMarketingCampaign
-from orders.models import CustomerOffer, TotalDealerPurchase
+from orders import offer_events
+from orders.models import CustomerDealsHistory, CustomerOffer, TotalDealerPurchase
 from orders.offer_handler import CustomersOfferHandler
+from orders.offer_profiling import STAGE_SECONDS, STAGE_SELLERS_OUT
+from orders.offer_queue import _offer_key, enqueue_offer, warn_process_local_cache
+from orders.services import DEAL_OFFER_CLOSED, complete_deal_transaction
+from orders.sql_matcher import CustomersOfferSQLMatcher
 from orders.tasks import handle_customer_offer
 from tests.conftest import parse_captured_queries_context
 
@@ -405,16 +412,287 @@ def test_task_customer_purchase(offer_handler_data):
     Test task to handle customer offer.
     """
     customer = offer_handler_data["customer"]
+    offer = offer_handler_data["offer_with_car"]
     with CaptureQueriesContext(connection) as ctx:
-        handle_customer_offer(customer.id)
+        handle_customer_offer(offer.id)
 
         q_select, q_update, q_insert, q_len = parse_captured_queries_context(ctx)
         assert q_select <= 12
-        assert q_update <= 4
-        assert q_insert <= 2
-        assert q_len <= 20
+        # the offer is closed by one more update
+        assert q_update <= 5
+        assert q_insert <= 3
+        assert q_len <= 21
 
     customer.refresh_from_db()
 
     assert customer.balance == 9525
     assert offer_handler_data["choosed_car"] in customer.cars.all()
+    offer.refresh_from_db()
+    assert offer.is_closed
+    assert offer.bought_car == offer_handler_data["choosed_car"]
+    assert offer.car_price == 475
+
+
+@pytest.mark.django_db
+def test_task_characteristic_offer_dealer_without_suitable_stock(offer_handler_data):
+    """
+    Checking whether characteristic offer is handled when some dealers
+    have suitable characteristics, campaigns and discounts
+    but no stock items fitting the offer.
+    """
+    customer = offer_handler_data["customer"]
+    offer = offer_handler_data["offer_with_characteristic"]
+    dealer = G(
+        Dealer,
+        car_characteristics=[G(CarCharacteristic, brand="Brand1")],
+        balance=500000,
+    )
+    G(
+        DealerStockItem,
+        dealer=dealer,
+        car=G(Car, brand="Brand2", car_model="Model2", generation="2"),
+        amount=999,
+        price_per_one=100,
+    )
+    # campaign and discount of the dealer are looked up only for dealers with stock
+    G(
+        DealerMarketingCampaign,
+        dealer=dealer,
+        percentage=50,
+        cars=[offer_handler_data["choosed_car"]],
+    )
+    G(DealerDiscount, dealer=dealer, discount_type="CD", min_amount=1, percentage=50)
+    G(TotalDealerPurchase, dealer=dealer, customer=customer, amount=10)
+
+    handle_customer_offer(offer.id)
+
+    offer.refresh_from_db()
+    assert offer.is_closed
+    assert offer.bought_car == offer_handler_data["choosed_car"]
+    assert offer_handler_data["choosed_car"] in customer.cars.all()
+
+
+@pytest.mark.django_db
+class TestOfferSQLMatcher:
+    @pytest.mark.parametrize(
+        "offer_key", ["offer_with_car", "offer_with_characteristic"]
+    )
+    def test_sql_matcher_same_as_handler(self, offer_handler_data: dict, offer_key):
+        """
+        Checking whether SQL matcher selects the same offer as reference offer handler.
+        """
+        offer = offer_handler_data[offer_key]
+        handler = CustomersOfferHandler(offer, Dealer.objects.prepare_for_offer())
+        handler.process_offer()
+
+        with CaptureQueriesContext(connection) as ctx:
+            matcher = CustomersOfferSQLMatcher(offer)
+            matcher.process_offer()
+            assert len(ctx.captured_queries) <= 3
+
+        assert matcher.purchase_seller == handler.purchase_seller
+        assert matcher.purchase_stock_item == handler.purchase_stock_item
+        assert matcher.purchase_car == offer_handler_data["choosed_car"]
+        assert matcher.purchase_price == handler.purchase_price == 475
+        assert matcher.purchase_discount == handler.purchase_discount
+        assert (
+            matcher.purchase_marketing_campaign == handler.purchase_marketing_campaign
+        )
+
+    def test_sql_matcher_max_price(self, offer_handler_data: dict):
+        """
+        Checking whether SQL matcher declines offers with price greater than max price.
+        """
+        offer = offer_handler_data["offer_with_car"]
+        offer.max_price = 400
+        matcher = CustomersOfferSQLMatcher(offer)
+        matcher.process_offer()
+
+        assert not matcher.purchase_seller
+        assert not matcher.purchase_price
+
+    def test_task_customer_purchase_sql_engine(self, offer_handler_data, settings):
+        """
+        Test task to handle customer offer with SQL matching engine.
+        """
+        settings.OFFER_MATCHING_ENGINE = "sql"
+        customer = offer_handler_data["customer"]
+        handle_customer_offer(offer_handler_data["offer_with_car"].id)
+
+        customer.refresh_from_db()
+        assert customer.balance == 9525
+        assert offer_handler_data["choosed_car"] in customer.cars.all()
+
+
+@pytest.mark.django_db
+class TestOfferQueue:
+    def test_duplicated_enqueues_coalesced(self, offer_handler_data, monkeypatch):
+        """
+        Checking whether offer waiting in queue is not enqueued again.
+        """
+        offer = offer_handler_data["offer_with_car"]
+        offer_ids = []
+        monkeypatch.setattr(handle_customer_offer, "delay", offer_ids.append)
+
+        results = [enqueue_offer(handle_customer_offer, offer) for _ in range(3)]
+
+        assert results == [True, False, False]
+        assert offer_ids == [offer.id]
+
+    def test_offer_enqueued_again_after_handling(self, offer_handler_data, monkeypatch):
+        """
+        Checking whether offer can be enqueued again after its task has finished.
+        """
+        offer = offer_handler_data["offer_with_characteristic"]
+        offer_ids = []
+        monkeypatch.setattr(handle_customer_offer, "delay", offer_ids.append)
+
+        enqueue_offer(handle_customer_offer, offer)
+        handle_customer_offer(offer.id)
+        enqueue_offer(handle_customer_offer, offer)
+
+        assert offer_ids == [offer.id, offer.id]
+
+    def test_offer_handled_once(self, offer_handler_data):
+        """
+        Checking whether redelivered task doesn't pay for closed offer again.
+        """
+        customer = offer_handler_data["customer"]
+        offer = offer_handler_data["offer_with_car"]
+
+        handle_customer_offer(offer.id)
+        handle_customer_offer(offer.id)
+
+        customer.refresh_from_db()
+        assert customer.balance == 9525
+        assert CustomerDealsHistory.objects.filter(customer=customer).count() == 1
+
+    def test_locked_offer_skipped(self, offer_handler_data):
+        """
+        Checking whether offer handled by another worker is skipped.
+        """
+        offer = offer_handler_data["offer_with_car"]
+        cache.add(_offer_key(CustomerOffer, offer.id, "lock"), 1)
+
+        handle_customer_offer(offer.id)
+
+        offer.refresh_from_db()
+        assert not offer.is_closed
+        assert cache.get(_offer_key(CustomerOffer, offer.id, "lock"))
+
+    def test_process_local_lock_warning(self, offer_handler_data, caplog):
+        """
+        Checking whether process-local offer locks are reported once.
+        """
+        offer = offer_handler_data["offer_with_car"]
+        warn_process_local_cache.cache_clear()
+
+        handle_customer_offer(offer.id)
+        handle_customer_offer(offer.id)
+
+        warnings = [
+            record for record in caplog.records if record.name == "orders.offer_queue"
+        ]
+        assert len(warnings) == 1
+        assert "CACHE_REDIS_URL" in warnings[0].getMessage()
+
+    def test_closed_offer_deal_rejected(self, offer_handler_data):
+        """
+        Checking whether deal of already closed offer is rolled back.
+        """
+        customer = offer_handler_data["customer"]
+        offer = offer_handler_data["offer_with_car"]
+        stock_item = offer_handler_data["choosed_dealer"].stock.get(
+            car=offer_handler_data["choosed_car"], price_per_one=500
+        )
+        CustomerOffer.objects.filter(pk=offer.pk).update(is_closed=True)
+
+        result = complete_deal_transaction(
+            buyer=customer,
+            seller=offer_handler_data["choosed_dealer"],
+            car=offer_handler_data["choosed_car"],
+            price=475,
+            stock_item=stock_item,
+            offer=offer,
+        )
+
+        customer.refresh_from_db()
+        assert result == DEAL_OFFER_CLOSED
+        assert customer.balance == 10000
+        assert not offer.bought_car
+
+
+@pytest.mark.django_db
+def test_offer_task_publishes_status(offer_handler_data, fake_redis):
+    """
+    Checking whether offer task publishes status of handled offer.
+    """
+    client = fake_redis()
+    offer = offer_handler_data["offer_with_car"]
+
+    handle_customer_offer(offer.pk)
+
+    assert client.published == [
+        (
+            offer_events.offer_channel(CustomerOffer, offer.pk),
+            {
+                "id": offer.pk,
+                "is_closed": True,
+                "bought_car": offer_handler_data["choosed_car"].pk,
+                "car_price": 475,
+            },
+        )
+    ]
+
+
+@pytest.mark.django_db
+class TestOfferProfiling:
+    def test_offer_stages_trace(self, offer_handler_data, settings):
+        """
+        Checking whether stages of traced offer are attached to the offer
+        and aggregated in metrics without changing suggested offer.
+        """
+        settings.OFFER_PROFILING_ENABLED = True
+        dealers = list(offer_handler_data["dealers"])
+        offer = offer_handler_data["offer_with_car"]
+        handler = CustomersOfferHandler(offer, dealers)
+
+        handler.process_offer()
+
+        assert handler.purchase_price == 475
+        assert [stage[0] for stage in offer.handling_trace] == [
+            "sellers_with_suitable_car_on_stock",
+            "seller_best_stock_item",
+            "seller_suitable_marketing_campaigns",
+            "seller_suitable_discounts",
+            "select_best_offer",
+            "check_max_price",
+        ]
+        _stage, _microseconds, sellers_in, sellers_out, stock_items = (
+            offer.handling_trace[0]
+        )
+        assert (sellers_in, sellers_out) == (len(dealers), 3)
+        assert stock_items == sum(
+            len(data["suitable_stock"]) for data in handler.sellers_data.values()
+        )
+
+        labels = (
+            ("handler", "CustomersOfferHandler"),
+            ("stage", "sellers_with_suitable_car_on_stock"),
+        )
+        assert metrics.histograms(STAGE_SECONDS)[labels].count == 1
+        assert metrics.counters(STAGE_SELLERS_OUT)[labels] == 3
+
+    def test_offer_not_traced(self, offer_handler_data, settings):
+        """
+        Checking whether offers aren't traced if profiling is disabled.
+        """
+        settings.OFFER_PROFILING_ENABLED = False
+        offer = offer_handler_data["offer_with_characteristic"]
+        handler = CustomersOfferHandler(offer, offer_handler_data["dealers"])
+
+        handler.process_offer()
+
+        assert handler.trace is None
+        assert not hasattr(offer, "handling_trace")
+        assert metrics.histograms(STAGE_SECONDS) == {}
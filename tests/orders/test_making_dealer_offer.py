@@ -6,12 +6,15 @@ from django.db import connection
 
 from tests.conftest import parse_captured_queries_context
 from cars.models import Car
+from common.instrumentation import metrics
 from dealers.models import Dealer
+from orders.market import load_supplier_market
 from orders.tasks import handle_dealer_offer
 from suppliers.models import Supplier, SupplierStockItem
 from marketing.models import SupplierDiscount, SupplierMarketingCampaign
 from orders.models import DealerOffer, TotalSupplierPurchase
-from orders.offer_handler import DealerOfferHandler
+from orders.offer_handler import DealerOfferHandler, process_offers
+from orders.offer_profiling import STAGE_SECONDS
 from suppliers.models import Supplier
 
 
@@ -273,22 +276,82 @@ def test_dealer_offer_analyze_perspective_cooperation_cumulative_discount(
     )
 
 
+@pytest.mark.parametrize(
+    "warm_market, max_selects, max_queries", [(False, 13, 23), (True, 5, 17)]
+)
 @pytest.mark.django_db
-def test_task_dealer_purchase(data_for_tests):
+def test_task_dealer_purchase(data_for_tests, warm_market, max_selects, max_queries):
     """
-    Test task to handle customer offer.
+    Test task to handle customer offer with empty and cached suppliers market.
     """
     dealer = data_for_tests["dealer"]
+    if warm_market:
+        # suppliers market is cached by previous tasks
+        load_supplier_market()
     with CaptureQueriesContext(connection) as ctx:
-        handle_dealer_offer(dealer.id)
+        handle_dealer_offer(data_for_tests["offer_CD"].id)
 
         q_select, q_update, q_insert, q_len = parse_captured_queries_context(ctx)
-        assert q_select <= 13
-        assert q_update <= 4
-        assert q_insert <= 2
-        assert q_len <= 23
+        assert q_select <= max_selects
+        # the offer is closed by one more update
+        assert q_update <= 5
+        assert q_insert <= 3
+        assert q_len <= max_queries
 
     dealer.refresh_from_db()
 
     assert dealer.balance == 1450
     assert any(item.car == data_for_tests["choosed_car"] for item in dealer.stock.all())
+
+
+@pytest.mark.django_db
+def test_process_offers_batch(data_for_tests):
+    """
+    Checking whether batch offers processing gives the same results as processing offers one by one.
+    """
+    suppliers = Supplier.objects.pre_order_queryset()
+    offers = [
+        data_for_tests["offer"],
+        data_for_tests["offer_BD"],
+        data_for_tests["offer_CD"],
+    ]
+
+    handlers = process_offers(offers, suppliers)
+
+    assert len(handlers) == len(offers)
+    for offer, batch_handler in zip(offers, handlers):
+        handler = DealerOfferHandler(offer, suppliers)
+        handler.process_offer()
+        assert batch_handler.offer == offer
+        assert batch_handler.purchase_seller == handler.purchase_seller
+        assert batch_handler.purchase_price == handler.purchase_price
+        assert batch_handler.purchase_discount == handler.purchase_discount
+        assert (
+            batch_handler.forecast_cooperation_with_supplier
+            == handler.forecast_cooperation_with_supplier
+        )
+    assert handlers[1].purchase_seller == data_for_tests["choosed_supplier_BD"]
+
+
+@pytest.mark.django_db
+def test_process_offers_traced(data_for_tests, settings):
+    """
+    Checking whether stages of every processed offer are aggregated in histograms.
+    """
+    settings.OFFER_PROFILING_ENABLED = True
+    offers = [data_for_tests["offer"], data_for_tests["offer_CD"]]
+
+    process_offers(offers, Supplier.objects.pre_order_queryset())
+
+    assert all(
+        offer.handling_trace[-2][0] == "analyze_perspective_cooperation"
+        for offer in offers
+    )
+    histogram = metrics.histograms(STAGE_SECONDS)[
+        (("handler", "DealerOfferHandler"), ("stage", "select_best_offer"))
+    ]
+    assert histogram.count == 2
+    assert (
+        'dealership_offer_stage_seconds_count{handler="DealerOfferHandler",'
+        'stage="select_best_offer"} 2' in metrics.prometheus().splitlines()
+    )
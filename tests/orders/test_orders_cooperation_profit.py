@@ -6,6 +6,7 @@ from django.db import connection
 
 from cars.models import Car
 from dealers.models import DealerStockItem
+from orders.market import load_supplier_market
 from orders.tasks import check_cooperation_profitability
 from suppliers.models import Supplier, SupplierStockItem
 from tests.conftest import parse_captured_queries_context
@@ -108,20 +109,29 @@ def init_dealers_data(specific_dealer) -> dict:
     }
 
 
+@pytest.mark.parametrize(
+    "warm_market, max_selects, max_queries", [(False, 13, 15), (True, 9, 11)]
+)
 @pytest.mark.django_db
-def test_check_cooperation_profitability(specific_dealer, init_dealers_data):
+def test_check_cooperation_profitability(
+    specific_dealer, init_dealers_data, warm_market, max_selects, max_queries
+):
     """
-    Test dealer cooperation profitability with suppliers task.
+    Test dealer cooperation profitability with suppliers task
+    with empty and cached suppliers market.
     """
     data = init_dealers_data
+    if warm_market:
+        # suppliers market is cached by previous tasks
+        load_supplier_market()
     with CaptureQueriesContext(connection) as ctx:
         check_cooperation_profitability(specific_dealer.pk)
 
         q_select, q_update, q_insert, q_len = parse_captured_queries_context(ctx)
-        assert q_select <= 13
+        assert q_select <= max_selects
         assert q_update <= 0
         assert q_insert <= 1
-        assert q_len <= 15
+        assert q_len <= max_queries
 
     specific_dealer.refresh_from_db()
     suppliers = specific_dealer.suppliers.all()
@@ -7,7 +7,12 @@ from django.db import connection
 from cars.models import Car
 from customers.models import Customer
 from dealers.models import Dealer, DealerStockItem
-from orders.tasks import run_customer_purchase_with_random_car
+from orders.services import sample_stock_item_pks, stock_item_pk_range
+from orders.tasks import (
+    regular_order_by_customers,
+    run_customer_purchase_with_random_car,
+    run_customers_purchase_with_random_cars,
+)
 from tests.conftest import parse_captured_queries_context
 
 
@@ -62,8 +67,8 @@ class TestRegularOrder:
             q_select, q_update, q_insert, q_len = parse_captured_queries_context(ctx)
             assert q_select <= 9
             assert q_update <= 3
-            assert q_insert <= 3
-            assert q_len <= 19
+            assert q_insert <= 4
+            assert q_len <= 20
 
         dealer = data["dealer1"]
         dealer.refresh_from_db()
@@ -78,3 +83,83 @@ class TestRegularOrder:
         stock1 = data["dealer1_stock_item1"]
         stock1.refresh_from_db()
         assert stock1.amount == 39
+
+    def test_customers_chunk_regular_order(self, customer_regular_order):
+        """
+        Test regular purchasing for chunk of customers with shared dealers.
+        """
+        data = customer_regular_order
+        customer2 = G(Customer, balance=5_000)
+        orders = [
+            (data["customer"].pk, data["choosed_car"].pk, data["max_price"]),
+            (customer2.pk, data["choosed_car"].pk, data["max_price"]),
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            run_customers_purchase_with_random_cars(orders)
+
+            # dealers are loaded once for all customers in chunk
+            q_select, _q_update, _q_insert, _q_len = parse_captured_queries_context(ctx)
+            assert q_select <= 12
+
+        for customer in [data["customer"], customer2]:
+            customer.refresh_from_db()
+            assert customer.balance == 4000
+            assert data["choosed_car"] in customer.cars.all()
+
+        stock1 = data["dealer1_stock_item1"]
+        stock1.refresh_from_db()
+        assert stock1.amount == 38
+
+    @pytest.mark.parametrize("chunk_size", [0, 1, 100])
+    def test_regular_order_by_customers_chunks(
+        self, customer_regular_order, settings, monkeypatch, chunk_size
+    ):
+        """
+        Test splitting customers into tasks with random cars from dealers' stock.
+        """
+        data = customer_regular_order
+        customers = [data["customer"], G(Customer, balance=100), G(Customer, balance=1)]
+        _poor_customer = G(Customer, balance=0)
+        settings.CUSTOMER_ORDERS_CHUNK_SIZE = chunk_size
+
+        orders = []
+        monkeypatch.setattr(
+            run_customer_purchase_with_random_car,
+            "delay",
+            lambda *order: orders.append([tuple(order)]),
+        )
+        monkeypatch.setattr(
+            run_customers_purchase_with_random_cars, "delay", orders.append
+        )
+        regular_order_by_customers()
+
+        expected_chunks = {0: 3, 1: 3, 100: 1}[chunk_size]
+        assert len(orders) == expected_chunks
+
+        stock_items = {
+            (item.car_id, item.price_per_one) for item in DealerStockItem.objects.all()
+        }
+        chunks_orders = [order for chunk in orders for order in chunk]
+        assert {customer_id for customer_id, _car, _price in chunks_orders} == {
+            customer.pk for customer in customers if customer.balance > 0
+        }
+        for _customer_id, car_id, max_price in chunks_orders:
+            assert (car_id, max_price) in stock_items
+
+    def test_sample_stock_item_pks(self, customer_regular_order):
+        """
+        Checking whether sampled primary keys exist and are drawn by one query
+        without loading all stock items.
+        """
+        deleted_item = G(DealerStockItem, dealer=customer_regular_order["dealer1"])
+        last_item = G(DealerStockItem, dealer=customer_regular_order["dealer1"])
+        deleted_item.delete()
+        pk_range = stock_item_pk_range()
+
+        with CaptureQueriesContext(connection) as ctx:
+            pks = sample_stock_item_pks(50, pk_range)
+
+        assert len(ctx) == 1
+        assert len(pks) == 50
+        assert pk_range[1] == last_item.pk
+        assert set(pks) <= set(DealerStockItem.objects.values_list("pk", flat=True))
@@ -193,7 +193,7 @@ def test_deals_history_filters(
         many=True,
     ).data
 
-    assert response.data == serializer_data
+    assert response.data["results"] == serializer_data
 
 
 @pytest.mark.django_db
@@ -393,4 +393,4 @@ def test_offers_filters(
         many=True,
     ).data
 
-    assert response.data == serializer_data
+    assert response.data["results"] == serializer_data
@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+import pytest
+from ddf import G
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from cars.models import Car
+from dealers.models import Dealer, DealerStockItem
+from orders.forecasting import dealer_cars_sales, forecast_stock_purchases
+from orders.models import CustomerDealsHistory
+from orders.services import prepare_stock_data
+
+
+@pytest.fixture
+def forecasting_data(settings) -> dict:
+    """
+    Dealer's stock with deals history of different cars.
+    """
+    settings.SELL_OUT_DAYS = 30
+    settings.AVERAGE_DELIVERY_DAYS = 7
+    dealer = G(Dealer)
+    cars = [G(Car) for _ in range(4)]
+    stock_items = [
+        # sold out car
+        G(DealerStockItem, dealer=dealer, car=cars[0], amount=0),
+        # car with low cover
+        G(DealerStockItem, dealer=dealer, car=cars[1], amount=100),
+        # car with enough cover
+        G(DealerStockItem, dealer=dealer, car=cars[2], amount=5000),
+        # car without sales
+        G(DealerStockItem, dealer=dealer, car=cars[3], amount=1),
+    ]
+    for car, amount in [(cars[0], 5), (cars[0], 5), (cars[1], 20), (cars[2], 30)]:
+        G(CustomerDealsHistory, dealer=dealer, car=car, amount=amount)
+    old_deal = G(CustomerDealsHistory, dealer=dealer, car=cars[3], amount=100)
+    CustomerDealsHistory.objects.filter(pk=old_deal.pk).update(
+        date=timezone.now() - timedelta(days=120)
+    )
+    # deal of another dealer
+    G(CustomerDealsHistory, dealer=G(Dealer), car=cars[1], amount=100)
+
+    return {"dealer": dealer, "cars": cars, "stock_items": stock_items}
+
+
+@pytest.mark.django_db
+class TestForecasting:
+    def test_cars_sales_units(self, forecasting_data):
+        """
+        Checking whether sold cars are summed by car for the period in one query.
+        """
+        dealer = forecasting_data["dealer"]
+        cars = forecasting_data["cars"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            sales = dealer_cars_sales(dealer)
+            assert len(ctx.captured_queries) == 1
+
+        assert {car: total for car, (total, _date) in sales.items()} == {
+            cars[0].pk: 10,
+            cars[1].pk: 20,
+            cars[2].pk: 30,
+        }
+
+    def test_forecast_stock_purchases(self, forecasting_data):
+        """
+        Checking whether only stock items with low cover are restocked
+        for sell out and delivery days.
+        """
+        stock_items = forecasting_data["stock_items"]
+        sales = dealer_cars_sales(forecasting_data["dealer"])
+
+        stock_data = forecast_stock_purchases(stock_items, sales)
+
+        assert stock_data == [
+            {"stock_item": stock_items[0], "amount_to_buy": 37 * 10, "total": 10},
+            # 100 cars cover 5 days of selling 20 cars per day
+            {"stock_item": stock_items[1], "amount_to_buy": 32 * 20, "total": 20},
+        ]
+
+    def test_sales_per_day_from_first_deal(self, forecasting_data):
+        """
+        Checking whether units per day are counted from the first deal of the car.
+        """
+        stock_items = forecasting_data["stock_items"]
+        sales = {stock_items[0].car_id: (60, timezone.now() - timedelta(days=20))}
+
+        stock_data = forecast_stock_purchases(stock_items, sales)
+
+        assert stock_data == [
+            {"stock_item": stock_items[0], "amount_to_buy": 37 * 3, "total": 60}
+        ]
+
+    def test_prepare_stock_data(self, forecasting_data):
+        """
+        Checking whether stock data of dealer with preloaded stock is forecasted with one query.
+        """
+        dealer = Dealer.objects.pre_order_queryset(forecasting_data["dealer"].pk).get()
+
+        with CaptureQueriesContext(connection) as ctx:
+            stock_data = prepare_stock_data(dealer)
+            assert len(ctx.captured_queries) == 1
+
+        assert [item["stock_item"] for item in stock_data] == forecasting_data[
+            "stock_items"
+        ][:2]
+
+    def test_empty_stock(self):
+        """
+        Checking whether dealer without stock items has nothing to buy.
+        """
+        assert forecast_stock_purchases([], {}) == []
@@ -0,0 +1,111 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from ddf import G
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from cars.models import Car
+from commands_manager.management.commands.explain_deals_indexes import (
+    HOT_QUERIES,
+    explain_scans,
+)
+from customers.models import Customer
+from dealers.models import Dealer, DealerStockItem
+from orders.models import CustomerDealsHistory, DealerDealsHistory
+from suppliers.models import Supplier, SupplierStockItem
+
+
+@pytest.fixture
+def hot_queries_data():
+    """
+    Deals history and stock items for hot queries.
+    """
+    cars = [G(Car) for _ in range(3)]
+    dealers = [G(Dealer) for _ in range(3)]
+    suppliers = [G(Supplier) for _ in range(3)]
+    customers = [G(Customer) for _ in range(3)]
+    date = timezone.now() - timedelta(days=10)
+    for index in range(9):
+        G(
+            CustomerDealsHistory,
+            customer=customers[index % 3],
+            dealer=dealers[index % 3],
+            car=cars[index % 3],
+            date=date,
+        )
+        G(
+            DealerDealsHistory,
+            dealer=dealers[index % 3],
+            supplier=suppliers[index % 3],
+            car=cars[index % 3],
+            date=date,
+        )
+        G(DealerStockItem, dealer=dealers[index % 3], car=cars[index % 3], amount=index)
+        G(
+            SupplierStockItem,
+            supplier=suppliers[index % 3],
+            car=cars[index % 3],
+            amount=index,
+        )
+
+
+def competing_indexes(table: str, indexes: list) -> list:
+    """
+    Function to get indexes of the table other than the given and constraints' ones.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT index.relname FROM pg_index "
+            "JOIN pg_class index ON index.oid = pg_index.indexrelid "
+            "JOIN pg_class tab ON tab.oid = pg_index.indrelid "
+            "WHERE tab.relname = %s "
+            "AND NOT pg_index.indisprimary AND NOT pg_index.indisunique",
+            [table],
+        )
+        return [name for name, in cursor.fetchall() if name not in indexes]
+
+
+@pytest.mark.django_db
+class TestDealsIndexes:
+    @pytest.mark.parametrize("name, queryset_factory, indexes", HOT_QUERIES)
+    def test_hot_query_can_use_index(
+        self, hot_queries_data, name, queryset_factory, indexes
+    ):
+        """
+        Checking whether hot query can be served by its index,
+        including partial index conditions.
+        Sequential scans are disabled and other indexes of the table are dropped
+        inside the test transaction, so it doesn't check which plan is chosen
+        on real data, only that the index matches the query.
+        """
+        queryset = queryset_factory()
+        with connection.cursor() as cursor:
+            for index in competing_indexes(queryset.model._meta.db_table, indexes):
+                cursor.execute(f"DROP INDEX {index}")
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        scans = explain_scans(queryset)
+
+        # bitmap heap scan reads table rows found by bitmap index scan
+        assert {target for node, target in scans if "Index" in node} == set(indexes)
+        assert all(node != "Seq Scan" for node, _target in scans)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_explain_deals_indexes_command(hot_queries_data):
+    """
+    Checking whether command explains every hot query without and with indexes.
+    """
+    out = StringIO()
+    call_command("explain_deals_indexes", "--json", stdout=out)
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [result["query"] for result in results] == [
+        name for name, _queryset_factory, _indexes in HOT_QUERIES
+    ]
+    for result in results:
+        dropped_indexes = {target for _node, target in result["without_indexes"]}
+        assert not dropped_indexes & set(result["indexes"])
@@ -0,0 +1,346 @@
+import pytest
+from ddf import G
+
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from cars.models import Car, CarCharacteristic
+from marketing.models import SupplierDiscount, SupplierMarketingCampaign
+from orders.market import CharacteristicIndex, MarketSnapshot, load_supplier_market
+from orders.models import DealerOffer
+from orders.offer_handler import DealerOfferHandler
+from dealers.models import Dealer
+from suppliers.models import Supplier, SupplierStockItem
+
+
+@pytest.fixture
+def market_data() -> dict:
+    """
+    Data for testing market snapshot.
+    """
+    car1 = G(Car, brand="Brand1", car_model="Model1", generation="1")
+    car2 = G(Car, brand="Brand1", car_model="Model2", generation="1")
+
+    supplier1 = G(Supplier)
+    supplier1_stock1 = G(
+        SupplierStockItem, supplier=supplier1, car=car1, amount=10, price_per_one=500
+    )
+    _supplier1_stock2 = G(
+        SupplierStockItem, supplier=supplier1, car=car1, amount=0, price_per_one=100
+    )
+    _supplier1_campaign1 = G(
+        SupplierMarketingCampaign, supplier=supplier1, percentage=5, cars=[car1, car2]
+    )
+    supplier1_campaign2 = G(
+        SupplierMarketingCampaign, supplier=supplier1, percentage=10, cars=[car1]
+    )
+    _supplier1_campaign3 = G(
+        SupplierMarketingCampaign, supplier=supplier1, percentage=0, cars=[car2]
+    )
+
+    supplier2 = G(Supplier)
+    supplier2_stock1 = G(
+        SupplierStockItem, supplier=supplier2, car=car1, amount=10, price_per_one=400
+    )
+    supplier2_stock2 = G(
+        SupplierStockItem, supplier=supplier2, car=car2, amount=10, price_per_one=400
+    )
+    _supplier2_removed_stock = G(
+        SupplierStockItem,
+        supplier=supplier2,
+        car=car1,
+        amount=10,
+        price_per_one=100,
+        is_active=False,
+    )
+
+    return {
+        "car1": car1,
+        "car2": car2,
+        "supplier1": supplier1,
+        "supplier2": supplier2,
+        "supplier1_stock1": supplier1_stock1,
+        "supplier1_campaign2": supplier1_campaign2,
+        "supplier2_stock1": supplier2_stock1,
+        "supplier2_stock2": supplier2_stock2,
+    }
+
+
+@pytest.mark.django_db
+class TestMarketSnapshot:
+    def test_stock_for_car(self, market_data: dict):
+        """
+        Checking whether snapshot collects only active stock items with positive amount by car.
+        """
+        data = market_data
+        snapshot = MarketSnapshot(Supplier.objects.pre_order_queryset())
+
+        stock = snapshot.stock_for_car(data["car1"].pk)
+        assert stock == {
+            data["supplier1"].pk: [data["supplier1_stock1"]],
+            data["supplier2"].pk: [data["supplier2_stock1"]],
+        }
+        assert snapshot.stock_for_car(0) == {}
+
+    def test_stock_for_car_skips_sold_out_items(self, market_data: dict):
+        """
+        Checking whether stock items sold out after snapshot creation are skipped.
+        """
+        data = market_data
+        snapshot = MarketSnapshot(Supplier.objects.pre_order_queryset())
+        stock_item = snapshot.stock_for_car(data["car2"].pk)[data["supplier2"].pk][0]
+        stock_item.amount = 0
+
+        assert snapshot.stock_for_car(data["car2"].pk) == {}
+
+    def test_best_campaign(self, market_data: dict):
+        """
+        Checking whether snapshot picks up the campaign with the biggest percentage.
+        """
+        data = market_data
+        snapshot = MarketSnapshot(Supplier.objects.pre_order_queryset())
+        supplier1 = data["supplier1"]
+
+        assert (
+            snapshot.best_campaign(supplier1.pk, data["car1"].pk)
+            == data["supplier1_campaign2"]
+        )
+        assert snapshot.best_campaign_percentage(supplier1.pk, data["car2"].pk) == 5
+        assert not snapshot.best_campaign(data["supplier2"].pk, data["car1"].pk)
+
+    def test_best_campaign_by_characteristic(self, market_data: dict):
+        """
+        Checking whether snapshot picks up the best campaign by car characteristic.
+        """
+        data = market_data
+        snapshot = MarketSnapshot(Supplier.objects.pre_order_queryset())
+        characteristic = G(CarCharacteristic, brand="Brand1", car_model="Model2")
+
+        campaign = snapshot.best_campaign_by_characteristic(
+            data["supplier1"].pk, characteristic
+        )
+        assert campaign.percentage == 5
+
+    def test_best_discount(self, market_data: dict):
+        """
+        Checking whether snapshot picks up the best discount by discount tiers.
+        """
+        supplier = market_data["supplier2"]
+        _discount_cd1 = G(
+            SupplierDiscount,
+            supplier=supplier,
+            discount_type="CD",
+            min_amount=5,
+            percentage=3,
+        )
+        discount_cd2 = G(
+            SupplierDiscount,
+            supplier=supplier,
+            discount_type="CD",
+            min_amount=20,
+            percentage=10,
+        )
+        discount_bd = G(
+            SupplierDiscount,
+            supplier=supplier,
+            discount_type="BD",
+            min_amount=10,
+            percentage=7,
+        )
+        snapshot = MarketSnapshot(Supplier.objects.pre_order_queryset())
+
+        assert snapshot.best_discount(supplier.pk, total_purchases=4) is None
+        assert snapshot.best_discount(supplier.pk, total_purchases=5).percentage == 3
+        assert snapshot.best_discount(supplier.pk, total_purchases=50) == discount_cd2
+        assert (
+            snapshot.best_discount(
+                supplier.pk, total_purchases=5, current_purchase_amount=10
+            )
+            == discount_bd
+        )
+        # cumulative discounts don't act for buyers without purchases history
+        assert snapshot.best_discount(supplier.pk, current_purchase_amount=9) is None
+
+    def test_shared_snapshot_doesnt_query_sellers(self, market_data: dict):
+        """
+        Checking whether handlers with shared snapshot don't reload sellers data.
+        """
+        data = market_data
+        dealer = G(Dealer)
+        snapshot = MarketSnapshot(Supplier.objects.pre_order_queryset())
+
+        with CaptureQueriesContext(connection) as ctx:
+            for car in [data["car1"], data["car2"]]:
+                offer = DealerOffer(dealer=dealer, car=car, amount=1, max_price=1000)
+                handler = DealerOfferHandler(offer, snapshot=snapshot)
+                handler.process_offer()
+                assert handler.purchase_seller == data["supplier2"]
+                assert handler.purchase_price == 400
+
+            assert len(ctx.captured_queries) <= 4
+
+
+@pytest.mark.django_db
+class TestCharacteristicIndex:
+    def test_index_same_as_characteristic_checks(self):
+        """
+        Checking whether index lookups give the same results as characteristic checks
+        of cars and dealers one by one.
+        """
+        cars = [
+            G(
+                Car,
+                brand="Brand1",
+                car_model="Model1",
+                generation="1",
+                year_release=2000,
+            ),
+            G(
+                Car,
+                brand="Brand1",
+                car_model="Model1",
+                generation="2",
+                year_release=2005,
+            ),
+            G(
+                Car,
+                brand="Brand1",
+                car_model="Model2",
+                generation="1",
+                year_release=2000,
+            ),
+            G(
+                Car,
+                brand="Brand2",
+                car_model="Model1",
+                generation="1",
+                year_release=2010,
+            ),
+        ]
+        characteristics = [
+            G(CarCharacteristic, brand="Brand1"),
+            G(CarCharacteristic, brand="Brand1", car_model="Model1"),
+            G(CarCharacteristic, brand="Brand1", car_model="Model1", generation="2"),
+            G(CarCharacteristic, brand="Brand2", year_release=2010),
+            G(CarCharacteristic, brand="Brand3"),
+        ]
+        dealers = [
+            G(Dealer, car_characteristics=[characteristics[0]]),
+            G(Dealer, car_characteristics=[characteristics[1], characteristics[3]]),
+            G(Dealer, car_characteristics=[characteristics[2]]),
+            G(Dealer, car_characteristics=[characteristics[4]]),
+        ]
+
+        index = CharacteristicIndex()
+        for car in cars:
+            index.add_car(car)
+        for dealer in dealers:
+            for characteristic in dealer.car_characteristics.all():
+                index.add_dealer_characteristic(dealer.pk, characteristic)
+
+        for characteristic in characteristics:
+            assert index.cars_for(characteristic) == {
+                car.pk for car in cars if car.is_fit_characteristic(characteristic)
+            }
+            assert index.dealers_for(characteristic) == {
+                dealer.pk
+                for dealer in dealers
+                if any(
+                    characteristic.is_suitable(dealer_characteristic)
+                    for dealer_characteristic in dealer.car_characteristics.all()
+                )
+            }
+
+    def test_snapshot_stock_for_characteristic(self, market_data: dict):
+        """
+        Checking whether snapshot collects stock items by car characteristic.
+        """
+        data = market_data
+        snapshot = MarketSnapshot(Supplier.objects.pre_order_queryset())
+        characteristic = G(CarCharacteristic, brand="Brand1")
+
+        stock = snapshot.stock_for_characteristic(characteristic)
+        assert stock == {
+            data["supplier1"].pk: [data["supplier1_stock1"]],
+            data["supplier2"].pk: [data["supplier2_stock1"], data["supplier2_stock2"]],
+        }
+
+
+@pytest.mark.django_db
+class TestSupplierMarketCache:
+    def test_cached_market_same_as_queryset_snapshot(self, market_data: dict):
+        """
+        Checking whether snapshot rebuilt from cached rows is equal to snapshot by queryset.
+        """
+        data = market_data
+        characteristic = G(CarCharacteristic, brand="Brand1")
+        expected = MarketSnapshot(Supplier.objects.pre_order_queryset())
+        load_supplier_market()
+
+        with CaptureQueriesContext(connection) as ctx:
+            snapshot = load_supplier_market()
+            assert list(snapshot.sellers) == list(expected.sellers)
+            for car in [data["car1"], data["car2"]]:
+                assert snapshot.stock_for_car(car.pk) == expected.stock_for_car(car.pk)
+                for supplier in [data["supplier1"], data["supplier2"]]:
+                    assert snapshot.best_campaign(
+                        supplier.pk, car.pk
+                    ) == expected.best_campaign(supplier.pk, car.pk)
+            assert snapshot.stock_for_characteristic(
+                characteristic
+            ) == expected.stock_for_characteristic(characteristic)
+            supplier = snapshot.sellers[data["supplier1"].pk]
+            assert list(supplier.discounts.all()) == []
+            stock_item = snapshot.stock_for_car(data["car1"].pk)[supplier.pk][0]
+            assert stock_item.car == data["car1"]
+
+            # only actual stock amounts are loaded from database
+            assert len(ctx.captured_queries) == 1
+
+    def test_cached_market_has_actual_stock_amounts(self, market_data: dict):
+        """
+        Checking whether stock amounts changed by deals are actual in cached market.
+        """
+        data = market_data
+        load_supplier_market()
+        SupplierStockItem.objects.filter(pk=data["supplier2_stock1"].pk).update(
+            amount=3
+        )
+        SupplierStockItem.objects.filter(pk=data["supplier2_stock2"].pk).update(
+            amount=0
+        )
+
+        snapshot = load_supplier_market()
+
+        stock = snapshot.stock_for_car(data["car1"].pk)
+        assert stock[data["supplier2"].pk][0].amount == 3
+        assert snapshot.stock_for_car(data["car2"].pk) == {}
+
+    @pytest.mark.enable_signals
+    def test_supplier_changes_invalidate_market(self, market_data: dict):
+        """
+        Checking whether new stock items and discounts rebuild cached market.
+        """
+        data = market_data
+        load_supplier_market()
+
+        stock_item = G(
+            SupplierStockItem,
+            supplier=data["supplier1"],
+            car=data["car2"],
+            amount=1,
+            price_per_one=100,
+        )
+        discount = G(
+            SupplierDiscount,
+            supplier=data["supplier1"],
+            discount_type="BD",
+            min_amount=1,
+            percentage=5,
+        )
+
+        snapshot = load_supplier_market()
+        assert snapshot.stock_for_car(data["car2"].pk)[data["supplier1"].pk] == [
+            stock_item
+        ]
+        assert snapshot.best_discount(data["supplier1"].pk) == discount
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from ddf import G
+from rest_framework import status
+
+from cars.models import Car
+from customers.models import Customer
+from orders.models import CustomerOffer
+from orders.offer_events import offer_channel, offer_status, offer_status_events
+
+
+@async_to_sync
+async def collect(events) -> list:
+    return [event async for event in events]
+
+
+def collect_events(offer_id: int) -> list:
+    return collect(offer_status_events(CustomerOffer, offer_id))
+
+
+@pytest.fixture
+def open_offer():
+    return G(CustomerOffer, customer=G(Customer), car=G(Car), is_closed=False)
+
+
+@pytest.mark.django_db
+class TestOfferEvents:
+    def test_stored_status_without_redis(self, open_offer, settings):
+        """
+        Checking whether only stored status is sent if pub/sub isn't configured.
+        """
+        settings.OFFER_EVENTS_REDIS_URL = None
+
+        events = collect_events(open_offer.pk)
+
+        assert events == [
+            f"event: status\ndata: {json.dumps(offer_status(open_offer))}\n\n"
+        ]
+
+    def test_stream_until_offer_closed(self, open_offer, settings, fake_redis):
+        """
+        Checking whether published statuses are streamed until the offer is closed.
+        """
+        settings.OFFER_EVENTS_HEARTBEAT = 0
+        closed_status = {**offer_status(open_offer), "is_closed": True}
+        pubsub = fake_redis([offer_status(open_offer), closed_status]).pubsub()
+
+        events = collect_events(open_offer.pk)
+
+        assert pubsub.channels == [offer_channel(CustomerOffer, open_offer.pk)]
+        assert pubsub.closed
+        assert [event.split("\n")[0] for event in events] == ["event: status"] * 3
+        assert json.loads(events[-1].split("data: ")[1]) == closed_status
+
+    def test_stream_timeout(self, open_offer, settings, fake_redis):
+        """
+        Checking whether stream of not closed offer is finished by timeout.
+        """
+        settings.OFFER_EVENTS_TIMEOUT = 0
+        fake_redis()
+
+        events = collect_events(open_offer.pk)
+
+        assert events[-1].startswith("event: timeout")
+
+
+@pytest.mark.django_db
+def test_offer_events_endpoint(api_client, open_offer, settings):
+    """
+    Checking whether events endpoint streams status of the offer.
+    """
+    settings.OFFER_EVENTS_REDIS_URL = None
+
+    response = api_client.get(f"/api/v1/orders/customers/offers/{open_offer.pk}/events")
+    missing = api_client.get("/api/v1/orders/customers/offers/0/events")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "text/event-stream"
+    assert b"".join(collect(response.streaming_content)).startswith(b"event: status")
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+    assert missing.content.startswith(b"event: error")
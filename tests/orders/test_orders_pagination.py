@@ -0,0 +1,165 @@
+import json
+from datetime import datetime
+
+import pytest
+import pytz
+from ddf import G
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from customers.models import Customer
+from dealers.models import Dealer
+from orders.api.v1.serializers import (
+    CustomerDealsHistorySerializer,
+    DealerOfferSerializer,
+)
+from orders.models import CustomerDealsHistory, DealerOffer
+
+
+@pytest.fixture
+def dealer_deals() -> dict:
+    """
+    Fixture with dealer's deals, several deals share the same date.
+    """
+    dealer = G(Dealer)
+    customer = G(Customer)
+    dates = [
+        datetime(2023, 5, 5, tzinfo=pytz.UTC),
+        datetime(2023, 5, 6, tzinfo=pytz.UTC),
+        datetime(2023, 5, 6, tzinfo=pytz.UTC),
+        datetime(2023, 5, 6, tzinfo=pytz.UTC),
+        datetime(2023, 5, 1, tzinfo=pytz.UTC),
+        datetime(2023, 5, 9, tzinfo=pytz.UTC),
+        datetime(2023, 5, 6, tzinfo=pytz.UTC),
+    ]
+    deals = [
+        G(
+            CustomerDealsHistory,
+            dealer=dealer,
+            customer=customer,
+            date=date,
+            amount=index % 3 + 1,
+        )
+        for index, date in enumerate(dates)
+    ]
+    return {"dealer": dealer, "deals": deals}
+
+
+def collect_pages(api_client, url: str, params: dict) -> (list, int):
+    """
+    Function to follow next links and collect rows of all pages.
+    """
+    rows = []
+    pages = 0
+    response = api_client.get(url, data=params)
+    while True:
+        assert response.status_code == 200
+        rows.extend(response.data["results"])
+        pages += 1
+        if not response.data["next"]:
+            return rows, pages
+        response = api_client.get(response.data["next"])
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    @pytest.mark.parametrize(
+        "ordering, order_by",
+        [
+            (None, ["date", "id"]),
+            ("date", ["date", "id"]),
+            ("-date", ["-date", "-id"]),
+            ("amount", ["amount", "id"]),
+            ("-amount", ["-amount", "-id"]),
+        ],
+    )
+    def test_pages_same_as_ordered_list(
+        self, api_client, dealer_deals: dict, ordering, order_by
+    ):
+        """
+        Checking whether pages cover ordered list without gaps and duplicates.
+        """
+        dealer = dealer_deals["dealer"]
+        params = {"page_size": 2}
+        if ordering:
+            params["ordering"] = ordering
+
+        rows, pages = collect_pages(
+            api_client, f"/api/v1/orders/dealers/{dealer.pk}/customers", params
+        )
+
+        expected = CustomerDealsHistorySerializer(
+            CustomerDealsHistory.objects.filter(dealer=dealer).order_by(*order_by),
+            many=True,
+        ).data
+        assert rows == expected
+        assert pages == 4
+
+    def test_page_queries_dont_depend_on_position(self, api_client, dealer_deals: dict):
+        """
+        Checking whether every page is fetched by one query with key condition.
+        """
+        url = f"/api/v1/orders/dealers/{dealer_deals['dealer'].pk}/customers"
+        response = api_client.get(url, data={"page_size": 3})
+
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get(response.data["next"])
+        history_queries = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if "orders_customerdealshistory" in query["sql"]
+        ]
+        assert len(history_queries) == 1
+        assert "OFFSET" not in history_queries[0]
+
+    @pytest.mark.parametrize(
+        "cursor", ["broken", "WyJhbW91bnQiLCBmYWxzZSwgIjEiLCAxXQ=="]
+    )
+    def test_invalid_cursor(self, api_client, dealer_deals: dict, cursor):
+        """
+        Checking whether broken cursor or cursor of another ordering is rejected.
+        """
+        url = f"/api/v1/orders/dealers/{dealer_deals['dealer'].pk}/customers"
+        response = api_client.get(url, data={"cursor": cursor})
+
+        assert response.status_code == 404
+
+    def test_offers_pagination(self, api_client):
+        """
+        Checking whether offers are paginated by creation date.
+        """
+        offers = [G(DealerOffer) for _ in range(5)]
+
+        rows, pages = collect_pages(
+            api_client, "/api/v1/orders/dealers/offers", {"page_size": 2}
+        )
+
+        assert rows == DealerOfferSerializer(offers, many=True).data
+        assert pages == 3
+
+
+@pytest.mark.django_db
+class TestNDJSONExport:
+    def test_export_whole_list(self, api_client, dealer_deals: dict):
+        """
+        Checking whether export streams all filtered rows as NDJSON.
+        """
+        dealer = dealer_deals["dealer"]
+        response = api_client.get(
+            f"/api/v1/orders/dealers/{dealer.pk}/customers",
+            data={"export": "ndjson", "ordering": "-date", "amount__gt": 1},
+        )
+
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        expected = CustomerDealsHistorySerializer(
+            CustomerDealsHistory.objects.filter(dealer=dealer, amount__gt=1).order_by(
+                "-date", "-id"
+            ),
+            many=True,
+        ).data
+        assert rows == json.loads(json.dumps(expected))
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from marketing.models import DealerDiscount
+from orders.pricing import (
+    CAMPAIGN_PRICE,
+    DISCOUNT_PRICE,
+    PLAIN_PRICE,
+    percentages_to_basis_points,
+    prices_with_discount,
+    select_best_price,
+)
+
+
+class TestPricing:
+    def test_prices_with_discount_same_as_discount_counter(self):
+        """
+        Checking whether vectorized prices are equal to DiscountCounter.count_price_with_discount.
+        """
+        prices = [1, 99, 100, 101, 12345, 999999, 4567891]
+        percentages = [
+            Decimal("0"),
+            Decimal("0.01"),
+            Decimal("3.33"),
+            Decimal("12.50"),
+            Decimal("50"),
+            Decimal("99.99"),
+            Decimal("100"),
+        ]
+        for percentage in percentages:
+            expected = [
+                DealerDiscount(percentage=percentage).count_price_with_discount(price)
+                for price in prices
+            ]
+            basis_points = percentages_to_basis_points([percentage] * len(prices))
+            result = prices_with_discount(np.array(prices), basis_points)
+            assert result.tolist() == expected
+
+    @pytest.mark.parametrize(
+        "prices, campaigns, discounts, expected",
+        [
+            ([500, 400], [0, 0], [0, 0], (1, 400, PLAIN_PRICE)),
+            ([500, 400], [Decimal("30"), 0], [0, 0], (0, 350, CAMPAIGN_PRICE)),
+            ([500, 400], [0, 0], [0, Decimal("10")], (1, 360, DISCOUNT_PRICE)),
+            # campaign is preferred over discount with the same price
+            ([500], [Decimal("10")], [Decimal("10")], (0, 450, CAMPAIGN_PRICE)),
+            ([500], [Decimal("10")], [Decimal("20")], (0, 400, DISCOUNT_PRICE)),
+            # the first seller wins among equal prices
+            ([400, 500], [0, Decimal("20")], [0, 0], (0, 400, PLAIN_PRICE)),
+            # discount which doesn't change price isn't applied
+            ([100], [0], [Decimal("0.01")], (0, 100, PLAIN_PRICE)),
+        ],
+    )
+    def test_select_best_price(self, prices, campaigns, discounts, expected):
+        """
+        Checking whether the best price and its kind are selected.
+        """
+        assert select_best_price(prices, campaigns, discounts) == expected
+
+    def test_select_best_price_big_prices(self):
+        """
+        Checking whether prices too big for int64 arithmetic are calculated precisely.
+        """
+        price = 2**62
+        result = select_best_price([price], [Decimal("12.34")], [0])
+        expected = DealerDiscount(
+            percentage=Decimal("12.34")
+        ).count_price_with_discount(price)
+        assert result == (0, expected, CAMPAIGN_PRICE)
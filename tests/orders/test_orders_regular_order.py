@@ -7,7 +7,19 @@ from django.db import connection
 
 from cars.models import Car
 from dealers.models import Dealer, DealerStockItem
-from orders.models import CustomerDealsHistory
+from orders.models import (
+    CustomerDealsHistory,
+    DealerDealsHistory,
+    TotalSupplierPurchase,
+)
+from orders.services import (
+    DEAL_COMPLETED,
+    DEAL_INSUFFICIENT_BALANCE,
+    DEAL_OUT_OF_STOCK,
+    dealer_regular_purchase_handler,
+    settle_dealer_purchases,
+)
+from orders.market import load_supplier_market
 from orders.tasks import run_cars_purchase
 from suppliers.models import Supplier, SupplierStockItem
 from tests.conftest import parse_captured_queries_context
@@ -66,21 +78,32 @@ def dealer_regular_order_data_without_marketing() -> dict:
 
 @pytest.mark.django_db
 class TestRegularOrder:
+    @pytest.mark.parametrize(
+        "warm_market, max_selects, max_queries", [(False, 16, 25), (True, 12, 21)]
+    )
     def test_dealer_regular_purchase_handler_no_marketing(
-        self, dealer_regular_order_data_without_marketing
+        self,
+        dealer_regular_order_data_without_marketing,
+        warm_market,
+        max_selects,
+        max_queries,
     ):
         """
-        Test regular purchasing for dealer without any marketing events.
+        Test regular purchasing for dealer without any marketing events
+        with empty and cached suppliers market.
         """
         data = dealer_regular_order_data_without_marketing
+        if warm_market:
+            # suppliers market is cached by previous tasks
+            load_supplier_market()
         with CaptureQueriesContext(connection) as ctx:
             run_cars_purchase(data["dealer"].pk)
 
             q_select, q_update, q_insert, q_len = parse_captured_queries_context(ctx)
-            assert q_select <= 16
-            assert q_update <= 8
-            assert q_insert <= 4
-            assert q_len <= 36
+            assert q_select <= max_selects
+            assert q_update <= 4
+            assert q_insert <= 3
+            assert q_len <= max_queries
 
         dealer = dealer_regular_order_data_without_marketing["dealer"]
         dealer.refresh_from_db()
@@ -93,3 +116,141 @@ class TestRegularOrder:
         stock2 = data["dealer_stock_item2"]
         stock2.refresh_from_db()
         assert data["dealer_stock_item2"].amount == 37
+
+    def test_settle_dealer_purchases(self):
+        """
+        Test settlement of several dealer's purchases in one transaction.
+        """
+        dealer = G(Dealer, balance=10_000)
+        car1, car2, car3 = G(Car), G(Car), G(Car)
+        dealer_stock_item1 = G(DealerStockItem, dealer=dealer, car=car1, amount=1)
+        supplier1 = G(Supplier, balance=0)
+        supplier2 = G(Supplier, balance=0)
+        total_purchase = G(
+            TotalSupplierPurchase, dealer=dealer, supplier=supplier1, amount=5
+        )
+        supplier1_stock_item1 = G(
+            SupplierStockItem, supplier=supplier1, car=car1, amount=10
+        )
+        supplier1_stock_item2 = G(
+            SupplierStockItem, supplier=supplier1, car=car2, amount=10
+        )
+        supplier2_stock_item3 = G(
+            SupplierStockItem, supplier=supplier2, car=car3, amount=1
+        )
+        purchases = [
+            {
+                "seller": supplier1,
+                "car": car1,
+                "price": 1000,
+                "stock_item": supplier1_stock_item1,
+                "amount": 2,
+            },
+            {
+                "seller": supplier1,
+                "car": car2,
+                "price": 2000,
+                "stock_item": supplier1_stock_item2,
+                "amount": 3,
+            },
+            {
+                "seller": supplier2,
+                "car": car3,
+                "price": 500,
+                "stock_item": supplier2_stock_item3,
+                "amount": 2,
+            },
+            {
+                "seller": supplier2,
+                "car": car2,
+                "price": 9000,
+                "stock_item": supplier1_stock_item2,
+                "amount": 1,
+            },
+        ]
+
+        with CaptureQueriesContext(connection) as ctx:
+            results = settle_dealer_purchases(dealer, purchases)
+            assert len(ctx.captured_queries) <= 15
+
+        assert results == [
+            DEAL_COMPLETED,
+            DEAL_COMPLETED,
+            DEAL_OUT_OF_STOCK,
+            DEAL_INSUFFICIENT_BALANCE,
+        ]
+        assert dealer.balance == 2000
+        dealer.refresh_from_db()
+        supplier1.refresh_from_db()
+        assert dealer.balance == 2000
+        assert supplier1.balance == 8000
+
+        supplier1_stock_item2.refresh_from_db()
+        assert supplier1_stock_item2.amount == 7
+        dealer_stock_item1.refresh_from_db()
+        assert dealer_stock_item1.amount == 3
+        assert dealer.stock.get(car=car2).amount == 3
+        total_purchase.refresh_from_db()
+        assert total_purchase.amount == 10
+        assert DealerDealsHistory.objects.filter(dealer=dealer).count() == 2
+        # bulk created deals are added to daily rollup
+        assert (
+            DealerDealsHistory.objects.get_total_amount_of_cars({"dealer": dealer}) == 5
+        )
+
+    def test_rejected_purchase_balance_spent(
+        self, dealer_regular_order_data_without_marketing
+    ):
+        """
+        Test whether balance of purchase rejected as out of stock is spent on the next one.
+        """
+        data = dealer_regular_order_data_without_marketing
+        dealer = data["dealer"]
+        Dealer.objects.filter(pk=dealer.pk).update(balance=40_000)
+        dealer.refresh_from_db()
+        # car1 is bought first and its cheapest stock is sold out after market is loaded
+        G(CustomerDealsHistory, dealer=dealer, car=data["car1"])
+        suppliers = load_supplier_market()
+        SupplierStockItem.objects.filter(car=data["car1"]).update(amount=1)
+
+        dealer_regular_purchase_handler(dealer, suppliers)
+
+        dealer.refresh_from_db()
+        assert dealer.balance == 6000
+        assert dealer.stock.get(car=data["car1"]).amount == 0
+        assert dealer.stock.get(car=data["car2"]).amount == 37
+
+    def test_settle_partial_purchase(self):
+        """
+        Test whether purchase allowing partial amount is reduced to affordable one
+        and purchases after unaffordable one are rejected.
+        """
+        dealer = G(Dealer, balance=5_500)
+        supplier = G(Supplier, balance=0)
+        stock_items = [
+            G(SupplierStockItem, supplier=supplier, car=G(Car), amount=10)
+            for _ in range(3)
+        ]
+        purchases = [
+            {
+                "seller": supplier,
+                "car": stock_item.car,
+                "price": 1000,
+                "stock_item": stock_item,
+                "amount": 10,
+                "partial": partial,
+            }
+            for stock_item, partial in zip(stock_items, [True, False, True])
+        ]
+
+        results = settle_dealer_purchases(dealer, purchases)
+
+        assert results == [
+            DEAL_COMPLETED,
+            DEAL_INSUFFICIENT_BALANCE,
+            DEAL_INSUFFICIENT_BALANCE,
+        ]
+        assert purchases[0]["amount"] == 5
+        dealer.refresh_from_db()
+        assert dealer.balance == 500
+        assert dealer.stock.get().amount == 5
@@ -0,0 +1,55 @@
+import pytest
+from ddf import G
+
+from car_dealership.celery import app as celery_app
+from dealers.models import Dealer
+from orders.tasks import (
+    check_cooperation_profitability,
+    handle_dealer_offer,
+    regular_cooperation_profitability_check,
+    run_cars_purchase,
+)
+
+
+@pytest.mark.parametrize(
+    "task_name, queue",
+    [
+        ("users.tasks.email_account_confirmation", "email"),
+        ("orders.tasks.handle_customer_offer", "offers"),
+        ("orders.tasks.run_cars_purchase", "regular_purchase"),
+        ("orders.tasks.regular_order_by_customers", "regular_purchase"),
+        ("orders.tasks.check_cooperation_profitability", "analytics"),
+        ("car_dealership.celery.debug_task", "default"),
+    ],
+)
+def test_tasks_routing(task_name, queue):
+    """
+    Checking whether tasks are routed to queues of their worker pools.
+    """
+    route = celery_app.amqp.router.route({}, task_name)
+    assert route["queue"].name == queue
+
+
+def test_deal_tasks_acks_late():
+    """
+    Checking whether deal tasks are acknowledged after completion and have time limits.
+    """
+    for task in [handle_dealer_offer, run_cars_purchase]:
+        assert task.acks_late
+        assert task.reject_on_worker_lost
+        assert task.soft_time_limit < task.time_limit
+
+
+@pytest.mark.django_db
+def test_cooperation_check_fan_out(monkeypatch):
+    """
+    Checking whether cooperation of every active dealer is checked by separate task.
+    """
+    dealers = [G(Dealer, is_active=True), G(Dealer, is_active=True)]
+    _inactive_dealer = G(Dealer, is_active=False)
+    dealer_ids = []
+    monkeypatch.setattr(check_cooperation_profitability, "delay", dealer_ids.append)
+
+    regular_cooperation_profitability_check()
+
+    assert sorted(dealer_ids) == sorted(dealer.pk for dealer in dealers)
@@ -4,7 +4,13 @@ from orders.models import (
     CustomerDealsHistory,
     DealerDealsHistory,
 )
-from orders.services import complete_deal_transaction
+from dealers.models import Dealer, DealerStockItem
+from orders.services import (
+    DEAL_COMPLETED,
+    DEAL_INSUFFICIENT_BALANCE,
+    DEAL_OUT_OF_STOCK,
+    complete_deal_transaction,
+)
 
 
 @pytest.mark.django_db
@@ -63,3 +69,83 @@ class TestTransaction:
         assert DealerDealsHistory.objects.filter(
             dealer=buyer_dealer, supplier=seller_supplier, car=car
         )
+
+    def test_transaction_out_of_stock(self, tr_data: dict):
+        """
+        Checking whether deal isn't completed if stock item was sold out concurrently.
+        """
+        buyer_customer = tr_data["buyer_customer"]
+        seller_dealer = tr_data["seller_dealer"]
+        stock_item_dealer = tr_data["stock_item_dealer"]
+        # stock item is sold out by another worker
+        DealerStockItem.objects.filter(pk=stock_item_dealer.pk).update(amount=0)
+
+        result = complete_deal_transaction(
+            buyer=buyer_customer,
+            seller=seller_dealer,
+            car=tr_data["car"],
+            price=tr_data["price"],
+            stock_item=stock_item_dealer,
+            amount=1,
+        )
+
+        assert result == DEAL_OUT_OF_STOCK
+        assert stock_item_dealer.amount == 0
+        buyer_customer.refresh_from_db()
+        seller_dealer.refresh_from_db()
+        assert buyer_customer.balance == 2000
+        assert seller_dealer.balance == 14000
+        assert not CustomerDealsHistory.objects.filter(customer=buyer_customer).exists()
+
+    def test_transaction_insufficient_balance(self, tr_data: dict):
+        """
+        Checking whether deal is rolled back if buyer's balance was spent concurrently.
+        """
+        buyer_dealer = tr_data["buyer_dealer"]
+        seller_supplier = tr_data["seller_supplier"]
+        stock_item_supplier = tr_data["stock_item_supplier"]
+        # balance is spent by another worker
+        Dealer.objects.filter(pk=buyer_dealer.pk).update(balance=1000)
+
+        result = complete_deal_transaction(
+            buyer=buyer_dealer,
+            seller=seller_supplier,
+            car=tr_data["car"],
+            price=tr_data["price"],
+            stock_item=stock_item_supplier,
+            amount=2,
+        )
+
+        assert result == DEAL_INSUFFICIENT_BALANCE
+        assert buyer_dealer.balance == 1000
+        stock_item_supplier.refresh_from_db()
+        seller_supplier.refresh_from_db()
+        assert stock_item_supplier.amount == 10
+        assert seller_supplier.balance == 80500
+        assert not buyer_dealer.stock.filter(car=tr_data["car"]).exists()
+
+    def test_transaction_keeps_concurrent_updates(self, tr_data: dict):
+        """
+        Checking whether deal doesn't overwrite values changed by another worker.
+        """
+        buyer_customer = tr_data["buyer_customer"]
+        seller_dealer = tr_data["seller_dealer"]
+        stock_item_dealer = tr_data["stock_item_dealer"]
+        # another customer bought a car after stock item was loaded
+        DealerStockItem.objects.filter(pk=stock_item_dealer.pk).update(amount=5)
+        Dealer.objects.filter(pk=seller_dealer.pk).update(balance=20000)
+
+        result = complete_deal_transaction(
+            buyer=buyer_customer,
+            seller=seller_dealer,
+            car=tr_data["car"],
+            price=tr_data["price"],
+            stock_item=stock_item_dealer,
+            amount=1,
+        )
+
+        assert result == DEAL_COMPLETED
+        stock_item_dealer.refresh_from_db()
+        seller_dealer.refresh_from_db()
+        assert stock_item_dealer.amount == 4
+        assert seller_dealer.balance == 21000
@@ -1,6 +1,9 @@
+import json
 from datetime import datetime
 import pytz
 from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from ddf import G
 import pytest
@@ -306,3 +309,144 @@ def test_stats_supplier(
 
     assert response.status_code == status.HTTP_200_OK
     assert response.data["amount"] == result
+
+
+@pytest.mark.parametrize(
+    "querydata",
+    [
+        {"stats": "all"},
+        {"stats": "all", "start_date": "2023-01-01", "end_date": "2023-06-06"},
+        {"stats": "all", "start_date": "2023-05-05"},
+        {"stats": "revenue,amount_sold_cars", "end_date": "2023-10-10"},
+    ],
+)
+@pytest.mark.django_db
+def test_stats_dealer_multiple(
+    api_client, querydata, specific_dealer, init_dealer_data
+):
+    """
+    Test to check whether dealers stats API returns several stats with one query
+    equal to stats requested one by one.
+    """
+    api_client.force_authenticate(user=specific_dealer.user_profile)
+    url = f"/api/v1/stats/dealers/{specific_dealer.pk}"
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(url, data=querydata)
+        stats_queries = [
+            query
+            for query in ctx.captured_queries
+            if "dailystats" in query["sql"] or "dealshistory" in query["sql"]
+        ]
+        assert len(stats_queries) == 1
+
+    assert response.status_code == status.HTTP_200_OK
+    stats = response.data["stats"]
+    if querydata["stats"] == "all":
+        assert len(stats) == 6
+    else:
+        assert list(stats) == ["revenue", "amount_sold_cars"]
+    for stats_type, amount in stats.items():
+        single_response = api_client.get(url, data={**querydata, "stats": stats_type})
+        assert single_response.data["amount"] == amount
+
+
+@pytest.mark.django_db
+def test_stats_multiple_unknown(api_client, specific_customer):
+    """
+    Test to check whether unknown stats in list aren't allowed.
+    """
+    api_client.force_authenticate(user=specific_customer.user_profile)
+    response = api_client.get(
+        f"/api/v1/stats/customers/{specific_customer.pk}",
+        data={"stats": "bought_cars,revenue"},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    "querydata, expected",
+    [
+        (
+            {"stats": "revenue", "bucket": "month"},
+            [
+                {"date": "2023-05-01", "revenue": 5_000},
+                {"date": "2023-10-01", "revenue": 5_000},
+            ],
+        ),
+        (
+            {"stats": "amount_bought_cars,revenue", "bucket": "week"},
+            [
+                {"date": "2023-05-01", "amount_bought_cars": 2, "revenue": 5_000},
+                {"date": "2023-10-09", "amount_bought_cars": 2, "revenue": 5_000},
+            ],
+        ),
+        (
+            {"stats": "amount_sold_cars", "start_date": "2023-05-05"},
+            [
+                {"date": "2023-10-10", "amount_sold_cars": 1},
+            ],
+        ),
+        (
+            {"stats": "revenue", "start_date": "2024-01-01"},
+            [],
+        ),
+    ],
+)
+@pytest.mark.django_db
+def test_stats_dealer_series(
+    api_client, querydata, expected, specific_dealer, init_dealer_data
+):
+    """
+    Test to check dealers stats series API with different buckets.
+    """
+    api_client.force_authenticate(user=specific_dealer.user_profile)
+    response = api_client.get(
+        f"/api/v1/stats/dealers/{specific_dealer.pk}/series", data=querydata
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert json.loads(b"".join(response.streaming_content)) == expected
+
+
+@pytest.mark.parametrize(
+    "querydata",
+    [
+        {"stats": "revenue", "bucket": "year"},
+        {"stats": "unknown"},
+        {"bucket": "day"},
+    ],
+)
+@pytest.mark.django_db
+def test_stats_series_invalid_params(api_client, querydata, specific_supplier):
+    """
+    Test to check whether stats series API validates params.
+    """
+    api_client.force_authenticate(user=specific_supplier.user_profile)
+    response = api_client.get(
+        f"/api/v1/stats/suppliers/{specific_supplier.pk}/series", data=querydata
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_stats_series_without_server_side_cursors(
+    api_client, monkeypatch, specific_dealer, init_dealer_data
+):
+    """
+    Test to check whether stats series are fetched by plain cursor behind PgBouncer.
+    """
+    monkeypatch.setitem(connection.settings_dict, "DISABLE_SERVER_SIDE_CURSORS", True)
+    monkeypatch.setattr(connection, "chunked_cursor", None)
+    api_client.force_authenticate(user=specific_dealer.user_profile)
+    response = api_client.get(
+        f"/api/v1/stats/dealers/{specific_dealer.pk}/series",
+        data={"stats": "revenue", "bucket": "month"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert json.loads(b"".join(response.streaming_content)) == [
+        {"date": "2023-05-01", "revenue": 5_000},
+        {"date": "2023-10-01", "revenue": 5_000},
+    ]
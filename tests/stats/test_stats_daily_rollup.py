@@ -0,0 +1,191 @@
+from datetime import datetime
+import pytest
+import pytz
+from ddf import G
+from django.db import connection
+from django.db.models import F, Sum
+from django.test.utils import CaptureQueriesContext
+
+from cars.models import Car
+from customers.models import Customer
+from dealers.models import Dealer, DealerStockItem
+from orders.models import CustomerDealsDailyStats, CustomerDealsHistory
+from orders.services import complete_deal_transaction
+from stats.utils import get_filter_params
+
+
+@pytest.fixture
+def dealer_deals() -> dict:
+    """
+    Fixture with customers' deals with dealer on different days including midnight.
+    """
+    dealer = G(Dealer)
+    customers = [G(Customer), G(Customer), G(Customer)]
+    cars = [G(Car), G(Car)]
+    dates = [
+        datetime(2023, 5, 5, 0, 0, tzinfo=pytz.UTC),
+        datetime(2023, 5, 5, 15, 30, tzinfo=pytz.UTC),
+        datetime(2023, 5, 6, 10, 0, tzinfo=pytz.UTC),
+        datetime(2023, 5, 7, 0, 0, tzinfo=pytz.UTC),
+        datetime(2023, 5, 7, 23, 59, tzinfo=pytz.UTC),
+        datetime(2023, 5, 9, 12, 0, tzinfo=pytz.UTC),
+    ]
+    for index, date in enumerate(dates):
+        G(
+            CustomerDealsHistory,
+            dealer=dealer,
+            customer=customers[index % 3],
+            car=cars[index % 2],
+            amount=index + 1,
+            price_per_one=1000 * (index + 1),
+            date=date,
+        )
+    # deal of another dealer
+    G(CustomerDealsHistory, customer=customers[0], car=cars[0], date=dates[0])
+    return {"dealer": dealer, "customers": customers, "cars": cars}
+
+
+def assert_rollup_same_as_history(dealer: Dealer, start_date=None, end_date=None):
+    """
+    Function to check whether stats calculated by daily rollup are equal to stats by deals history.
+    """
+    filter_params = get_filter_params("dealer", dealer, start_date, end_date)
+    deals = CustomerDealsHistory.objects.filter(**filter_params)
+    manager = CustomerDealsHistory.objects
+
+    assert (
+        manager.get_total_amount_of_cars(filter_params)
+        == deals.aggregate(total=Sum("amount"))["total"]
+    )
+    assert (
+        manager.get_total_cost(filter_params)
+        == deals.aggregate(total=Sum(F("amount") * F("price_per_one")))["total"]
+    )
+    assert (
+        manager.get_amount_of_unique_clients(filter_params)
+        == deals.values("customer").distinct().count()
+    )
+    assert (
+        manager.get_amount_of_sold_unique_cars(filter_params)
+        == deals.values("car").distinct().count()
+    )
+
+
+@pytest.mark.django_db
+class TestDealsDailyRollup:
+    @pytest.mark.parametrize(
+        "start_date, end_date",
+        [
+            (None, None),
+            ("2023-05-05", "2023-05-07"),
+            ("2023-05-05", "2023-05-05"),
+            ("2023-05-06", "2023-05-09"),
+            ("2023-05-05", None),
+            ("2023-05-07", None),
+            (None, "2023-05-07"),
+            (None, "2023-05-05"),
+            ("2023-06-01", None),
+        ],
+    )
+    def test_rollup_same_as_history(self, dealer_deals: dict, start_date, end_date):
+        """
+        Checking whether stats calculated by daily rollup are equal to stats by deals history.
+        """
+        assert_rollup_same_as_history(dealer_deals["dealer"], start_date, end_date)
+
+    def test_rollup_groups_deals_by_day(self, dealer_deals: dict):
+        """
+        Checking whether deals of the same day, participants and car are merged in one row.
+        """
+        dealer = dealer_deals["dealer"]
+        customer = dealer_deals["customers"][0]
+        car = dealer_deals["cars"][0]
+        date = datetime(2023, 8, 1, 10, 0, tzinfo=pytz.UTC)
+        for _ in range(2):
+            G(
+                CustomerDealsHistory,
+                dealer=dealer,
+                customer=customer,
+                car=car,
+                amount=2,
+                price_per_one=500,
+                date=date,
+            )
+
+        stats = CustomerDealsDailyStats.objects.get(
+            dealer=dealer, customer=customer, car=car, day=date.date()
+        )
+        assert stats.amount == 4
+        assert stats.revenue == 2000
+
+    def test_full_days_period_doesnt_query_history(self, dealer_deals: dict):
+        """
+        Checking whether period of full days is calculated only by rollup.
+        """
+        filter_params = get_filter_params(
+            "dealer", dealer_deals["dealer"], end_date="2023-05-07"
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            amount = CustomerDealsHistory.objects.get_total_amount_of_cars(
+                filter_params
+            )
+            assert len(ctx.captured_queries) == 1
+            assert "orders_customerdealshistory" not in ctx.captured_queries[0]["sql"]
+        assert amount == 1 + 2 + 3
+
+    def test_deal_transaction_updates_rollup(self):
+        """
+        Checking whether completed deal is added to daily rollup.
+        """
+        customer = G(Customer, balance=10_000)
+        dealer = G(Dealer, balance=0)
+        car = G(Car)
+        stock_item = G(DealerStockItem, dealer=dealer, car=car, amount=5)
+
+        complete_deal_transaction(
+            buyer=customer,
+            seller=dealer,
+            car=car,
+            price=3000,
+            stock_item=stock_item,
+            amount=2,
+        )
+
+        filter_params = get_filter_params("dealer", dealer)
+        assert CustomerDealsHistory.objects.get_total_cost(filter_params) == 6000
+        assert CustomerDealsDailyStats.objects.get(dealer=dealer).amount == 2
+
+    def test_changed_deal_updates_rollup(self, dealer_deals: dict):
+        """
+        Checking whether changed deal is moved in daily rollup and its old day is emptied.
+        """
+        dealer = dealer_deals["dealer"]
+        deal = CustomerDealsHistory.objects.get(
+            dealer=dealer, date=datetime(2023, 5, 9, 12, 0, tzinfo=pytz.UTC)
+        )
+        deal.amount = 10
+        deal.date = datetime(2023, 5, 6, 12, 0, tzinfo=pytz.UTC)
+        deal.save()
+
+        assert_rollup_same_as_history(dealer)
+        assert not CustomerDealsDailyStats.objects.filter(
+            dealer=dealer, day=datetime(2023, 5, 9).date()
+        ).exists()
+
+    def test_deleted_deals_removed_from_rollup(self, dealer_deals: dict):
+        """
+        Checking whether deleted deals are subtracted from daily rollup.
+        """
+        dealer = dealer_deals["dealer"]
+        CustomerDealsHistory.objects.filter(
+            dealer=dealer, customer=dealer_deals["customers"][0]
+        ).first().delete()
+        CustomerDealsHistory.objects.filter(
+            dealer=dealer, customer=dealer_deals["customers"][1]
+        ).delete()
+
+        assert_rollup_same_as_history(dealer)
+        assert_rollup_same_as_history(dealer, "2023-05-05", "2023-05-07")
+        assert not CustomerDealsDailyStats.objects.filter(
+            dealer=dealer, customer=dealer_deals["customers"][1]
+        ).exists()